@@ -1,32 +1,41 @@
 import asyncio
 import logging
-from datetime import timedelta
+from datetime import datetime, timedelta
+from typing import Any, Callable
 
 import async_timeout
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, CALLBACK_TYPE, callback
 from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity_registry import async_get
+from homeassistant.helpers.event import async_track_time_change
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator, UpdateFailed
 )
 from .const import (
     TIME_UPDATE, DOMAIN, MANUFACTURER, COUNTER_CONNECT, PLATFORMS, ENTRIES,
-    CURRENT_ENTITY_IDS, STATUS_THERMO, TIME_SLEEP_REQUEST, OFF,
-    FIRMWARE_CHECKER, TIME_OUT_UPDATE_DATA_GENERAL
+    CURRENT_ENTITY_IDS, STATUS_THERMO, OFF, HOSTS, MEGAD_IDS,
+    FIRMWARE_CHECKER, TIME_OUT_UPDATE_DATA_GENERAL, CADENCE_I2C,
+    CADENCE_THERMOSTATS, CADENCE_PIDS, CADENCE_STATUS, CADENCE_SWEEP,
+    PUSH_FIRST, PollCadence, CONFIG_DRIFT, DRIFT_CHECK_HOUR, REACTIONS,
+    STATE_BUTTON, BATCH_WINDOW
 )
-from .core.base_ports import OneWireSensorPort, ReaderPort
+from .core.base_ports import OneWireSensorPort, ReaderPort, ReleyPortOut
 from .core.config_manager import MegaDConfigManager
 from .core.enums import ModeInMegaD, TypePortMegaD
 from .core.exceptions import InvalidSettingPort, FirmwareUpdateInProgress
 from .core.megad import MegaD
 from .core.models_megad import DeviceMegaD, PIDConfig
+from .core.reactions import ReactionEngine
 from .core.request_to_ablogru import FirmwareChecker
 from .core.server import MegadHttpView
-from .core.utils import get_action_turnoff
+from .core.utils import (
+    get_action_turnoff, get_pid_context, get_drift_check_offset
+)
+from .services import async_setup_services
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -36,9 +45,22 @@ CONFIG_SCHEMA = cv.config_entry_only_config_schema("megad")
 async def async_setup(hass: HomeAssistant, config: dict):
     """Регистрируем HTTP ручку"""
     hass.http.register_view(MegadHttpView())
+    async_setup_services(hass)
     return True
 
 
+def get_poll_cadence(data: dict) -> PollCadence:
+    """Периодичность опроса из настроек интеграции."""
+    default = PollCadence()
+    return PollCadence(
+        i2c=data.get(CADENCE_I2C, default.i2c),
+        thermostats=data.get(CADENCE_THERMOSTATS, default.thermostats),
+        pids=data.get(CADENCE_PIDS, default.pids),
+        status=data.get(CADENCE_STATUS, default.status),
+        sweep=data.get(CADENCE_SWEEP, default.sweep),
+    )
+
+
 def remove_entity(hass: HomeAssistant, current_entries_id: list,
                   config_entry: ConfigEntry):
     """Удаление неиспользуемых сущностей"""
@@ -65,14 +87,14 @@ async def async_setup_entry(
     manager_config = MegaDConfigManager(
         url, file_path, async_get_clientsession(hass)
     )
-    await manager_config.read_config_file(file_path)
-    megad_config = await manager_config.create_config_megad()
+    megad_config = await manager_config.load_config_megad()
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN].setdefault(FIRMWARE_CHECKER, {})
     hass.data[DOMAIN].setdefault(ENTRIES, {})
     hass.data[DOMAIN][ENTRIES][entry_id] = None
     if not hass.data[DOMAIN][FIRMWARE_CHECKER]:
         fw_checker = FirmwareChecker(hass)
+        await fw_checker.async_load()
         await fw_checker.update_page_firmwares()
         hass.data[DOMAIN][FIRMWARE_CHECKER] = fw_checker
         _LOGGER.debug(f'Добавлен firmware checker: '
@@ -82,20 +104,35 @@ async def async_setup_entry(
         config=megad_config,
         url=url,
         config_path=file_path,
-        fw_checker=hass.data[DOMAIN][FIRMWARE_CHECKER]
+        fw_checker=hass.data[DOMAIN][FIRMWARE_CHECKER],
+        cadence=get_poll_cadence(config_entry.data),
+        push_first=config_entry.data.get(PUSH_FIRST, False)
     )
     await megad.async_init_i2c_bus()
     await megad.check_local_software()
 
-    coordinator = MegaDCoordinator(hass=hass, megad=megad)
+    coordinator = MegaDCoordinator(
+        hass=hass, megad=megad,
+        reactions=ReactionEngine(config_entry.data.get(REACTIONS, '')),
+        batch_window=config_entry.data.get(BATCH_WINDOW, 0) / 1000
+    )
     await coordinator.async_config_entry_first_refresh()
 
     hass.data[DOMAIN].setdefault(CURRENT_ENTITY_IDS, {})
     hass.data[DOMAIN][CURRENT_ENTITY_IDS][entry_id] = []
     hass.data[DOMAIN][ENTRIES][entry_id] = coordinator
+    hass.data[DOMAIN].setdefault(HOSTS, {})
+    hass.data[DOMAIN][HOSTS][megad.domain] = coordinator
+    hass.data[DOMAIN].setdefault(MEGAD_IDS, {})
+    hass.data[DOMAIN][MEGAD_IDS][megad.id] = coordinator
     await hass.config_entries.async_forward_entry_setups(
         config_entry, PLATFORMS
     )
+    drift_minute, drift_second = get_drift_check_offset(entry_id)
+    config_entry.async_on_unload(async_track_time_change(
+        hass, coordinator.async_scheduled_drift_check,
+        hour=DRIFT_CHECK_HOUR, minute=drift_minute, second=drift_second
+    ))
     current_entries_id = hass.data[DOMAIN][CURRENT_ENTITY_IDS][entry_id]
     remove_entity(hass, current_entries_id, config_entry)
     _LOGGER.debug(f'Unique_id актуальных сущностей контроллера {megad.id}: '
@@ -119,7 +156,16 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
         unload_ok = await hass.config_entries.async_unload_platforms(
             entry, PLATFORMS
         )
-        hass.data[DOMAIN][ENTRIES].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN][ENTRIES].pop(entry.entry_id)
+        if coordinator is not None:
+            coordinator.cancel_timers()
+            megad = coordinator.megad
+            hosts = hass.data[DOMAIN].get(HOSTS, {})
+            if hosts.get(megad.domain) is coordinator:
+                hosts.pop(megad.domain)
+            megad_ids = hass.data[DOMAIN].get(MEGAD_IDS, {})
+            if megad_ids.get(megad.id) is coordinator:
+                megad_ids.pop(megad.id)
 
         return unload_ok
     except Exception as e:
@@ -132,7 +178,10 @@ class MegaDCoordinator(DataUpdateCoordinator):
 
     _count_connect: int = 0
 
-    def __init__(self, hass, megad):
+    def __init__(
+            self, hass, megad, reactions: ReactionEngine | None = None,
+            batch_window: float = 0
+    ):
         super().__init__(
             hass,
             _LOGGER,
@@ -140,6 +189,61 @@ class MegaDCoordinator(DataUpdateCoordinator):
             update_interval=timedelta(seconds=TIME_UPDATE),
         )
         self.megad: MegaD = megad
+        self.reactions: ReactionEngine = reactions or ReactionEngine()
+        self._reset_timers: dict[int, asyncio.TimerHandle] = {}
+        self.batch_window: float = batch_window
+        self._pending_events: dict[tuple[int, bool], dict] = {}
+        self._flush_handle: asyncio.Handle | None = None
+        self._context_listeners: dict[Any, list[CALLBACK_TYPE]] = {}
+
+    @callback
+    def async_add_listener(
+            self, update_callback: CALLBACK_TYPE, context: Any = None
+    ) -> Callable[[], None]:
+        """
+        Регистрирует слушателя и индексирует его по ключам контекста.
+
+        Контекст сущности - id порта, ключ ПИД регулятора или кортеж таких
+        ключей, если сущность зависит от нескольких портов.
+        """
+        remove_listener = super().async_add_listener(update_callback, context)
+        keys = context if isinstance(context, tuple) else (context,)
+        for key in keys:
+            self._context_listeners.setdefault(key, []).append(update_callback)
+
+        @callback
+        def remove_context_listener() -> None:
+            remove_listener()
+            for key_listener in keys:
+                listeners = self._context_listeners.get(key_listener, [])
+                if update_callback in listeners:
+                    listeners.remove(update_callback)
+                if not listeners:
+                    self._context_listeners.pop(key_listener, None)
+
+        return remove_context_listener
+
+    @callback
+    def async_update_context_listeners(self, changed: set) -> None:
+        """
+        Оповещает только сущности, подписанные на изменившиеся порты и ПИД.
+        Сущности без контекста оповещаются всегда.
+        """
+        if not changed:
+            return
+        notified = set()
+        for key in (None, *changed):
+            for update_callback in self._context_listeners.get(key, ()):
+                if update_callback not in notified:
+                    notified.add(update_callback)
+                    update_callback()
+
+    def _notify_changed(self, changed: set) -> None:
+        """Планирует оповещение сущностей об изменившихся ключах."""
+        if changed:
+            self.hass.loop.call_soon(
+                self.async_update_context_listeners, changed
+            )
 
     def devices_info(self):
         megad_id = self.megad.config.plc.megad_id
@@ -157,6 +261,11 @@ class MegaDCoordinator(DataUpdateCoordinator):
         try:
             if self.megad.is_flashing:
                 raise FirmwareUpdateInProgress
+            if self.megad.is_restoring:
+                _LOGGER.debug(f'Опрос контроллера id-{self.megad.id} '
+                              f'приостановлен на время загрузки '
+                              f'конфигурации.')
+                return self.megad
             async with async_timeout.timeout(TIME_OUT_UPDATE_DATA_GENERAL):
                 await self.megad.update_data()
                 self._count_connect = 0
@@ -188,52 +297,176 @@ class MegaDCoordinator(DataUpdateCoordinator):
         self.hass.loop.call_soon(self.async_update_listeners)
         self.last_update_success = not state
 
-    async def _turn_off_state(self, state_off, delay, port_id, data):
-        """Возвращает выключенное состояние порта."""
-        self.megad.update_port(port_id, data)
-        self.hass.loop.call_soon(self.async_update_listeners)
-        await asyncio.sleep(delay)
-        self.megad.update_port(port_id, state_off)
-        self.hass.loop.call_soon(self.async_update_listeners)
+    def set_restoring_state(self, state):
+        """
+        Приостанавливает опрос контроллера на время загрузки конфигурации
+        и его перезагрузки, чтобы запросы опроса не вытесняли загрузку.
+        """
+        self.megad.is_restoring = state
+
+    def _turn_off_state(self, state_off, delay, port_id, data) -> bool:
+        """
+        Устанавливает состояние порта и через delay возвращает выключенное.
+        Новое событие порта отменяет ранее запланированный возврат.
+        """
+        timer = self._reset_timers.pop(port_id, None)
+        if timer is not None:
+            timer.cancel()
+        self._reset_timers[port_id] = self.hass.loop.call_later(
+            delay, self._reset_port_state, port_id, state_off
+        )
+        return self.megad.update_port(port_id, data)
+
+    @callback
+    def _reset_port_state(self, port_id, state_off):
+        """Возврат порта в выключенное состояние по таймеру."""
+        self._reset_timers.pop(port_id, None)
+        if self.megad.update_port(port_id, state_off):
+            self._notify_changed({port_id})
+
+    def cancel_timers(self):
+        """
+        Отменяет запланированные возвраты состояний портов, применение
+        накопленных событий и ожидающие команды портов.
+        """
+        for timer in self._reset_timers.values():
+            timer.cancel()
+        self._reset_timers.clear()
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._pending_events.clear()
+        self.megad.coalescer.cancel()
 
     def update_pid_state(self, pid_id: int, data: dict):
         """Обновление состояния ПИД регулятора."""
-        self.megad.update_pid(pid_id, data)
-        self.hass.loop.call_soon(self.async_update_listeners)
+        if self.megad.update_pid(pid_id, data):
+            self._notify_changed({get_pid_context(int(pid_id))})
 
-    async def update_port_state(self, port_id, data, ext=False):
-        """Обновление состояния конкретного порта."""
+    def _apply_port_event(self, port_id, data, ext=False) -> set:
+        """Применяет событие порта, возвращает изменившиеся порты."""
+        changed = set()
         if ext:
             port_ext = self.megad.get_port(port_id, ext=ext)
             if port_ext is None:
                 pass
             elif port_ext.conf.interrupt is not None:
-                self.megad.update_port(port_ext.conf.id, data)
+                if self.megad.update_port(port_ext.conf.id, data):
+                    changed.add(port_ext.conf.id)
         port = self.megad.get_port(port_id)
         if port is None:
-            return
+            return changed
         if port.conf.type_port in (TypePortMegaD.ADC, ):
-            return
+            return changed
         if isinstance(port, ReaderPort) or port.conf.mode == ModeInMegaD.C:
-            await self._turn_off_state('off', 0.5, port_id, data)
+            if self._turn_off_state(
+                    STATE_BUTTON.OFF, 0.5, port.conf.id, data
+            ):
+                changed.add(port.conf.id)
+        elif self.megad.update_port(port.conf.id, data):
+            changed.add(port.conf.id)
+        return changed
+
+    async def update_port_state(self, port_id, data, ext=False):
+        """Обновление состояния конкретного порта."""
+        self._notify_changed(self._apply_port_event(port_id, data, ext))
+
+    @callback
+    def queue_port_event(self, port_id, data: dict, ext=False):
+        """
+        Ставит событие порта от контроллера в очередь. События применяются
+        пачкой на следующей итерации цикла или через окно batch_window.
+        Для одного порта остаётся последнее событие, а параметры
+        расширителя объединяются, чтобы не потерять входы.
+        """
+        key = (int(port_id), ext)
+        if ext and key in self._pending_events:
+            self._pending_events[key] = self._pending_events[key] | data
         else:
-            self.megad.update_port(port.conf.id, data)
-            self.hass.loop.call_soon(self.async_update_listeners)
+            self._pending_events.pop(key, None)
+            self._pending_events[key] = data
+        if self._flush_handle is None:
+            if self.batch_window:
+                self._flush_handle = self.hass.loop.call_later(
+                    self.batch_window, self._flush_port_events
+                )
+            else:
+                self._flush_handle = self.hass.loop.call_soon(
+                    self._flush_port_events
+                )
+
+    @callback
+    def _flush_port_events(self):
+        """Применяет накопленные события и оповещает сущности один раз."""
+        self._flush_handle = None
+        events, self._pending_events = self._pending_events, {}
+        changed = set()
+        for (port_id, ext), data in events.items():
+            changed |= self._apply_port_event(port_id, data, ext)
+        self.async_update_context_listeners(changed)
 
     def update_set_temperature(self, port_id, temperature):
         """Обновление заданной температуры порта сенсора"""
         port = self.megad.get_port(port_id)
         if isinstance(port, OneWireSensorPort):
             port.conf.set_value = temperature
-            self.hass.loop.call_soon(self.async_update_listeners)
+            self._notify_changed({port.conf.id})
         else:
             raise InvalidSettingPort(f'Проверьте настройки порта №{port_id}')
 
+    def apply_reaction(self, command: str):
+        """
+        Оптимистичное обновление релейных портов по команде реакции,
+        которую контроллер выполнит после ответа на свой запрос.
+        """
+        port_states = {}
+        for port_id, value in ReactionEngine.get_port_states(command).items():
+            port = self.megad.get_port(port_id)
+            if not isinstance(port, ReleyPortOut):
+                continue
+            if value == 2:
+                value = int(port.state == port.conf.inverse)
+            port_states[port_id] = str(value)
+        self.update_group_state(port_states)
+
     def update_group_state(self, port_states: dict[int, str]):
         """Обновление состояний портов в группе"""
+        changed = set()
         for port_id, state in port_states.items():
-            self.megad.update_port(port_id, state)
-        self.hass.loop.call_soon(self.async_update_listeners)
+            if self.megad.update_port(port_id, state):
+                changed.add(int(port_id))
+        self._notify_changed(changed)
+
+    async def async_check_config_drift(self) -> dict[str, list[str]]:
+        """Сравнивает конфигурацию контроллера с сохранённым файлом."""
+        if self.megad.is_flashing:
+            raise FirmwareUpdateInProgress
+        manager_config = MegaDConfigManager(
+            self.megad.url,
+            self.megad.config_path,
+            async_get_clientsession(self.hass),
+            scheduler=self.megad.scheduler
+        )
+        drift = await manager_config.check_drift()
+        self.megad.config_drift = drift
+        self.megad.drift_checked = datetime.now()
+        count_pages = sum(len(pages) for pages in drift.values())
+        if count_pages:
+            _LOGGER.warning(f'Конфигурация MegaD-{self.megad.id} отличается '
+                            f'от файла {self.megad.config_path}: {drift}')
+        else:
+            _LOGGER.debug(f'Конфигурация MegaD-{self.megad.id} совпадает '
+                          f'с файлом.')
+        self.async_update_context_listeners({CONFIG_DRIFT})
+        return drift
+
+    async def async_scheduled_drift_check(self, now=None):
+        """Ночная проверка расхождения конфигурации."""
+        try:
+            await self.async_check_config_drift()
+        except Exception as e:
+            _LOGGER.warning(f'Не удалось проверить конфигурацию '
+                            f'MegaD-{self.megad.id}: {e}')
 
     async def restore_thermo(self, port):
         """Восстановление состояния терморегулятора после перезагрузки плк"""
@@ -241,7 +474,6 @@ class MegaDCoordinator(DataUpdateCoordinator):
             port.conf.id, port.conf.set_value
         )
         if not port.state[STATUS_THERMO]:
-            await asyncio.sleep(TIME_SLEEP_REQUEST)
             await self.megad.set_port(port.conf.id, OFF)
             await self.megad.send_command(get_action_turnoff(port.conf.action))
 
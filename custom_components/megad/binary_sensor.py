@@ -58,7 +58,7 @@ class BinarySensorMegaD(CoordinatorEntity, BinarySensorEntity):
             self, coordinator: MegaDCoordinator, port: BinaryPortIn,
             unique_id: str
     ) -> None:
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=port.conf.id)
         self._megad: MegaD = coordinator.megad
         self._port: BinaryPortIn = port
         self._binary_sensor_name: str = port.conf.name
@@ -115,7 +115,7 @@ class BinarySensorExtraMegaD(CoordinatorEntity, BinarySensorEntity):
             self, coordinator: MegaDCoordinator, port: I2CExtraMCP230xx,
             config_extra_port: MCP230PortInConfig, unique_id: str
     ) -> None:
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=port.conf.id)
         self._megad: MegaD = coordinator.megad
         self._port: I2CExtraMCP230xx = port
         self._config_extra_port = config_extra_port
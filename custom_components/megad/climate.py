@@ -1,4 +1,3 @@
-import asyncio
 import logging
 
 from propcache import cached_property
@@ -15,15 +14,14 @@ from homeassistant.util import slugify
 from . import MegaDCoordinator
 from .const import (
     DOMAIN, ENTRIES, CURRENT_ENTITY_IDS, TEMPERATURE_CONDITION, TEMPERATURE,
-    OFF, ON, STATUS_THERMO, DIRECTION, PID_OFF, TIME_SLEEP_REQUEST, INPUT_PID,
-    TARGET_TEMP
+    OFF, ON, STATUS_THERMO, DIRECTION, PID_OFF, INPUT_PID, TARGET_TEMP
 )
 from .core.base_pids import PIDControl
 from .core.base_ports import OneWireSensorPort
 from .core.enums import ModePIDMegaD
 from .core.exceptions import TemperatureOutOfRangeError
 from .core.megad import MegaD
-from .core.utils import get_action_turnoff
+from .core.utils import get_action_turnoff, get_pid_context
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -74,7 +72,7 @@ class BaseClimateEntity(CoordinatorEntity, ClimateEntity):
             self, coordinator: MegaDCoordinator, port: OneWireSensorPort,
             unique_id: str
     ) -> None:
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=port.conf.id)
         self._coordinator: MegaDCoordinator = coordinator
         self._megad: MegaD = coordinator.megad
         self._port: OneWireSensorPort = port
@@ -133,7 +131,6 @@ class BaseClimateEntity(CoordinatorEntity, ClimateEntity):
         else:
             await self._megad.set_port(self._port.conf.id, OFF)
             actions_off = get_action_turnoff(self._port.conf.action)
-            await asyncio.sleep(TIME_SLEEP_REQUEST)
             await self._megad.send_command(actions_off)
             for action in actions_off.split(';'):
                 if action:
@@ -227,6 +224,9 @@ class PIDClimateEntity(BaseClimateEntity):
             port: OneWireSensorPort, unique_id: str
     ) -> None:
         super().__init__(coordinator, port, unique_id)
+        self.coordinator_context = (
+            get_pid_context(pid.conf.id), port.conf.id, pid.conf.output
+        )
         self._pid: PIDControl = pid
         self._name: str = pid.conf.name
         self.entity_id = 'climate.' + slugify(
@@ -260,7 +260,6 @@ class PIDClimateEntity(BaseClimateEntity):
         else:
             await self._megad.turn_off_pid(self._pid.conf.id)
             if self._megad.get_port(self._pid.conf.output).state:
-                await asyncio.sleep(TIME_SLEEP_REQUEST)
                 await self._megad.set_port(self._pid.conf.output, OFF)
             self._coordinator.update_pid_state(
                 self._pid.conf.id, {INPUT_PID: PID_OFF}
@@ -17,7 +17,11 @@ from homeassistant.core import callback, HomeAssistant
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.selector import selector
 from .const import (
-    DOMAIN, PATH_CONFIG_MEGAD, DEFAULT_IP, DEFAULT_PASSWORD, ENTRIES
+    DOMAIN, PATH_CONFIG_MEGAD, DEFAULT_IP, DEFAULT_PASSWORD, ENTRIES,
+    CADENCE_I2C, CADENCE_THERMOSTATS, CADENCE_PIDS, CADENCE_STATUS,
+    CADENCE_SWEEP, PUSH_FIRST, PollCadence, READ_CONCURRENCY,
+    READ_CONCURRENCY_MAX, FULL_READ, DIFFERENTIAL_UPLOAD, REACTIONS,
+    BATCH_WINDOW, BATCH_WINDOW_MAX
 )
 from .core.config_manager import MegaDConfigManager
 from .core.config_parser import (
@@ -27,8 +31,10 @@ from .core.const_fw import DEFAULT_IP_LIST
 from .core.exceptions import (
     WriteConfigError, InvalidPassword, InvalidAuthorized, InvalidSlug,
     InvalidIpAddressExist, NotAvailableURL, SearchMegaDError, InvalidIpAddress,
-    InvalidPasswordMegad, ChangeIPMegaDError, InvalidMegaDID
+    InvalidPasswordMegad, ChangeIPMegaDError, InvalidMegaDID, MegaDBusy,
+    InvalidReactionRule
 )
+from .core.reactions import parse_reactions
 from .core.utils import (
     get_list_config_megad, get_broadcast_ip, get_megad_ip, change_ip
 )
@@ -64,6 +70,12 @@ async def validate_url(hass: HomeAssistant, user_input: str) -> str:
     raise NotAvailableURL(f'Контроллер недоступен по {urls}')
 
 
+def log_read_progress(count_read: int, count_pages: int) -> None:
+    """Выводит в лог ход чтения конфигурации контроллера."""
+    _LOGGER.debug(f'Прочитано страниц конфигурации: '
+                  f'{count_read} из {count_pages}')
+
+
 def check_exist_ip(ip: str, hass_data: dict) -> None:
     """Проверка занятости ip адреса другими контроллерами"""
     for entity_id, controller in hass_data.items():
@@ -142,6 +154,11 @@ class MegaDBaseFlow(config_entries.ConfigEntryBaseFlow):
                         default=f'ip{self.data["ip"].split(".")[-1]}_'
                                 f'{datetime.now().strftime("%Y%m%d")}.cfg'
                     ): str,
+                    vol.Optional(schema=READ_CONCURRENCY, default=1): vol.All(
+                        vol.Coerce(int),
+                        vol.Range(min=1, max=READ_CONCURRENCY_MAX)
+                    ),
+                    vol.Optional(schema=FULL_READ, default=False): bool,
                     vol.Optional(schema="return_main_menu"): bool
                 }
         )
@@ -154,6 +171,21 @@ class MegaDBaseFlow(config_entries.ConfigEntryBaseFlow):
             url, async_get_clientsession(self.hass)
         )
 
+    async def get_previous_settings(
+            self, session: aiohttp.ClientSession
+    ) -> list[str] | None:
+        """Предыдущая конфигурация контроллера, если файл уже выбирался."""
+        file_path = self.data.get('file_path')
+        if not file_path or not await self.hass.async_add_executor_job(
+                os.path.isfile, file_path):
+            return None
+        manager_config = MegaDConfigManager(
+            self.data['url'], file_path, session
+        )
+        await manager_config.read_config_file(file_path)
+        _LOGGER.debug(f'Пустые слоты будут взяты из конфигурации: {file_path}')
+        return manager_config.settings
+
     async def async_step_get_config(self, user_input=None):
         """Главное меню выбора считывания конфигурации контроллера"""
         errors: dict[str, str] = {}
@@ -277,16 +309,26 @@ class MegaDBaseFlow(config_entries.ConfigEntryBaseFlow):
             try:
                 name_file = user_input.get('name_file')
                 config_path = self.get_path_to_config(name_file)
+                session = async_get_clientsession(self.hass)
+                previous_settings = None
+                if not user_input.get(FULL_READ, False):
+                    previous_settings = await self.get_previous_settings(
+                        session
+                    )
                 config_manager = MegaDConfigManager(
                     self.data['url'],
                     config_path,
-                    async_get_clientsession(self.hass)
+                    session,
+                    concurrency=user_input.get(READ_CONCURRENCY, 1)
+                )
+                await config_manager.read_config(
+                    progress=log_read_progress,
+                    previous_settings=previous_settings
                 )
-                await config_manager.read_config()
                 await config_manager.save_config_to_file()
                 self.data['name_file'] = name_file
                 return await self.async_step_select_config()
-            except aiohttp.ClientError as e:
+            except (aiohttp.ClientError, MegaDBusy) as e:
                 _LOGGER.error(f'Ошибка запроса к контроллеру '
                               f'при чтении конфигурации {e}')
                 errors['base'] = 'read_config_error'
@@ -320,7 +362,10 @@ class MegaDBaseFlow(config_entries.ConfigEntryBaseFlow):
                     async_get_clientsession(self.hass)
                 )
                 await config_manager.read_config_file(config_path)
-                await config_manager.upload_config(timeout=0.2)
+                await config_manager.upload_config(
+                    timeout=0.2,
+                    differential=user_input.get(DIFFERENTIAL_UPLOAD, False)
+                )
                 return await self.async_step_get_config()
             except WriteConfigError as e:
                 _LOGGER.error(f'Ошибка записи конфигурации в контроллер: {e}')
@@ -335,6 +380,9 @@ class MegaDBaseFlow(config_entries.ConfigEntryBaseFlow):
             data_schema=vol.Schema(
                 {
                     vol.Required('config_list'): vol.In(config_list),
+                    vol.Optional(
+                        schema=DIFFERENTIAL_UPLOAD, default=False
+                    ): bool,
                     vol.Optional(schema="return_main_menu"): bool
                 }
             ),
@@ -517,6 +565,47 @@ class MegaDConfigFlow(MegaDBaseFlow, config_entries.ConfigFlow, domain=DOMAIN):
 
 class OptionsFlowHandler(MegaDBaseFlow, config_entries.OptionsFlow):
 
+    def data_schema_options(self):
+        default = PollCadence()
+        cadence = vol.All(vol.Coerce(int), vol.Range(min=1))
+        return self.data_schema_main().extend(
+            {
+                vol.Required(
+                    schema=CADENCE_I2C, default=self.data.get(
+                        CADENCE_I2C, default.i2c
+                    )): cadence,
+                vol.Required(
+                    schema=CADENCE_THERMOSTATS, default=self.data.get(
+                        CADENCE_THERMOSTATS, default.thermostats
+                    )): cadence,
+                vol.Required(
+                    schema=CADENCE_PIDS, default=self.data.get(
+                        CADENCE_PIDS, default.pids
+                    )): cadence,
+                vol.Required(
+                    schema=CADENCE_STATUS, default=self.data.get(
+                        CADENCE_STATUS, default.status
+                    )): cadence,
+                vol.Required(
+                    schema=PUSH_FIRST, default=self.data.get(
+                        PUSH_FIRST, False
+                    )): bool,
+                vol.Required(
+                    schema=CADENCE_SWEEP, default=self.data.get(
+                        CADENCE_SWEEP, default.sweep
+                    )): cadence,
+                vol.Optional(
+                    schema=REACTIONS, default=self.data.get(REACTIONS, '')
+                ): str,
+                vol.Required(
+                    schema=BATCH_WINDOW, default=self.data.get(
+                        BATCH_WINDOW, 0
+                    )): vol.All(
+                    vol.Coerce(int), vol.Range(min=0, max=BATCH_WINDOW_MAX)
+                ),
+            }
+        )
+
     async def async_step_init(self, user_input):
         """Manage the options."""
         errors: dict[str, str] = {}
@@ -531,10 +620,14 @@ class OptionsFlowHandler(MegaDBaseFlow, config_entries.OptionsFlow):
                 base_url = await validate_url(self.hass, ip)
                 url = f'{base_url}/{user_input["password"]}/'
                 await self.validate_user_input_step_main(base_url, password)
+                parse_reactions(user_input.get(REACTIONS, ''))
                 if not errors:
                     self.data.update(user_input)
                     self.data.update({'url': url})
                 return await self.async_step_get_config()
+            except InvalidReactionRule as e:
+                _LOGGER.error(f'Ошибка в правилах реакций: {e}')
+                errors['base'] = 'invalid_reactions'
             except NotAvailableURL:
                 _LOGGER.error(f'Адрес не доступен: {ip}')
                 errors['base'] = 'not_available_url'
@@ -555,6 +648,6 @@ class OptionsFlowHandler(MegaDBaseFlow, config_entries.OptionsFlow):
 
         return self.async_show_form(
             step_id='init',
-            data_schema=self.data_schema_main(),
+            data_schema=self.data_schema_options(),
             errors=errors
         )
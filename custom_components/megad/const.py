@@ -1,5 +1,6 @@
 from collections import namedtuple
 from dataclasses import dataclass
+from datetime import timedelta
 
 from homeassistant.components.sensor.const import SensorDeviceClass
 from homeassistant.const import (
@@ -13,19 +14,30 @@ MANUFACTURER = 'ab-log'
 ENTRIES = 'entries'
 CURRENT_ENTITY_IDS = 'current_entity_ids'
 FIRMWARE_CHECKER = 'firmware_checker'
+HOSTS = 'hosts'
+MEGAD_IDS = 'megad_ids'
 
 # Таймауты
 TIME_UPDATE = 60
 TIME_OUT_UPDATE_DATA = 5
 TIME_OUT_UPDATE_DATA_GENERAL = 30
-TIME_SLEEP_REQUEST = 0.2
 TIME_DISPLAY = 0.3
+TIME_PUSH_STALE = 600
+TIME_CHECK_FIRMWARE = timedelta(hours=12)
+
+# Темп запросов к контроллеру
+TIME_PACE_MIN = 0.02
+TIME_PACE_MAX = 0.5
+PACE_LATENCY_FACTOR = 0.5
+PACE_SMOOTHING = 0.2
 
 COUNTER_CONNECT = 4
 
 PATH_CONFIG_MEGAD = 'custom_components/config_megad/'
 RELEASE_URL = 'https://ab-log.ru/smart-house/ethernet/megad-2561-firmware'
 BASE_URL = 'https://ab-log.ru/'
+STORAGE_VERSION = 1
+STORAGE_KEY_FIRMWARE = f'{DOMAIN}.firmware_page'
 
 # Значения по умолчанию
 DEFAULT_IP = '192.168.0.14'
@@ -91,6 +103,7 @@ MODE = 'm'
 CLICK = 'click'
 PORT = 'pt'
 COMMAND = 'cmd'
+COMMAND_MAX_LENGTH = 200
 WS = 'ws'
 CHIP = 'chp'
 ALL_STATES = 'all'
@@ -214,6 +227,49 @@ PID_LIMIT_I = PIDLimit(min_value=0.0, max_value=10.0)
 PID_LIMIT_D = PIDLimit(min_value=0.0, max_value=10.0)
 
 
+@dataclass(frozen=True)
+class PollCadence:
+    """Периодичность опроса данных контроллера в циклах обновления."""
+    i2c: int = 1
+    thermostats: int = 5
+    pids: int = 2
+    status: int = 5
+    sweep: int = 10
+
+
+CADENCE_I2C = 'cadence_i2c'
+CADENCE_THERMOSTATS = 'cadence_thermostats'
+CADENCE_PIDS = 'cadence_pids'
+CADENCE_STATUS = 'cadence_status'
+CADENCE_SWEEP = 'cadence_sweep'
+PUSH_FIRST = 'push_first'
+READ_CONCURRENCY = 'read_concurrency'
+READ_CONCURRENCY_MAX = 4
+FULL_READ = 'full_read'
+DIFFERENTIAL_UPLOAD = 'differential_upload'
+REACTIONS = 'reactions'
+BATCH_WINDOW = 'batch_window'
+BATCH_WINDOW_MAX = 50
+
+# Проверка расхождения конфигурации контроллера с файлом
+CONFIG_DRIFT = 'config_drift'
+DRIFT_CHECK_HOUR = 3
+DRIFT_CHECK_WINDOW = 3600
+SERVICE_CHECK_DRIFT = 'check_config_drift'
+
+# Резервное копирование конфигураций контроллеров
+SERVICE_BACKUP_CONFIGS = 'backup_configs'
+MAX_PARALLEL = 'max_parallel'
+DEFAULT_MAX_PARALLEL = 4
+
+# Восстановление конфигураций контроллеров
+SERVICE_RESTORE_CONFIGS = 'restore_configs'
+CONFIG_FILE = 'file'
+UPLOAD_TIMEOUT = 'timeout'
+DEFAULT_UPLOAD_TIMEOUT = 0.2
+EVENT_RESTORE_PROGRESS = f'{DOMAIN}_restore_progress'
+
+
 COLOR_ORDERS = {
     'rgb': (0, 1, 2),
     'grb': (1, 0, 2),
@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from ..const import COMMAND_MAX_LENGTH, PLC_BUSY
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CommandCoalescer:
+    """
+    Объединяет команды портов одного контроллера в запросы вида
+    cmd=1:1;2:0;5:1. Команда, поданная при свободном канале, уходит сразу,
+    без ожидания. Команды, поданные в том же проходе цикла событий или
+    пока выполняется предыдущий запрос, отправляются следующим запросом
+    вместе. Запрос делится, чтобы не превысить допустимую длину. Если
+    объединённый запрос завершился ошибкой или ответом busy, его команды
+    отправляются по одной, и каждый вызвавший получает ответ своей команды.
+    """
+
+    def __init__(
+            self, send: Callable[[str], Awaitable[str]],
+            max_length: int = COMMAND_MAX_LENGTH
+    ):
+        self._send = send
+        self.max_length = max_length
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._task: asyncio.Task | None = None
+
+    async def submit(self, action: str) -> str:
+        """Ставит команду в очередь и возвращает ответ контроллера."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((action, future))
+        if self._task is None:
+            self._task = loop.create_task(self._run())
+        return await future
+
+    async def _run(self):
+        """Отправляет накопленные команды, пока очередь не опустеет."""
+        batch = []
+        try:
+            while self._pending:
+                batch, self._pending = self._pending, []
+                await self._send_batch(batch)
+        finally:
+            if self._task is asyncio.current_task():
+                self._task = None
+            for _, future in batch:
+                future.cancel()
+
+    def split(
+            self, batch: list[tuple[str, asyncio.Future]]
+    ) -> list[list[tuple[str, asyncio.Future]]]:
+        """Делит команды на части, строка каждой не длиннее max_length."""
+        chunks = []
+        chunk = []
+        length = 0
+        for action, future in batch:
+            if chunk and length + len(action) + 1 > self.max_length:
+                chunks.append(chunk)
+                chunk = []
+            length = len(action) if not chunk else length + len(action) + 1
+            chunk.append((action, future))
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    async def _send_merged(
+            self, chunk: list[tuple[str, asyncio.Future]]
+    ) -> bool:
+        """Отправляет команды одним запросом, True при успехе."""
+        command = ';'.join(action for action, _ in chunk)
+        try:
+            text = await self._send(command)
+        except Exception as e:
+            _LOGGER.debug(f'Объединённый запрос cmd={command} не выполнен: '
+                          f'{e}. Команды будут отправлены по одной.')
+            return False
+        if text == PLC_BUSY:
+            _LOGGER.debug(f'Контроллер занят, объединённый запрос '
+                          f'cmd={command} не выполнен. Команды будут '
+                          f'отправлены по одной.')
+            return False
+        _LOGGER.debug(f'Объединено команд в запрос: {len(chunk)}. '
+                      f'cmd={command}')
+        for _, future in chunk:
+            if not future.done():
+                future.set_result(text)
+        return True
+
+    async def _send_one(self, action: str, future: asyncio.Future):
+        """Отправляет одну команду и передаёт ответ вызвавшему."""
+        try:
+            text = await self._send(action)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(text)
+
+    async def _send_batch(self, batch: list[tuple[str, asyncio.Future]]):
+        """Отправляет команды частями и передаёт ответы вызвавшим."""
+        for chunk in self.split(batch):
+            chunk = [item for item in chunk if not item[1].done()]
+            if len(chunk) > 1 and await self._send_merged(chunk):
+                continue
+            for action, future in chunk:
+                if not future.done():
+                    await self._send_one(action, future)
+
+    def cancel(self):
+        """Отменяет ожидающие и отправляемые команды."""
+        for _, future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
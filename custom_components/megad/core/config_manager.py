@@ -1,34 +1,58 @@
 import asyncio
+import functools
+import hashlib
+import json
 import logging
+import os
 import re
 from http import HTTPStatus
+from typing import Callable
 from urllib.parse import parse_qsl
 
 import aiofiles
 import aiohttp
 import async_timeout
 from aiohttp import ClientResponse
-from bs4 import BeautifulSoup
 
 from .const_parse import *
 from .enums import (
     TypePortMegaD, TypeDSensorMegaD, ModeOutMegaD,ModeWiegandMegaD,
-    ModeI2CMegaD, DeviceI2CMegaD
+    ModeI2CMegaD, DeviceI2CMegaD, RequestPriority
 )
-from .exceptions import WriteConfigError, InvalidAuthorized
+from .exceptions import WriteConfigError, InvalidAuthorized, MegaDBusy
+from .form_parser import extract_form_params
 from .models_megad import (
     DeviceMegaD, PortConfig, PortInConfig, PortOutRelayConfig,
     PortOutPWMConfig, OneWireSensorConfig, IButtonConfig, WiegandD0Config,
     WiegandConfig, DHTSensorConfig, PortSensorConfig, I2CSDAConfig, I2CConfig,
     AnalogPortConfig, SystemConfigMegaD, PIDConfig, PCA9685PWMConfig,
     PCA9685RelayConfig, MCP230PortInConfig, MCP230RelayConfig, PortOutRGB,
-    PortOut1W
+    PortOut1W, dump_device_config, construct_device_config
 )
-from ..const import MEGAD_ID, RESTART, ON
+from .scheduler import MegaDRequestScheduler
+from ..const import MEGAD_ID, RESTART, ON, PLC_BUSY
 
 _LOGGER = logging.getLogger(__name__)
 
 
+@functools.cache
+def get_snapshot_version() -> str:
+    """
+    Версия снимка конфигурации: формат снимка, версия интеграции из
+    manifest.json и хэш схемы моделей. Снимок, записанный другой версией
+    интеграции или с другими моделями, не загружается.
+    """
+    manifest = os.path.join(
+        os.path.dirname(os.path.dirname(__file__)), MANIFEST_FILE
+    )
+    with open(manifest, encoding='utf-8') as fh:
+        version = json.load(fh).get('version', '')
+    schema = hashlib.sha256(json.dumps(
+        DeviceMegaD.model_json_schema(), sort_keys=True
+    ).encode()).hexdigest()
+    return f'{CONFIG_CACHE_VERSION}:{version}:{schema}'
+
+
 class MegaDConfigManager:
     """Класс для парсинга и обработки конфигурации контроллера"""
 
@@ -36,6 +60,8 @@ class MegaDConfigManager:
             self, url: str,
             config_file_path: str,
             session: aiohttp.ClientSession,
+            concurrency: int = 1,
+            scheduler: MegaDRequestScheduler | None = None,
     ):
         self.url = url
         self.config_file_path = config_file_path
@@ -43,9 +69,21 @@ class MegaDConfigManager:
         self.settings = []
         self.len_main_settings = 0
         self.password = url.split('/')[3]
+        self.concurrency = max(concurrency, 1)
+        self.scheduler = scheduler
+        self._count_read = 0
+        self._count_pages = 0
 
     async def request_to_megad(self, params: dict | str) -> ClientResponse:
-        """Отправка запроса к контроллеру"""
+        """
+        Отправка запроса к контроллеру. Если задан планировщик запросов
+        контроллера, запрос встаёт в его очередь с низшим приоритетом и не
+        мешает командам пользователя и опросу.
+        """
+        if self.scheduler is not None:
+            return await self.scheduler.request(
+                self.url, params, RequestPriority.CONFIG
+            )
         async with async_timeout.timeout(TIME_OUT_UPDATE):
             if isinstance(params, str):
                 response = await self.session.get(url=f'{self.url}?{params}')
@@ -54,12 +92,22 @@ class MegaDConfigManager:
         return response
 
     async def fetch_page(self, params: dict) -> str:
-        """Получает страницу конфигурации контроллера."""
+        """
+        Получает страницу конфигурации контроллера. При ответе busy
+        запрос повторяется с нарастающей паузой.
+        """
         _LOGGER.debug(f'Запрос конфигурации контроллера MegaD. '
                       f'URL: {self.url}, params: {params}')
-        response = await self.request_to_megad(params)
-        page = await response.text(encoding='cp1251')
-        return page
+        for attempt in range(CONFIG_BUSY_RETRIES + 1):
+            response = await self.request_to_megad(params)
+            page = await response.text(encoding='cp1251')
+            if page.strip() != PLC_BUSY:
+                return page
+            _LOGGER.debug(f'Контроллер ответил busy на запрос {params}. '
+                          f'Попытка {attempt + 1}')
+            await asyncio.sleep(TIME_CONFIG_BUSY * (attempt + 1))
+        raise MegaDBusy(f'Контроллер занят, не удалось прочитать страницу '
+                        f'конфигурации {params}')
 
     async def get_base_params(self) -> list[dict]:
         """Получает список параметров для базовых запросов конфигурации"""
@@ -95,26 +143,7 @@ class MegaDConfigManager:
     @staticmethod
     def get_params(page: str) -> str:
         """Получает параметры настройки страницы контроллера"""
-        params = ''
-        soup = BeautifulSoup(page, 'lxml')
-        for form in soup.find_all('form'):
-            if form.get('style') == 'display:inline':
-                continue
-            for inp in form.find_all('input'):
-                if inp.get('type') != "submit":
-                    name = inp.get('name')
-                    value = inp.get('value', '')
-                    if inp.get('type') == "checkbox":
-                        value = '1' if inp.has_attr('checked') else ''
-                    params += f"{name}={value}&"
-
-        for select in soup.find_all('select'):
-            name = select.get('name')
-            selected_option = select.find('option', selected=True)
-            if selected_option:
-                value = selected_option.get('value', '')
-                params += f"{name}={value}&"
-        return params.rstrip('&')
+        return extract_form_params(page)
 
     @staticmethod
     def decode_title(input_string: str) -> str:
@@ -153,6 +182,17 @@ class MegaDConfigManager:
             return True
         return True if "cf=1&" in url else False
 
+    @classmethod
+    def _mark_line(cls, setting_line: str, check: bool) -> str:
+        """
+        Строка предыдущей конфигурации с признаком nr=1 по её новому месту:
+        check - строка последняя и пишется без nr=1.
+        """
+        conf_url = setting_line.rstrip('\n').removesuffix('&nr=1')
+        if not cls._check_url(conf_url, check):
+            conf_url = conf_url + '&nr=1'
+        return conf_url + '\n'
+
     @staticmethod
     def _check_extend_port(setting_line) -> int |  None:
         """Проверяет наличие подключенного расширения I2C к порту."""
@@ -164,54 +204,192 @@ class MegaDConfigManager:
         if type_port == I2C and type_device in (PCA9685, MCP230XX):
             return int(params.get(PORT_NUMBER))
 
-    async def process_page(self, params, check: bool) -> str:
-        """Получает url настроек для файла конфигурации."""
-        page_content = await self.fetch_page(params)
+    @classmethod
+    def parse_page(cls, page_content: str, check: bool) -> str:
+        """Преобразует страницу в строку настроек файла конфигурации."""
         if not page_content:
             return ''
-        conf_url = self.get_params(page_content)
+        conf_url = cls.get_params(page_content)
         if conf_url and conf_url != 'cf=<br':
-            if not self._check_url(conf_url, check):
+            if not cls._check_url(conf_url, check):
                 conf_url = conf_url + '&nr=1'
-                conf_url = self.decode_title(conf_url)
+                conf_url = cls.decode_title(conf_url)
             return conf_url + '\n'
         return ''
 
-    async def add_extra_config(self, extended_ports: list):
+    async def read_pages(
+            self, page_params: list[dict],
+            progress: Callable[[int, int], None] | None = None,
+            with_last: bool = True
+    ) -> list[str]:
+        """
+        Читает страницы конфигурации конвейером: разбор страницы идёт в
+        отдельном потоке, пока отправляется следующий запрос. Одновременно
+        к контроллеру уходит не больше self.concurrency запросов. Строки
+        возвращаются в порядке page_params. with_last - последняя страница
+        page_params завершает конфигурацию, у её строки не добавляется nr=1.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        last = len(page_params) - 1 if with_last else -1
+        self._count_pages += len(page_params)
+
+        async def read_page(index: int, params: dict) -> str:
+            async with semaphore:
+                page_content = await self.fetch_page(params)
+            setting_line = await asyncio.to_thread(
+                self.parse_page, page_content, index == last
+            )
+            self._count_read += 1
+            if progress is not None:
+                progress(self._count_read, self._count_pages)
+            return setting_line
+
+        tasks = [
+            asyncio.create_task(read_page(index, params))
+            for index, params in enumerate(page_params)
+        ]
+        try:
+            return await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+    @staticmethod
+    def get_slot(params: dict) -> tuple | None:
+        """
+        Ключ слота конфигурации (условие, ПИД, элемент экрана, канал
+        расширителя), который может быть пустым. Для остальных страниц -
+        None.
+        """
+        if PORT in params and EXTRA in params:
+            return (PORT, str(params[PORT])), (EXTRA, str(params[EXTRA]))
+        for config, key, _ in SPARSE_PAGES:
+            if str(params.get(CONFIG)) == config and key in params:
+                return (CONFIG, config), (key, str(params[key]))
+        return None
+
+    @staticmethod
+    def _slot_fields(params: dict) -> tuple:
+        """Поля слота, по которым он считается заполненным."""
+        if PORT in params and EXTRA in params:
+            return EXTRA_SLOT_FIELDS
+        for config, key, fields in SPARSE_PAGES:
+            if str(params.get(CONFIG)) == config and key in params:
+                return fields
+        return ()
+
+    @classmethod
+    def _is_empty_slot(cls, params: dict) -> bool:
+        """Проверяет, что в строке слота не заполнено ни одно из его полей."""
+        fields = cls._slot_fields(params)
+        return bool(fields) and not any(
+            params.get(field, '').strip() for field in fields
+        )
+
+    def index_slots(self, settings: list[str]) -> dict[tuple, str]:
+        """Строки предыдущей конфигурации по ключам слотов."""
+        slots = {}
+        for setting_line in settings:
+            params = dict(parse_qsl(
+                setting_line.strip(), keep_blank_values=True, encoding='cp1251'
+            ))
+            slot = self.get_slot(params)
+            if slot is not None:
+                slots[slot] = setting_line.rstrip('\n') + '\n'
+        return slots
+
+    def _need_fetch(self, params: dict, previous: dict[tuple, str]) -> bool:
+        """
+        Нужно ли запрашивать страницу. Пропускаются только слоты, которые
+        есть в предыдущей конфигурации и пусты в ней. Слоты, которых в ней
+        нет (новая прошивка, другой расширитель), читаются.
+        """
+        slot = self.get_slot(params)
+        if slot is None:
+            return True
+        setting_line = previous.get(slot)
+        if setting_line is None:
+            return True
+        return not self._is_empty_slot(self.parse_line(setting_line))
+
+    async def read_sparse_pages(
+            self, page_params: list[dict],
+            previous: dict[tuple, str] | None,
+            progress: Callable[[int, int], None] | None = None
+    ) -> list[str]:
+        """
+        Читает только заполненные слоты. Для пропущенных слотов берётся
+        строка из предыдущей конфигурации. Признак nr=1 ставится по месту
+        строки во всём списке page_params, а не среди прочитанных страниц.
+        """
+        if previous is None:
+            return await self.read_pages(page_params, progress)
+        last = len(page_params) - 1
+        fetch_params = []
+        plan: list[str | None] = []
+        for index, params in enumerate(page_params):
+            if self._need_fetch(params, previous):
+                fetch_params.append(params)
+                plan.append(None)
+            else:
+                plan.append(self._mark_line(
+                    previous[self.get_slot(params)], index == last
+                ))
+        _LOGGER.debug(f'Пропущено пустых страниц конфигурации: '
+                      f'{len(page_params) - len(fetch_params)}')
+        fetched = iter(await self.read_pages(
+            fetch_params, progress, with_last=not plan or plan[-1] is None
+        ))
+        return [
+            next(fetched) if setting_line is None else setting_line
+            for setting_line in plan
+        ]
+
+    async def add_extra_config(
+            self, extended_ports: list,
+            progress: Callable[[int, int], None] | None = None,
+            previous: dict[tuple, str] | None = None
+    ):
         """Добавляет порты расширителей к настройкам конфигурации"""
-        count_ports = len(extended_ports)
-        i = 1
-        for port_id in extended_ports:
-            j = 0
-            for extra_port_id in range(16):
-                params = {PORT: port_id, EXTRA: extra_port_id}
-                check = False
-                if i == count_ports and j == 15:
-                    check = True
-                j += 1
-                setting_line = await self.process_page(params, check)
-                if setting_line:
-                    self.settings.append(setting_line)
-            i += 1
-
-    async def read_config(self):
-        """Чтение конфигурации с контроллера"""
+        page_params = [
+            {PORT: port_id, EXTRA: extra_port_id}
+            for port_id in extended_ports for extra_port_id in range(16)
+        ]
+        setting_lines = await self.read_sparse_pages(
+            page_params, previous, progress
+        )
+        for setting_line in setting_lines:
+            if setting_line:
+                self.settings.append(setting_line)
+
+    async def read_config(
+            self, progress: Callable[[int, int], None] | None = None,
+            previous_settings: list[str] | None = None
+    ):
+        """
+        Чтение конфигурации с контроллера.
+        progress(прочитано, всего) вызывается после каждой страницы.
+        previous_settings - предыдущая конфигурация этого контроллера, по
+        ней пропускаются пустые слоты. Без неё читаются все страницы.
+        """
         extended_ports: list[int] = []
+        self._count_read = 0
+        self._count_pages = 0
+        previous = None
+        if previous_settings:
+            previous = self.index_slots(previous_settings)
         page_params = await self.get_base_params()
-        count_line = len(page_params)
-        i = 1
-        for page_param in page_params:
-            check = False
-            if i == count_line:
-                check = True
-            i += 1
-            setting_line = await self.process_page(page_param, check)
+        setting_lines = await self.read_sparse_pages(
+            page_params, previous, progress
+        )
+        for setting_line in setting_lines:
             if setting_line:
                 self.settings.append(setting_line)
             id_extend_port = self._check_extend_port(setting_line)
             if id_extend_port is not None:
                 extended_ports.append(id_extend_port)
-        await self.add_extra_config(extended_ports)
+        await self.add_extra_config(extended_ports, progress, previous)
 
     async def save_config_to_file(self):
         """Сохранение конфигурации контроллера в файл."""
@@ -219,6 +397,82 @@ class MegaDConfigManager:
                 self.config_file_path, 'w', encoding='cp1251') as fh:
             for line in self.settings:
                 await fh.write(line)
+        await self.save_config_hashes()
+
+    @classmethod
+    def get_config_hashes(cls, settings: list[str]) -> dict[str, str]:
+        """
+        Хэши содержимого страниц конфигурации по ключу страницы, например
+        cf=1, pt=5 или pt=3&ext=2. Признак nr=1 не учитывается.
+        """
+        hashes = {}
+        for setting_line in settings:
+            params = cls.parse_line(setting_line)
+            if not params:
+                continue
+            page = '&'.join(
+                f'{key}={value}' for key, value in cls.get_line_key(params)
+            )
+            content = '&'.join(
+                f'{key}={value}' for key, value in cls._values(params).items()
+            )
+            hashes[page] = hashlib.sha256(
+                content.encode('cp1251', errors='replace')
+            ).hexdigest()
+        return hashes
+
+    async def save_config_hashes(self):
+        """Сохраняет хэши страниц рядом с файлом конфигурации."""
+        hashes = self.get_config_hashes(self.settings)
+        async with aiofiles.open(
+                self.config_file_path + CONFIG_HASH_SUFFIX, 'w') as fh:
+            await fh.write(json.dumps(hashes, indent=2))
+
+    async def load_config_hashes(self) -> dict[str, str]:
+        """
+        Хэши страниц сохранённой конфигурации. Если файла с хэшами нет, они
+        рассчитываются по файлу конфигурации и сохраняются. Так же
+        поступаем, если файл конфигурации изменён после расчёта хэшей.
+        """
+        path = self.config_file_path + CONFIG_HASH_SUFFIX
+        try:
+            if (await asyncio.to_thread(os.path.getmtime, path)
+                    >= await asyncio.to_thread(
+                        os.path.getmtime, self.config_file_path)):
+                async with aiofiles.open(path, 'r') as fh:
+                    hashes = json.loads(await fh.read())
+                # Пустой ключ - хэши записаны до разделения страниц портов.
+                if '' not in hashes:
+                    return hashes
+        except (FileNotFoundError, ValueError):
+            pass
+        await self.read_config_file()
+        await self.save_config_hashes()
+        return self.get_config_hashes(self.settings)
+
+    async def check_drift(self) -> dict[str, list[str]]:
+        """
+        Сравнивает конфигурацию контроллера с сохранённым файлом по хэшам
+        страниц. Возвращает страницы, которые изменены на контроллере,
+        отсутствуют на нём или отсутствуют в файле. С контроллера читаются
+        все страницы, чтобы обнаружить и слоты, заполненные после
+        сохранения файла.
+        """
+        saved = await self.load_config_hashes()
+        live_config = MegaDConfigManager(
+            self.url, self.config_file_path, self.session, self.concurrency,
+            self.scheduler
+        )
+        await live_config.read_config()
+        live = self.get_config_hashes(live_config.settings)
+        return {
+            'changed': [
+                page for page, digest in saved.items()
+                if page in live and live[page] != digest
+            ],
+            'missing': [page for page in saved if page not in live],
+            'added': [page for page in live if page not in saved],
+        }
 
     async def set_config(self, line_config: str):
         """Отправка настроек контроллера в виде строки по URL."""
@@ -251,20 +505,148 @@ class MegaDConfigManager:
             url_list[-2] = pwd_from_config
             self.url = '/'.join(url_list)
 
-    async def upload_config(self, timeout=0):
-        """Загрузка конфигурации на контроллер."""
-        for i, config in enumerate(self.settings):
-            config = config.strip()
-            if not config:
-                continue
+    async def upload_config(
+            self, timeout=0, differential: bool = False,
+            progress: Callable[[int, int], None] | None = None
+    ) -> int:
+        """
+        Загрузка конфигурации на контроллер.
+        differential - отправить только строки, отличающиеся от текущей
+        конфигурации контроллера.
+        progress - вызывается после каждой отправленной строки с
+        количеством отправленных строк и их общим количеством.
+        Возвращает количество отправленных строк.
+        """
+        if differential:
+            return await self.upload_config_diff(timeout, progress)
+        settings = [config.strip() for config in self.settings]
+        settings = [config for config in settings if config]
+        for i, config in enumerate(settings):
             await self.set_config(config)
             if i == 0:
                 self.check_pwd_form_config(config)
+            if progress is not None:
+                progress(i + 1, len(settings))
             if 'nr=1' not in config:
-                await asyncio.sleep(2)
+                await asyncio.sleep(TIME_CONFIG_APPLY)
             await asyncio.sleep(timeout)
         await asyncio.sleep(1)
         await self.request_to_megad({RESTART: ON})
+        return len(settings)
+
+    async def wait_ready(self, timeout: float = TIME_CONFIG_READY) -> bool:
+        """
+        Ожидает, пока контроллер после перезагрузки начнёт отвечать.
+        Возвращает False, если контроллер не ответил за timeout секунд.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        await asyncio.sleep(TIME_CONFIG_BUSY)
+        while loop.time() < deadline:
+            try:
+                response = await self.request_to_megad({})
+                page = await response.text(encoding='cp1251')
+                if response.status == HTTPStatus.OK and (
+                        page.strip() != PLC_BUSY):
+                    return True
+            except Exception as e:
+                _LOGGER.debug(f'Контроллер {self.url} ещё не отвечает: {e}')
+            await asyncio.sleep(TIME_CONFIG_BUSY)
+        return False
+
+    @staticmethod
+    def parse_line(setting_line: str) -> dict:
+        """Разбирает строку конфигурации в словарь параметров."""
+        return dict(parse_qsl(
+            setting_line.strip(), keep_blank_values=True, encoding='cp1251'
+        ))
+
+    @staticmethod
+    def get_line_key(params: dict) -> tuple:
+        """
+        Ключ страницы конфигурации, к которой относится строка. Строка
+        страницы порта задаёт номер порта полем pn, её ключ - pt=номер.
+        """
+        key = tuple(
+            (key, params[key]) for key in CONFIG_LINE_KEYS if key in params
+        )
+        if not key and PORT_NUMBER in params:
+            return ((PORT, params[PORT_NUMBER]),)
+        return key
+
+    @staticmethod
+    def _values(params: dict) -> dict:
+        """Значения строки без признака перезагрузки."""
+        return {
+            key: value for key, value in params.items() if key != NO_RESTART
+        }
+
+    @staticmethod
+    def _need_restart(params: dict, live_params: dict | None) -> bool:
+        """
+        Нужна ли перезагрузка после изменения строки: изменились основные
+        настройки контроллера или тип порта и подключенное устройство.
+        """
+        if params.get(CONFIG) == MAIN_CONFIG:
+            return True
+        if live_params is None or TYPE_PORT not in params:
+            return False
+        return any(
+            params.get(key) != live_params.get(key)
+            for key in (TYPE_PORT, TYPE_DEVICE)
+        )
+
+    async def upload_config_diff(
+            self, timeout=0,
+            progress: Callable[[int, int], None] | None = None
+    ) -> int:
+        """
+        Загружает на контроллер только изменённые строки конфигурации.
+        Текущая конфигурация читается с контроллера целиком. Строки
+        отправляются с nr=1, перезагрузка выполняется один раз в конце и
+        только если она нужна. Возвращает количество отправленных строк.
+        """
+        live_config = MegaDConfigManager(
+            self.url, self.config_file_path, self.session, self.concurrency,
+            self.scheduler
+        )
+        await live_config.read_config()
+        live = {}
+        for setting_line in live_config.settings:
+            params = self.parse_line(setting_line)
+            live[self.get_line_key(params)] = params
+
+        changed = []
+        need_restart = False
+        for config in self.settings:
+            config = config.strip()
+            if not config:
+                continue
+            params = self.parse_line(config)
+            live_params = live.get(self.get_line_key(params))
+            if (live_params is not None
+                    and self._values(live_params) == self._values(params)):
+                continue
+            need_restart |= self._need_restart(params, live_params)
+            if f'{NO_RESTART}=1' not in config:
+                config = self.decode_title(f'{config}&{NO_RESTART}=1')
+            changed.append((config, params))
+
+        count_changed = len(changed)
+        for i, (config, params) in enumerate(changed):
+            await self.set_config(config)
+            if params.get(CONFIG) == MAIN_CONFIG:
+                self.check_pwd_form_config(config)
+            if progress is not None:
+                progress(i + 1, count_changed)
+            await asyncio.sleep(timeout)
+
+        _LOGGER.debug(f'Изменённых строк конфигурации отправлено: '
+                      f'{count_changed}. Перезагрузка: {need_restart}')
+        if need_restart:
+            await asyncio.sleep(1)
+            await self.request_to_megad({RESTART: ON})
+        return count_changed
 
     async def read_config_file(self, path: str = ''):
         """Читает конфигурацию из файла и обновляет её у объекта."""
@@ -274,6 +656,81 @@ class MegaDConfigManager:
             self.settings = await file.readlines()
             _LOGGER.debug(f'Прочитана конфигурация MegaD из файла: {path}')
 
+    def _read_snapshot(self) -> tuple[DeviceMegaD | None, dict | None]:
+        """
+        Читает снимок конфигурации. Снимок подходит, если он записан той же
+        версией снимка и файл конфигурации не изменился: совпадает время
+        изменения, а при другом времени - хэш содержимого. Файл читается и
+        хэшируется только во втором случае. Возвращает снимок и ключ файла,
+        если снимок нужно записать заново, иначе None вместо ключа.
+        """
+        key = {
+            'version': get_snapshot_version(),
+            'mtime': os.stat(self.config_file_path).st_mtime_ns,
+        }
+        snapshot = None
+        try:
+            with open(
+                    self.config_file_path + CONFIG_CACHE_SUFFIX,
+                    encoding='utf-8'
+            ) as fh:
+                snapshot = json.load(fh)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            _LOGGER.debug(f'Снимок конфигурации {self.config_file_path} '
+                          f'не прочитан: {e}')
+        valid = (
+            isinstance(snapshot, dict)
+            and snapshot.get('version') == key['version']
+            and isinstance(snapshot.get('config'), dict)
+        )
+        if valid and snapshot.get('mtime') == key['mtime']:
+            config = self._construct_snapshot(snapshot['config'])
+            if config is not None:
+                return config, None
+        with open(self.config_file_path, 'rb') as fh:
+            key['sha256'] = hashlib.sha256(fh.read()).hexdigest()
+        if valid and snapshot.get('sha256') == key['sha256']:
+            return self._construct_snapshot(snapshot['config']), key
+        return None, key
+
+    def _construct_snapshot(self, data: dict) -> DeviceMegaD | None:
+        """Конфигурация из снимка или None, если снимок повреждён."""
+        try:
+            return construct_device_config(data)
+        except Exception as e:
+            _LOGGER.debug(f'Снимок конфигурации {self.config_file_path} '
+                          f'повреждён: {e}')
+            return None
+
+    def _write_snapshot(self, config: DeviceMegaD, key: dict):
+        """Сохраняет снимок конфигурации рядом с файлом в формате JSON."""
+        path = self.config_file_path + CONFIG_CACHE_SUFFIX
+        try:
+            with open(f'{path}.tmp', 'w', encoding='utf-8') as fh:
+                json.dump(key | {'config': dump_device_config(config)}, fh)
+            os.replace(f'{path}.tmp', path)
+        except OSError as e:
+            _LOGGER.warning(f'Не удалось сохранить снимок конфигурации '
+                            f'{path}: {e}')
+
+    async def load_config_megad(self) -> DeviceMegaD:
+        """
+        Конфигурация контроллера из снимка, если файл конфигурации не
+        изменился. Иначе файл разбирается заново и снимок обновляется.
+        """
+        config, key = await asyncio.to_thread(self._read_snapshot)
+        if config is not None:
+            _LOGGER.debug(f'Конфигурация загружена из снимка: '
+                          f'{self.config_file_path}{CONFIG_CACHE_SUFFIX}')
+        else:
+            await self.read_config_file()
+            config = await self.create_config_megad()
+        if key is not None:
+            await asyncio.to_thread(self._write_snapshot, config, key)
+        return config
+
     def get_mega_id(self) -> str:
         """Получить ID контроллера из конфигурации."""
         for setting in self.settings:
@@ -1,4 +1,6 @@
 import logging
+import re
+from dataclasses import dataclass
 from datetime import timedelta
 from urllib.parse import parse_qsl
 
@@ -6,6 +8,7 @@ import aiohttp
 from bs4 import BeautifulSoup
 
 from .config_manager import MegaDConfigManager
+from .exceptions import UpdateStateError
 from ..const import NAME_SCRIPT_MEGAD, CONFIG, PORT, BASE_URL
 
 _LOGGER = logging.getLogger(__name__)
@@ -46,36 +49,51 @@ def get_set_temp_thermostat(page: str) -> float:
     return float(val_input.get('value'))
 
 
-def get_uptime(page_cf: str) -> int:
-    """Получить время работы контроллера в минутах"""
-    soup = BeautifulSoup(page_cf, 'lxml')
-    uptime_text = soup.find(string=lambda text: "Uptime" in text)
-    if uptime_text:
-        uptime = uptime_text.replace("Uptime:", "").strip()
-        days, time = uptime.split('d')
-        days = int(days.strip())
-        hours, minutes = map(int, time.strip().split(':'))
-        delta = timedelta(days=days, hours=hours, minutes=minutes)
-        total_minutes = int(delta.total_seconds() / 60)
-        return total_minutes
-    return -1
-
-
-def get_temperature_megad(page_cf: str) -> float:
-    """Получить температуру на плате контроллера"""
-    soup = BeautifulSoup(page_cf, 'lxml')
-    temp_text = soup.find(string=lambda text: "Temp" in text)
-    if temp_text:
-        temperature = temp_text.replace("Temp:", "").strip()
-        return float(temperature)
-    return -100
+_RE_STATUS_PAGE = re.compile(
+    r'Uptime:\s*(?P<days>\d+)\s*d\s*(?P<hours>\d+):(?P<minutes>\d+)'
+    r'|Temp:\s*(?P<temperature>-?\d+(?:\.\d+)?)'
+    r'|\(fw:\s*(?P<software>[^)<]+?)\s*\)'
+)
+
+
+@dataclass(frozen=True)
+class StatusPageMegaD:
+    """Поля статуса со страниц cf=0 и cf=1 контроллера."""
+    uptime: int = -1
+    temperature: float = -100
+    software: str | None = None
+
+
+def parse_status_page(page_cf: str) -> StatusPageMegaD:
+    """
+    Разбирает страницу статуса контроллера за один проход регулярным
+    выражением, без построения дерева HTML. Берётся первое вхождение
+    каждого поля.
+    """
+    fields = {}
+    for match in _RE_STATUS_PAGE.finditer(page_cf):
+        if match['days'] is not None:
+            if 'uptime' not in fields:
+                delta = timedelta(
+                    days=int(match['days']),
+                    hours=int(match['hours']),
+                    minutes=int(match['minutes'])
+                )
+                fields['uptime'] = int(delta.total_seconds() / 60)
+        elif match['temperature'] is not None:
+            fields.setdefault('temperature', float(match['temperature']))
+        else:
+            fields.setdefault('software', match['software'])
+        if len(fields) == 3:
+            break
+    return StatusPageMegaD(**fields)
 
 
 def get_version_software(page_cf: str) -> str:
     """Получить версию прошивки контроллера"""
-    soup = BeautifulSoup(page_cf, 'lxml')
-    software_text = soup.find(string=lambda text: '(fw:' in text)
-    software = software_text.replace("(fw:", "").strip().strip(')')
+    software = parse_status_page(page_cf).software
+    if software is None:
+        raise UpdateStateError('На странице контроллера нет версии ПО.')
     return software
 
 
@@ -142,9 +160,11 @@ def create_short_description(descr: str) -> str:
         return f'{descr[:251]}...'
 
 
-def get_latest_version(page: str, current_version: str) -> dict:
-    """Получает последнею версию ПО контроллера и описание."""
-    passed_versions = []
+def parse_release_page(page: str) -> list[dict]:
+    """
+    Разбирает страницу с прошивками ab-log.ru. Возвращает список версий,
+    отсортированный от новой к старой.
+    """
     all_versions = []
 
     soup = BeautifulSoup(page, 'lxml')
@@ -163,19 +183,32 @@ def get_latest_version(page: str, current_version: str) -> dict:
                 break
             descr_list.append(el.text)
         version['descr'] = ''.join(descr_list)
-        version['link'] = f'{BASE_URL}{li_tag.find('a', href=True)['href']}'
+        href = li_tag.find('a', href=True)['href']
+        version['link'] = f'{BASE_URL}{href}'
         all_versions.append(version)
 
-    sorted_versions = sorted(
-        all_versions, key=lambda v: v['name'], reverse=True
-    )
+    return sorted(all_versions, key=lambda v: v['name'], reverse=True)
+
+
+def select_latest_version(
+        sorted_versions: list[dict], current_version: str | None,
+        count_passed: int | None = None
+) -> dict:
+    """
+    Формирует последнюю версию ПО и описание пропущенных версий.
+    count_passed - количество версий новее текущей, если оно уже известно.
+    """
     if current_version is None:
         _LOGGER.debug('Текущая версия ПО контроллера не инициирована.')
         full_descr = ''
     else:
-        for version in sorted_versions:
-            if version['name'] > current_version:
-                passed_versions.append(version)
+        if count_passed is None:
+            passed_versions = [
+                version for version in sorted_versions
+                if version['name'] > current_version
+            ]
+        else:
+            passed_versions = sorted_versions[:count_passed]
         full_descr = create_description(passed_versions)
     return {
         'name': sorted_versions[0]['name'],
@@ -183,3 +216,8 @@ def get_latest_version(page: str, current_version: str) -> dict:
         'short_descr': create_short_description(sorted_versions[0]['descr']),
         'link': sorted_versions[0]['link']
     }
+
+
+def get_latest_version(page: str, current_version: str) -> dict:
+    """Получает последнею версию ПО контроллера и описание."""
+    return select_latest_version(parse_release_page(page), current_version)
@@ -10,6 +10,17 @@ BROADCAST_CHANGE_IP = b'\xAA\x00\x04'
 CHECK_DATA = b'\xDA\xCA'
 DEFAULT_IP = '192.168.0.14'
 BLOCK_SIZE = 256
+FW_MAX_SIZE = 258046
+FW_MIN_SIZE = 1000
+FLASH_START_ATTEMPTS = 10
+FLASH_START_TIMEOUT = 30
+FLASH_CLEAR_TIMEOUT = 5
+FLASH_BLOCK_TIMEOUT = 2
+FLASH_BLOCK_RETRIES = 2
+FLASH_EEPROM_TIMEOUT = 30
+FLASH_REBOOT_TIMEOUT = 5
+FLASH_CHANGE_IP_TIMEOUT = 1
+FLASH_HTTP_TIMEOUT = 5
 SEARCH_TIMEOUT = 5
 RECV_TIMEOUT = 0.3
 DEFAULT_IP_LIST = ['null']
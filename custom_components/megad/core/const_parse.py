@@ -18,6 +18,7 @@ EXTRA_TYPE = 'ety'
 WIENGAND = 'wg'
 IBUTTON = 'ib'
 PASSWORD = 'pwd'
+NO_RESTART = 'nr'
 
 # Номера конфигураций
 MAIN_CONFIG = '1'
@@ -37,3 +38,43 @@ I2C = '4'
 
 # Таймауты
 TIME_OUT_UPDATE = 5
+TIME_CONFIG_BUSY = 0.5
+TIME_CONFIG_APPLY = 2
+TIME_CONFIG_READY = 60
+
+# Снимок разобранной конфигурации рядом с файлом .cfg. Версия формата
+# снимка дополняется версией интеграции и хэшем схемы моделей.
+CONFIG_CACHE_SUFFIX = '.cache'
+CONFIG_CACHE_VERSION = 3
+MANIFEST_FILE = 'manifest.json'
+CONFIG_HASH_SUFFIX = '.hash'
+
+# Повторы запроса страницы конфигурации при ответе busy
+CONFIG_BUSY_RETRIES = 3
+
+# Параметры, по которым строка конфигурации относится к своей странице
+CONFIG_LINE_KEYS = (
+    CONFIG, PORT, EXTRA, CONDITION, PID, SECTION, ELEMENT
+)
+
+# Поля страниц, по которым слот считается заполненным
+CONDITION_PORT = 'prp'
+PID_INPUT = 'pidi'
+PID_OUTPUT = 'pido'
+ELEMENT_TEXT = 'elx'
+ELEMENT_PORT = 'elp'
+EXTRA_TITLE = 'ept'
+
+# Страницы, которые при чтении конфигурации можно пропустить, если слот был
+# пуст в предыдущей конфигурации: (номер конфигурации, ключ слота, поля).
+# Списки выбора MegaD всегда отдаёт со значением по умолчанию, поэтому
+# слот пуст, если не заполнено ни одно из полей ввода: у условия нет порта,
+# у ПИД нет входа и выхода, у элемента экрана нет текста и порта.
+SPARSE_PAGES = (
+    (CONDITION_CONFIG, CONDITION, (CONDITION_PORT,)),
+    (PID_CONFIG, PID, (PID_INPUT, PID_OUTPUT)),
+    (SCREEN_CONFIG, ELEMENT, (ELEMENT_TEXT, ELEMENT_PORT)),
+)
+
+# Канал расширителя пуст, если у него нет названия и действия
+EXTRA_SLOT_FIELDS = (EXTRA_TITLE, EXTRA_ACTION)
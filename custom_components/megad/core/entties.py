@@ -18,7 +18,7 @@ class PortOutEntity(CoordinatorEntity):
                  port: ReleyPortOut,
                  unique_id: str
     ) -> None:
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=port.conf.id)
         self._coordinator: MegaDCoordinator = coordinator
         self._megad: MegaD = coordinator.megad
         self._port: ReleyPortOut = port
@@ -100,7 +100,7 @@ class PortOutExtraEntity(CoordinatorEntity):
             self, coordinator: MegaDCoordinator, port,
             config_extra_port, unique_id: str
     ) -> None:
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=port.conf.id)
         self._coordinator: MegaDCoordinator = coordinator
         self._megad: MegaD = coordinator.megad
         self._config_extra_port = config_extra_port
@@ -192,7 +192,7 @@ class PortOutOneWireEntity(CoordinatorEntity):
                  module_id: str,
                  line: str
     ) -> None:
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=port.conf.id)
         self._coordinator: MegaDCoordinator = coordinator
         self._megad: MegaD = coordinator.megad
         self._port: OneWirePortOut = port
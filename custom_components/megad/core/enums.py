@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, IntEnum
 
 
 class EnumMegaD(Enum):
@@ -335,3 +335,29 @@ class ModePIDMegaD(EnumMegaD):
             '1': 'cool',
             '2': 'balance',
         }
+
+
+class StrategyPollMegaD(Enum):
+    """Способ получения состояния порта в цикле опроса"""
+
+    STATE = 'state'
+    EXTRA = 'extra'
+    ONE_WIRE_BUS = 'one_wire_bus'
+    STATE_OR_BUS = 'state_or_bus'
+    STATE_OR_I2C = 'state_or_i2c'
+    SKIP = 'skip'
+
+    @property
+    def need_states(self) -> bool:
+        """Нужна ли строка состояний всех портов для опроса."""
+        return self not in (
+            StrategyPollMegaD.ONE_WIRE_BUS, StrategyPollMegaD.SKIP
+        )
+
+
+class RequestPriority(IntEnum):
+    """Очередь запроса к контроллеру, меньшее значение обслуживается раньше"""
+
+    COMMAND = 0
+    POLLING = 1
+    CONFIG = 2
@@ -114,3 +114,18 @@ class FWUpdateError(HomeAssistantError):
 class FirmwareUpdateInProgress(Exception):
     """Идёт процесс обновление ПО контроллера."""
     pass
+
+
+class FirmwareFileError(Exception):
+    """Ошибка в файле прошивки."""
+    pass
+
+
+class InvalidReactionRule(Exception):
+    """Ошибка в правиле реакции на событие порта."""
+    pass
+
+
+class FlashError(Exception):
+    """Ошибка обмена с загрузчиком во время прошивки."""
+    pass
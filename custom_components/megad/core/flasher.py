@@ -0,0 +1,275 @@
+import asyncio
+import logging
+from typing import Callable
+
+import aiohttp
+import async_timeout
+
+from .const_fw import (
+    BROADCAST_PORT, RECV_PORT, BROADCAST_START, BROADCAST_REBOOT,
+    BROADCAST_CLEAR, BROADCAST_EEPROM, BROADCAST_EEPROM_CONFIRM,
+    BROADCAST_CHANGE_IP, CHECK_DATA, BLOCK_SIZE, RECV_TIMEOUT,
+    FLASH_START_ATTEMPTS, FLASH_START_TIMEOUT, FLASH_CLEAR_TIMEOUT,
+    FLASH_BLOCK_TIMEOUT, FLASH_BLOCK_RETRIES, FLASH_EEPROM_TIMEOUT,
+    FLASH_REBOOT_TIMEOUT, FLASH_CHANGE_IP_TIMEOUT, FLASH_HTTP_TIMEOUT
+)
+from .exceptions import (
+    FlashError, InvalidPasswordMegad, ChangeIPMegaDError,
+    CreateSocketReceiveError
+)
+from .utils import get_change_ip_data
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class FlasherProtocol(asyncio.DatagramProtocol):
+    """Приём ответов загрузчика MegaD в очередь."""
+
+    def __init__(self):
+        self.packets: asyncio.Queue[tuple[bytes, tuple]] = asyncio.Queue()
+
+    def datagram_received(self, data: bytes, addr: tuple) -> None:
+        self.packets.put_nowait((data, addr))
+
+    def error_received(self, exc: Exception) -> None:
+        _LOGGER.debug(f'Ошибка сокета прошивки: {exc}')
+
+
+class MegaDFlasher:
+    """
+    Прошивка контроллера через загрузчик по UDP без блокирующих сокетов.
+    Пакеты отправляются на target, ответы принимаются на local_addr.
+    """
+
+    def __init__(
+            self, host_ip: str, broadcast_ip: str,
+            progress: Callable[[int], None] | None = None,
+            recv_port: int = RECV_PORT,
+            target_port: int = BROADCAST_PORT
+    ):
+        self.local_addr = (host_ip, recv_port)
+        self.target = (broadcast_ip, target_port)
+        self.progress = progress
+        self._transport: asyncio.DatagramTransport | None = None
+        self._protocol: FlasherProtocol | None = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+    async def open(self) -> None:
+        """Открывает UDP сокет для обмена с загрузчиком."""
+        loop = asyncio.get_running_loop()
+        try:
+            self._transport, self._protocol = (
+                await loop.create_datagram_endpoint(
+                    FlasherProtocol, local_addr=self.local_addr,
+                    allow_broadcast=True
+                )
+            )
+        except OSError as e:
+            _LOGGER.warning(f'Ошибка при создании сокета прошивки: {e}')
+            raise CreateSocketReceiveError
+        _LOGGER.debug(f'Сокет прошивки открыт: {self.local_addr}')
+
+    def close(self) -> None:
+        """Закрывает сокет."""
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+
+    def _drain(self) -> None:
+        """Удаляет из очереди запоздавшие ответы."""
+        while not self._protocol.packets.empty():
+            self._protocol.packets.get_nowait()
+
+    def send(self, packet: bytes) -> None:
+        """Отправка пакета загрузчику."""
+        self._transport.sendto(packet, self.target)
+
+    async def receive(self, timeout: float) -> bytes:
+        """Ответ загрузчика. TimeoutError, если ответа нет."""
+        async with async_timeout.timeout(timeout):
+            packet, peer = await self._protocol.packets.get()
+        _LOGGER.debug(f'Ответ получен от {peer}: {packet.hex()}')
+        return packet
+
+    async def request(self, packet: bytes, timeout: float) -> bytes:
+        """Отправляет пакет и ждёт ответ."""
+        self._drain()
+        self.send(packet)
+        return await self.receive(timeout)
+
+    async def start(self) -> None:
+        """Устанавливает связь с загрузчиком и проверяет тип чипа."""
+        broadcast_string = BROADCAST_START + CHECK_DATA
+        for i in range(FLASH_START_ATTEMPTS):
+            try:
+                await self.request(broadcast_string, RECV_TIMEOUT)
+                break
+            except TimeoutError:
+                _LOGGER.debug(f'Попытка {i + 1}: загрузчик не ответил.')
+        try:
+            packet = await self.request(broadcast_string, FLASH_START_TIMEOUT)
+        except TimeoutError:
+            raise FlashError('Контроллер не отвечает.')
+        if len(packet) < 3 or packet[2] not in (0x99, 0x9A):
+            raise FlashError('Неподдерживаемый тип чипа atmega328!')
+        if packet[2] == 0x99:
+            _LOGGER.warning('WARNING! Пожалуйста, обновите загрузчик!')
+            await self.reboot()
+            raise FlashError('Загрузчик устарел.')
+
+    async def erase(self) -> None:
+        """Стирание прошивки."""
+        _LOGGER.debug('Стирание старой прошивки...')
+        try:
+            packet = await self.request(
+                BROADCAST_CLEAR + CHECK_DATA, FLASH_CLEAR_TIMEOUT
+            )
+        except TimeoutError:
+            raise FlashError('Не удалось стереть прошивку')
+        if packet[:2] != b'\xAA\x00':
+            raise FlashError('Ошибка во время записи ПО...')
+
+    async def write_block(self, msg_id: int, block: memoryview) -> None:
+        """
+        Отправляет блок прошивки и ждёт подтверждение с его номером.
+        Запоздавшие подтверждения других блоков пропускаются, при
+        таймауте блок отправляется повторно с тем же msg_id.
+
+        Загрузчик не сообщает адрес записи, поэтому повтор рассчитан на
+        его разбор номера блока: блок с msg_id предыдущего принятого блока
+        записывается заново по тому же адресу и подтверждается ещё раз,
+        а не пишется по следующему адресу. Так повтор после потерянного
+        подтверждения не сдвигает прошивку. Следующий блок отправляется
+        только после подтверждения текущего.
+        """
+        packet = bytes([0xAA, msg_id, 0x01]) + CHECK_DATA + block
+        for attempt in range(FLASH_BLOCK_RETRIES + 1):
+            self.send(packet)
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + FLASH_BLOCK_TIMEOUT
+            try:
+                while True:
+                    ack = await self.receive(deadline - loop.time())
+                    if ack[0] != 0xAA:
+                        raise FlashError('Ошибка во время записи ПО...')
+                    if ack[1] == msg_id:
+                        return
+                    _LOGGER.debug(f'Пропущено подтверждение блока {ack[1]}, '
+                                  f'ожидается {msg_id}')
+            except TimeoutError:
+                _LOGGER.debug(f'Нет подтверждения блока {msg_id}, попытка '
+                              f'{attempt + 1}')
+        raise FlashError('Контроллер не ответил во время прошивки.')
+
+    async def write(self, firmware: memoryview) -> None:
+        """Запись образа прошивки блоками из memoryview."""
+        _LOGGER.debug('Начало записи новой прошивки...')
+        self._drain()
+        msg_id = 0
+        for offset in range(0, len(firmware), BLOCK_SIZE):
+            await self.write_block(
+                msg_id, firmware[offset:offset + BLOCK_SIZE]
+            )
+            msg_id = (msg_id + 1) % 256
+            if self.progress is not None:
+                self.progress(
+                    min(100, (offset + BLOCK_SIZE) * 100 // len(firmware))
+                )
+        _LOGGER.debug('Новая прошивка успешно записана на устройство.')
+
+    async def erase_eeprom(self) -> None:
+        """Стирание EEPROM после записи прошивки."""
+        _LOGGER.debug('Отправка команды на стирание EEPROM')
+        try:
+            await self.request(
+                BROADCAST_EEPROM + CHECK_DATA, FLASH_EEPROM_TIMEOUT
+            )
+            _LOGGER.debug('Отправка команды на подтверждение стирание EEPROM')
+            packet = await self.request(
+                BROADCAST_EEPROM_CONFIRM + CHECK_DATA, FLASH_EEPROM_TIMEOUT
+            )
+        except TimeoutError:
+            raise FlashError('Таймаут ожидания ответа для очистки EEPROM.')
+        if packet[:2] != b'\xAA\x01':
+            raise FlashError('Ошибка стирания EEPROM.')
+        _LOGGER.debug('EEPROM успешно стёрта.')
+
+    async def reboot(self) -> None:
+        """Перезагрузка контроллера из загрузчика."""
+        _LOGGER.debug('Попытка перезагрузить устройство...')
+        try:
+            await self.request(
+                BROADCAST_REBOOT + CHECK_DATA, FLASH_REBOOT_TIMEOUT
+            )
+            _LOGGER.info('Устройство перезагружено.')
+        except TimeoutError:
+            _LOGGER.warning('Нет ответа на команду перезагрузки.')
+
+    async def change_ip(self, old_ip: str, new_ip: str, password: str):
+        """Изменение IP-адреса контроллера после прошивки."""
+        data = get_change_ip_data(old_ip, new_ip, password)
+        for number, packet in enumerate(
+                (BROADCAST_CHANGE_IP + data,
+                 BROADCAST_CHANGE_IP + CHECK_DATA + data), 1
+        ):
+            _LOGGER.info(f'Попытка изменить IP-адрес. Запрос {number} к '
+                         f'контроллеру.')
+            try:
+                packet = await self.request(packet, FLASH_CHANGE_IP_TIMEOUT)
+            except TimeoutError:
+                _LOGGER.info(f'Нет ответа на запрос {number} к контроллеру. '
+                             f'Возможно адрес был изменён.')
+                continue
+            if packet[0] == 0xAA:
+                if packet[1] == 0x02:
+                    raise InvalidPasswordMegad
+                if packet[1] == 0x01:
+                    _LOGGER.info('IP-адрес был успешно изменён!')
+                return
+        raise ChangeIPMegaDError
+
+    async def flash(self, firmware: memoryview) -> None:
+        """Полный цикл: стирание, запись, очистка EEPROM, перезагрузка."""
+        await self.start()
+        await self.erase()
+        await self.write(firmware)
+        await self.erase_eeprom()
+        await self.reboot()
+
+
+async def check_bootloader_version(
+        session: aiohttp.ClientSession, megad_ip: str, password: str
+) -> None:
+    """Проверка загрузчика."""
+    try:
+        async with async_timeout.timeout(FLASH_HTTP_TIMEOUT):
+            response = await session.get(
+                f'http://{megad_ip}/{password}/?bl=1'
+            )
+            value = int(await response.text())
+        if value != 1:
+            raise ValueError(value)
+    except Exception as e:
+        _LOGGER.warning(f'Обновите загрузчик на контроллере! error: {e}')
+        raise FlashError('Версия загрузчика устарела!')
+
+
+async def turn_on_fw_update(
+        session: aiohttp.ClientSession, megad_ip: str, password: str
+) -> None:
+    """
+    Перевод контроллера в режим прошивки. Контроллер уходит в загрузчик
+    не отвечая, поэтому ответ не ожидается.
+    """
+    _LOGGER.debug('Перевод контроллера в режим прошивки...')
+    try:
+        async with async_timeout.timeout(1):
+            await session.get(f'http://{megad_ip}/{password}/?fwup=1')
+    except Exception:
+        _LOGGER.debug('Контроллер переведён в режим прошивки.')
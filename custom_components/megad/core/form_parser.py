@@ -0,0 +1,115 @@
+from html.parser import HTMLParser
+
+# Начало тега закрывает открытый перед ним элемент того же вида: новая
+# форма завершает незакрытую форму, новый option - предыдущий option.
+# Так же поступает lxml, если форма или option открыты последними.
+_START_CLOSE = {'form', 'option'}
+
+# Конец страницы закрывает все открытые формы и списки.
+_DOCUMENT_END = {'body', 'html'}
+
+
+class MegaDFormParser(HTMLParser):
+    """
+    Потоковый разбор полей форм страницы конфигурации MegaD.
+
+    Повторяет результат обхода дерева BeautifulSoup с lxml, который
+    раньше использовал MegaDConfigManager.get_params: сначала поля input
+    всех форм, кроме форм со style="display:inline", в порядке форм,
+    затем все select страницы с выбранным option. При повторе атрибута
+    берётся первое значение, как в lxml. Учитываются только теги, из
+    которых состоят формы MegaD: form, input, select, option и textarea,
+    остальная разметка пропускается. Незакрытая форма завершается
+    следующей формой или концом страницы.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.forms: list[list[str]] = []
+        self.selects: list[list[str | None]] = []
+        self._stack: list[tuple[str, list | None]] = []
+
+    @staticmethod
+    def _attrs(attrs: list[tuple[str, str | None]]) -> dict:
+        """Атрибуты тега, первое значение и '' для атрибута без значения."""
+        result = {}
+        for name, value in attrs:
+            if name not in result:
+                result[name] = '' if value is None else value
+        return result
+
+    def _open(self, tag: str, item: list | None = None):
+        """Открывает элемент, закрывая открытый перед ним такой же."""
+        if tag in _START_CLOSE and self._stack and self._stack[-1][0] == tag:
+            self._stack.pop()
+        self._stack.append((tag, item))
+
+    def _opened(self, tag: str) -> list[list]:
+        """Открытые элементы tag с данными."""
+        return [item for name, item in self._stack
+                if name == tag and item is not None]
+
+    def _input(self, attrs: dict):
+        """Добавляет поле input во все открытые формы."""
+        if attrs.get('type') == 'submit':
+            return
+        value = attrs.get('value', '')
+        if attrs.get('type') == 'checkbox':
+            value = '1' if 'checked' in attrs else ''
+        pair = f'{attrs.get("name")}={value}'
+        for form in self._opened('form'):
+            form.append(pair)
+
+    def _option(self, attrs: dict):
+        """Выбранный option задаёт значение всем открытым select без него."""
+        if 'selected' not in attrs:
+            return
+        for select in self._opened('select'):
+            if select[1] is None:
+                select[1] = attrs.get('value', '')
+
+    def handle_starttag(self, tag, attrs):
+        match tag:
+            case 'form':
+                attrs = self._attrs(attrs)
+                form = None
+                if attrs.get('style') != 'display:inline':
+                    form = []
+                    self.forms.append(form)
+                self._open(tag, form)
+            case 'select':
+                select = [self._attrs(attrs).get('name'), None]
+                self.selects.append(select)
+                self._open(tag, select)
+            case 'option':
+                self._open(tag)
+                self._option(self._attrs(attrs))
+            case 'input':
+                self._input(self._attrs(attrs))
+            case 'textarea':
+                self.set_cdata_mode(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag in _DOCUMENT_END:
+            self._stack.clear()
+            return
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index][0] == tag:
+                del self._stack[index:]
+                return
+
+
+def extract_form_params(page: str) -> str:
+    """Строка параметров name=value&... из форм страницы за один проход."""
+    parser = MegaDFormParser()
+    parser.feed(page)
+    parser.close()
+    pairs = [pair for form in parser.forms for pair in form]
+    pairs.extend(
+        f'{name}={value}' for name, value in parser.selects
+        if value is not None
+    )
+    return '&'.join(pairs).rstrip('&')
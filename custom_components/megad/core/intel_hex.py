@@ -0,0 +1,93 @@
+import logging
+import zlib
+from dataclasses import dataclass
+
+from .const_fw import FW_MAX_SIZE
+from .exceptions import FirmwareFileError
+
+_LOGGER = logging.getLogger(__name__)
+
+FILL_BYTE = 0xFF
+
+
+@dataclass(frozen=True)
+class FirmwareImage:
+    """Образ прошивки, собранный из файла Intel HEX."""
+    data: bytearray
+    size: int
+    crc: int
+
+    def view(self) -> memoryview:
+        """Образ без копирования данных."""
+        return memoryview(self.data)[:self.size]
+
+
+def parse_intel_hex(path: str, max_size: int = FW_MAX_SIZE) -> FirmwareImage:
+    """
+    Потоково разбирает файл Intel HEX в заранее выделенный буфер.
+    Проверяет контрольную сумму каждой записи, учитывает записи
+    расширенного адреса и требует запись конца файла. Пропуски между
+    блоками данных заполняются 0xFF.
+    """
+    image = bytearray([FILL_BYTE]) * max_size
+    base_address = 0
+    size = 0
+    eof = False
+    with open(path, 'r') as fh:
+        for number, line in enumerate(fh, 1):
+            line = line.strip()
+            if not line:
+                continue
+            if eof:
+                raise FirmwareFileError(
+                    f'Данные после записи конца файла, строка {number}'
+                )
+            if line[0] != ':':
+                raise FirmwareFileError(
+                    f'Строка {number} не является записью Intel HEX'
+                )
+            try:
+                record = bytes.fromhex(line[1:])
+            except ValueError:
+                raise FirmwareFileError(
+                    f'Недопустимые символы в строке {number}'
+                )
+            if len(record) < 5 or len(record) != record[0] + 5:
+                raise FirmwareFileError(f'Неверная длина записи, строка '
+                                        f'{number}')
+            if sum(record) & 0xFF:
+                raise FirmwareFileError(f'Неверная контрольная сумма, строка '
+                                        f'{number}')
+            count = record[0]
+            address = int.from_bytes(record[1:3], 'big')
+            record_type = record[3]
+            data = record[4:4 + count]
+            match record_type:
+                case 0x00:  # данные
+                    start = base_address + address
+                    end = start + count
+                    if end > max_size:
+                        raise FirmwareFileError(
+                            f'Адрес {end:#x} за пределами памяти '
+                            f'{max_size:#x}, строка {number}'
+                        )
+                    image[start:end] = data
+                    size = max(size, end)
+                case 0x01:  # конец файла
+                    eof = True
+                case 0x02:  # расширенный адрес сегмента
+                    base_address = int.from_bytes(data, 'big') << 4
+                case 0x04:  # расширенный линейный адрес
+                    base_address = int.from_bytes(data, 'big') << 16
+                case 0x03 | 0x05:  # адрес запуска, для AVR не нужен
+                    pass
+                case _:
+                    raise FirmwareFileError(
+                        f'Неизвестный тип записи {record_type:#04x}, '
+                        f'строка {number}'
+                    )
+    if not eof:
+        raise FirmwareFileError('В файле прошивки нет записи конца файла')
+    crc = zlib.crc32(memoryview(image)[:size])
+    _LOGGER.debug(f'Образ прошивки {path}: {size} байт, CRC32 {crc:08X}')
+    return FirmwareImage(image, size, crc)
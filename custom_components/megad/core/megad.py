@@ -1,13 +1,13 @@
-import asyncio
 import logging
 import os
+import time
+from copy import deepcopy
 from datetime import datetime
 from http import HTTPStatus
 from typing import Union
 
 import aiofiles.os as aios
-import async_timeout
-from aiohttp import ClientResponse
+from aiohttp import ClientResponse, ClientResponseError
 
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
@@ -17,32 +17,34 @@ from .base_ports import (
     BasePort, OneWireSensorPort, DHTSensorPort, OneWireBusSensorPort,
     I2CSensorSCD4x, I2CSensorSTH31, AnalogSensor, I2CSensorHTUxxD,
     I2CSensorMBx280, I2CExtraMCP230xx, I2CExtraPCA9685, ReaderPort,
-    I2CSensorINA226, I2CSensorBH1750, I2CSensorILLUM, I2CSensorMAX44009,
+    I2CSensorINA226, I2CSensorBH1750, I2CSensorMAX44009,
     I2CSensorTSL2591, I2CSensorT67xx, I2CSensorBMP180, I2CSensorPT,
     I2CDisplayPort, I2CSensorOPT3001, RGBPortOut, OneWirePortOut
 )
 from .config_parser import (
-    get_uptime, async_get_page_config, get_temperature_megad,
-    get_version_software, async_get_page_port, get_set_temp_thermostat,
-    get_status_thermostat, async_get_page, get_params_pid, get_latest_version,
-    get_names_i2c
+    parse_status_page, get_set_temp_thermostat, get_status_thermostat,
+    get_params_pid, get_names_i2c, get_version_software
 )
 from .const_fw import FW_PATH
 from .enums import (
     TypePortMegaD, ModeInMegaD, ModeOutMegaD, TypeDSensorMegaD, DeviceI2CMegaD,
-    ModeI2CMegaD, ModeSensorMegaD, ModeWiegandMegaD
+    ModeI2CMegaD, ModeSensorMegaD, ModeWiegandMegaD, StrategyPollMegaD,
+    RequestPriority
 )
 from .exceptions import (
     MegaDBusy, InvalidPasswordMegad, FirmwareUpdateInProgress
 )
 from .models_megad import DeviceMegaD, PIDConfig, LatestVersionMegaD
+from .poll_plan import PollStep, compile_poll_step
 from .request_to_ablogru import FirmwareChecker
+from .scheduler import MegaDRequestScheduler
+from .coalescer import CommandCoalescer
 from ..const import (
-    MAIN_CONFIG, START_CONFIG, TIME_OUT_UPDATE_DATA, PORT, COMMAND, ALL_STATES,
-    LIST_STATES, SCL_PORT, I2C_DEVICE, TIME_SLEEP_REQUEST, SET_TEMPERATURE,
-    STATUS_THERMO, CONFIG, PID, NOT_AVAILABLE, PID_E, PID_SET_POINT, PID_INPUT,
+    MAIN_CONFIG, START_CONFIG, PORT, COMMAND, ALL_STATES,
+    LIST_STATES, SCL_PORT, I2C_DEVICE, SET_TEMPERATURE,
+    STATUS_THERMO, CONFIG, PID, PID_E, PID_SET_POINT, PID_INPUT,
     PID_OFF, CRON, SET_TIME, MCP_MODUL, PCA_MODUL, GET_STATUS, SCAN,
-    I2C_PARAMETER, WS, CHIP, ADDRESS
+    I2C_PARAMETER, WS, CHIP, ADDRESS, PollCadence, TIME_PUSH_STALE
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -58,12 +60,16 @@ class MegaD:
             url: str,
             config_path: str,
             fw_checker: FirmwareChecker,
+            cadence: PollCadence = PollCadence(),
+            push_first: bool = False,
     ):
         self.hass = hass
         self.fw_checker: FirmwareChecker = fw_checker
         self.session = async_get_clientsession(hass)
         self.config: DeviceMegaD = config
         self.id = config.plc.megad_id
+        self.scheduler = MegaDRequestScheduler(self.id, self.session)
+        self.coalescer = CommandCoalescer(self._send_command)
         self.pids: list[PIDControl] = []
         self.ports: list[Union[
             BinaryPortIn, BinaryPortClick, BinaryPortCount, ReleyPortOut,
@@ -76,6 +82,7 @@ class MegaD:
         ]] = []
         self.extra_ports: list[Union[I2CExtraMCP230xx, I2CExtraPCA9685]]
         self.config_ports_bus_i2c = []
+        self.poll_plan: list[PollStep] = []
         self.url: str = url
         self.config_path: str = config_path
         self.domain: str = url.split('/')[2]
@@ -85,7 +92,18 @@ class MegaD:
         self.lt_version_sw: LatestVersionMegaD = LatestVersionMegaD()
         self.lt_version_sw_local: LatestVersionMegaD = LatestVersionMegaD()
         self.is_flashing = False
+        self.is_restoring = False
         self.is_available = False
+        self.cadence: PollCadence = cadence
+        self._cycle: int = 0
+        self._software_outdated: bool = True
+        self.push_first: bool = push_first
+        self._last_push: dict[int, float] = {}
+        self.config_drift: dict[str, list[str]] | None = None
+        self.drift_checked: datetime | None = None
+        self._ports_by_id: dict[int, BasePort] = {}
+        self._pids_by_id: dict[int, PIDControl] = {}
+        self._interrupt_ports: dict[int, I2CExtraMCP230xx] = {}
         self.init_ports()
         self.init_pids()
         _LOGGER.debug(f'Создан объект MegaD: {self}')
@@ -124,9 +142,8 @@ class MegaD:
 
     async def update_latest_software(self):
         """Обновляет последнею доступную версию ПО контроллера."""
-        page = self.fw_checker.page_firmware
-        if page:
-            lt_vers = get_latest_version(page, self.software)
+        lt_vers = self.fw_checker.get_latest_version(self.software)
+        if lt_vers:
             self.lt_version_sw = LatestVersionMegaD(**lt_vers)
             _LOGGER.debug(f'Последняя доступная версия прошивки для '
                           f'MegaD-{self.id}: {self.lt_version_sw.name}.')
@@ -136,25 +153,35 @@ class MegaD:
             _LOGGER.debug('Нет данных о последней доступной версии прошивки на'
                           ' сайте ab-log.ru')
 
-    async def request_to_megad(self, params) -> ClientResponse:
-        """Отправка запроса к контроллеру"""
+    async def request_to_megad(
+            self, params,
+            priority: RequestPriority = RequestPriority.POLLING
+    ) -> ClientResponse:
+        """
+        Отправка запроса к контроллеру. Команды пользователя отправляются
+        с приоритетом COMMAND и обгоняют запросы опроса в очереди.
+        """
         if self.is_flashing:
             _LOGGER.warning(f'Управление контроллером MegaD-{self.id}'
                             f'{self.config.plc.ip_megad}  невозможно! '
                             f'Идет процесс прошивки!')
             raise FirmwareUpdateInProgress
-        async with async_timeout.timeout(TIME_OUT_UPDATE_DATA):
-            if isinstance(params, dict):
-                response = await self.session.get(url=self.url, params=params)
-            if isinstance(params, str):
-                response = await self.session.get(url=f'{self.url}?{params}')
-            _LOGGER.debug(f'Отправлен запрос контроллеру '
-                          f'id {self.id}: {params}')
+        response = await self.scheduler.request(self.url, params, priority)
+        _LOGGER.debug(f'Отправлен запрос контроллеру id {self.id}: {params}')
         return response
 
-    async def get_status(self, params: dict) -> str:
-        """Получение статуса по переданным параметрам"""
+    async def get_page(self, params: dict) -> str:
+        """Получение страницы конфигурации контроллера."""
         response = await self.request_to_megad(params)
+        response.raise_for_status()
+        return await response.text(encoding='windows-1251')
+
+    async def get_status(
+            self, params: dict,
+            priority: RequestPriority = RequestPriority.POLLING
+    ) -> str:
+        """Получение статуса по переданным параметрам"""
+        response = await self.request_to_megad(params, priority)
         if response.status == HTTPStatus.UNAUTHORIZED:
             _LOGGER.error(f'Неверный пароль для устройства с id {self.id}')
             raise InvalidPasswordMegad(f'Проверьте пароль у устройства '
@@ -168,35 +195,53 @@ class MegaD:
         _LOGGER.debug(f'Состояние всех портов id:{self.id}: {text}')
         return text
 
+    def _is_due(self, cadence: int) -> bool:
+        """Проверяет, нужно ли опрашивать данные в текущем цикле."""
+        return self._cycle % max(cadence, 1) == 0
+
+    def request_software_refresh(self):
+        """Запросить версию ПО в следующем цикле (после перезагрузки)."""
+        self._software_outdated = True
+
+    async def update_software(self):
+        """Обновление версии ПО контроллера."""
+        page_cf0 = await self.get_page({CONFIG: START_CONFIG})
+        self.software = get_version_software(page_cf0)
+        self._software_outdated = False
+        _LOGGER.debug(f'Версия ПО контроллера id: {self.id}: {self.software}')
+
+    async def update_status(self):
+        """Обновление времени работы и температуры платы контроллера."""
+        page_cf1 = await self.get_page({CONFIG: MAIN_CONFIG})
+        status = parse_status_page(page_cf1)
+        self.uptime = status.uptime
+        _LOGGER.debug(f'Время работы контроллера id:{self.id}: {self.uptime}')
+        self.temperature = status.temperature
+        _LOGGER.debug(f'Температура платы контролера '
+                      f'id:{self.id}: {self.temperature}')
+
     async def update_data(self):
         """Обновление всех данных контроллера."""
         if self.is_flashing:
             _LOGGER.debug(f'Контроллер {self.config.plc.ip_megad} в процессе '
                           f'обновления ПО. Обновление данных невозможно.')
             return
-        await self.update_ports()
-        await self.update_current_time()
-        await asyncio.sleep(TIME_SLEEP_REQUEST)
-        page_cf0 = await async_get_page_config(
-            START_CONFIG, self.url, self.session
+        await self.update_ports(
+            i2c=self._is_due(self.cadence.i2c),
+            thermostats=self._is_due(self.cadence.thermostats)
         )
-        self.software = get_version_software(page_cf0)
-        _LOGGER.debug(f'Версия ПО контроллера id: {self.id}: {self.software}')
+        await self.update_current_time()
+        if self._software_outdated:
+            await self.update_software()
 
         await self.fw_checker.update_page_firmwares()
         await self.update_latest_software()
 
-        await asyncio.sleep(TIME_SLEEP_REQUEST)
-        page_cf1 = await async_get_page_config(
-            MAIN_CONFIG, self.url, self.session
-        )
-        self.uptime = get_uptime(page_cf1)
-        _LOGGER.debug(f'Время работы контроллера id:{self.id}: {self.uptime}')
-        self.temperature = get_temperature_megad(page_cf1)
-        _LOGGER.debug(f'Температура платы контролера '
-                      f'id:{self.id}: {self.temperature}')
-        if self.pids:
+        if self._is_due(self.cadence.status):
+            await self.update_status()
+        if self.pids and self._is_due(self.cadence.pids):
             await self.update_pids()
+        self._cycle += 1
 
     async def update_current_time(self):
         """Синхронизирует время контроллера с сервером раз в сутки"""
@@ -210,15 +255,18 @@ class MegaD:
         """Обновление данных ПИД регуляторов"""
         for pid in self.pids:
             params = {CONFIG: 11, PID: pid.conf.id}
-            page = await async_get_page(
-                params=params, url=self.url, session=self.session
-            )
-            if page != NOT_AVAILABLE:
-                params_pid = get_params_pid(page)
-                conf_pid = PIDConfig(**params_pid)
-                pid.update_state(conf_pid)
-                _LOGGER.debug(f'Обновлённые данные ПИД регулятора '
-                              f'{pid.conf.id}: {conf_pid.model_dump()}')
+            try:
+                page = await self.get_page(params)
+            except ClientResponseError as e:
+                _LOGGER.warning(f'Не удалось получить данные ПИД регулятора '
+                                f'{pid.conf.id} MegaD-{self.id}. '
+                                f'Статус: {e.status}')
+                continue
+            params_pid = get_params_pid(page)
+            conf_pid = PIDConfig(**params_pid)
+            pid.update_state(conf_pid)
+            _LOGGER.debug(f'Обновлённые данные ПИД регулятора '
+                          f'{pid.conf.id}: {conf_pid.model_dump()}')
 
     @staticmethod
     def check_port_is_thermostat(port) -> bool:
@@ -231,72 +279,127 @@ class MegaD:
                 return True
         return False
 
-    async def update_ports(self):
-        """Обновление данных настроенных портов"""
-        status_ports_raw = await self.get_status_ports()
-        status_ports = status_ports_raw.split(';')
-        for port in self.ports:
-            state = status_ports[port.conf.id]
-            if self.check_port_is_thermostat(port):
-                await asyncio.sleep(TIME_SLEEP_REQUEST)
-                page = await async_get_page_port(
-                    port.conf.id, self.url, self.session
-                )
-                status = get_status_thermostat(page)
-                set_temperature = get_set_temp_thermostat(page)
-                port.update_state({STATUS_THERMO: status})
-                port.conf.set_value = set_temperature
-                _LOGGER.debug(f'Состояние терморегулятора порта '
-                              f'№{port.conf.id}: статус - {status}, заданная'
-                              f'температура - {set_temperature}')
-            if state in (MCP_MODUL, PCA_MODUL):
-                await asyncio.sleep(TIME_SLEEP_REQUEST)
+    async def update_thermostat(self, port: OneWireSensorPort):
+        """Обновление состояния терморегулятора порта."""
+        page = await self.get_page({PORT: port.conf.id})
+        status = get_status_thermostat(page)
+        set_temperature = get_set_temp_thermostat(page)
+        port.update_state({STATUS_THERMO: status})
+        port.conf.set_value = set_temperature
+        _LOGGER.debug(f'Состояние терморегулятора порта '
+                      f'№{port.conf.id}: статус - {status}, заданная'
+                      f'температура - {set_temperature}')
+
+    def compile_poll_plan(self):
+        """Составляет план опроса портов."""
+        self.poll_plan = [
+            compile_poll_step(port, self.check_port_is_thermostat(port))
+            for port in self.ports
+        ]
+        _LOGGER.debug(f'План опроса MegaD-{self.id}: запросов за цикл не '
+                      f'более {self.count_poll_requests()}')
+
+    def count_poll_requests(self, steps: list[PollStep] | None = None) -> int:
+        """
+        Максимальное количество запросов к контроллеру за цикл опроса по
+        шагам steps, по умолчанию по всему плану.
+        """
+        if steps is None:
+            steps = self.poll_plan
+        need_states = any(step.strategy.need_states for step in steps)
+        return int(need_states) + sum(step.requests for step in steps)
+
+    async def _execute_poll_step(
+            self, step: PollStep, state: str, i2c: bool, thermostats: bool):
+        """Выполняет шаг плана опроса порта."""
+        port = step.port
+        if thermostats and step.thermostat:
+            await self.update_thermostat(port)
+        match step.strategy:
+            case StrategyPollMegaD.EXTRA if state in (MCP_MODUL, PCA_MODUL):
                 state = await self.get_status(
                     {PORT: port.conf.id, COMMAND: GET_STATUS}
                 )
                 port.update_state(state)
-            elif isinstance(port, OneWirePortOut):
-                await asyncio.sleep(TIME_SLEEP_REQUEST)
-                state = await self.get_status_one_wire_bus(port)
+            case StrategyPollMegaD.ONE_WIRE_BUS:
+                port.update_state(await self.get_status_one_wire_bus(port))
+            case _ if state:
                 port.update_state(state)
-            elif state:
-                port.update_state(state)
-            elif isinstance(port, OneWireBusSensorPort):
-                await asyncio.sleep(TIME_SLEEP_REQUEST)
-                state = await self.get_status_one_wire_bus(port)
-                port.update_state(state)
-            elif isinstance(port, I2CDisplayPort):
-                continue
-            elif hasattr(port, 'prefix'):
-                if not port.prefix:
-                    continue
-                name_sensor = port.prefix.split('_')[1].lower()
-                if isinstance(port, (I2CSensorHTUxxD, I2CSensorSTH31)):
-                    state = await self.get_status_htu(port, name_sensor)
-                elif isinstance(port, (
-                        I2CSensorBH1750,
-                        I2CSensorMAX44009,
-                        I2CSensorTSL2591,
-                        I2CSensorOPT3001)):
-                    state = await self.get_status_lux(port, name_sensor)
-                elif isinstance(port, I2CSensorMBx280):
-                    state = await self.get_status_bmx280(port, name_sensor)
-                elif isinstance(port, I2CSensorSCD4x):
-                    state = await self.get_status_scd4x(port, name_sensor)
-                elif isinstance(port, I2CSensorINA226):
-                    state = await self.get_status_ina226(port, name_sensor)
-                elif isinstance(port, I2CSensorT67xx):
-                    state = await self.get_status_t67xx(port, name_sensor)
-                elif isinstance(port, I2CSensorBMP180):
-                    state = await self.get_status_bmp180(port, name_sensor)
-                elif isinstance(port, I2CSensorPT):
-                    state = await self.get_status_pt(port, name_sensor)
-
-                _LOGGER.debug(
-                    f'State {port.conf.id}{port.prefix}: {state}'
-                )
+            case StrategyPollMegaD.STATE_OR_BUS:
+                port.update_state(await self.get_status_one_wire_bus(port))
+            case StrategyPollMegaD.STATE_OR_I2C if i2c:
+                values = [
+                    await self.get_status_i2c(port, step.i2c_device, param)
+                    for param in step.i2c_params
+                ]
+                state = step.parser(values)
+                _LOGGER.debug(f'State {port.conf.id}{port.prefix}: {state}')
                 port.update_state(state)
 
+    def mark_port_push(self, port_id, ext=False):
+        """Запоминает время последнего сообщения порта на сервер."""
+        now = time.monotonic()
+        self._last_push[int(port_id)] = now
+        if ext:
+            port_ext = self.get_port_interrupt(int(port_id))
+            if port_ext is not None:
+                self._last_push[port_ext.conf.id] = now
+
+    def _is_push_fresh(self, port_id: int, now: float) -> bool:
+        """Порт недавно сам сообщал о своём состоянии."""
+        last_push = self._last_push.get(port_id)
+        return last_push is not None and now - last_push < TIME_PUSH_STALE
+
+    def get_poll_steps(self) -> list[PollStep]:
+        """
+        Шаги плана опроса для текущего цикла.
+
+        В режиме push-first порты, недавно приславшие своё состояние,
+        опрашиваются только во время контрольного цикла. Запрос состояний
+        всех портов пропускается, только если свежие данные есть у всех
+        портов, которые он покрывает. Реле, АЦП и другие порты без
+        сообщений на сервер требуют его каждый цикл, тогда экономятся
+        только отдельные запросы 1 wire, I2C и термостатов свежих портов,
+        а состояния свежих портов берутся из общего ответа.
+        """
+        if not self.push_first or self._is_due(self.cadence.sweep):
+            return self.poll_plan
+        now = time.monotonic()
+        fresh = {
+            step.port.conf.id for step in self.poll_plan
+            if self._is_push_fresh(step.port.conf.id, now)
+        }
+        need_states = any(
+            step.strategy.need_states for step in self.poll_plan
+            if step.port.conf.id not in fresh
+        )
+        return [
+            step for step in self.poll_plan
+            if step.port.conf.id not in fresh
+            or need_states and step.strategy == StrategyPollMegaD.STATE
+            and not step.thermostat
+        ]
+
+    async def update_ports(self, i2c=True, thermostats=True):
+        """Обновление данных настроенных портов по плану опроса"""
+        steps = self.get_poll_steps()
+        status_ports = []
+        if any(step.strategy.need_states for step in steps):
+            status_ports_raw = await self.get_status_ports()
+            status_ports = status_ports_raw.split(';')
+        elif len(steps) < len(self.poll_plan):
+            _LOGGER.debug(f'MegaD-{self.id}: состояния портов получены от '
+                          f'контроллера, опрос всех портов пропущен.')
+        if len(steps) < len(self.poll_plan):
+            _LOGGER.debug(f'MegaD-{self.id}: запросов в цикле не более '
+                          f'{self.count_poll_requests(steps)} из '
+                          f'{self.count_poll_requests()}')
+        for step in steps:
+            port_id = step.port.conf.id
+            state = status_ports[port_id] if port_id < len(
+                status_ports) else ''
+            await self._execute_poll_step(step, state, i2c, thermostats)
+
     async def get_status_one_wire_bus(self,
             port: OneWireBusSensorPort | OneWirePortOut) -> str:
         """Обновление шины сенсоров порта 1 wire"""
@@ -315,52 +418,12 @@ class MegaD:
                 I2C_DEVICE: name_sensor,
                 I2C_PARAMETER: i2c_parameter
             }
-            await asyncio.sleep(TIME_SLEEP_REQUEST)
             return await self.get_status(params)
         except Exception as e:
             _LOGGER.warning(f'Не удалось получить состояние сенсора '
                             f'{name_sensor} для порта №{port.conf.id}. '
                             f'Ошибка: {e}')
 
-    async def get_status_bmx280(
-            self, port: I2CSensorMBx280, name_sensor: str
-    ):
-        """Получаем состояние сенсоров bmx280 в виде temp/press/hum."""
-        return await self.get_status_i2c(port, name_sensor, 3)
-
-    async def get_status_htu(
-            self, port: I2CSensorHTUxxD | I2CSensorSTH31, name_sensor: str
-    ):
-        """Получаем состояние сенсоров типа HTUxxx в виде temp/hum."""
-        temperature = await self.get_status_i2c(port, name_sensor, 1)
-        humidity = await self.get_status_i2c(port, name_sensor)
-        return f'{temperature}/{humidity}'
-
-    async def get_status_lux(self, port: I2CSensorILLUM, name_sensor: str):
-        """Получаем состояние сенсоров освещённости."""
-        return await self.get_status_i2c(port, name_sensor)
-
-    async def get_status_scd4x(self, port: I2CSensorSCD4x, name_sensor: str):
-        """Обновление сенсора СО2 типа SCD4x"""
-        return await self.get_status_i2c(port, name_sensor)
-
-    async def get_status_ina226(self, port: I2CSensorINA226, name_sensor: str):
-        """Обновление сенсора тока типа INA226"""
-        return await self.get_status_i2c(port, name_sensor)
-
-    async def get_status_t67xx(self, port: I2CSensorT67xx, name_sensor: str):
-        """Обновление сенсора тока типа T67xx"""
-        return await self.get_status_i2c(port, name_sensor)
-
-    async def get_status_bmp180(self, port: I2CSensorBMP180, name_sensor: str):
-        """Обновление сенсора тока типа BMP180"""
-        return await self.get_status_i2c(port, name_sensor, 2)
-
-    async def get_status_pt(self, port: I2CSensorPT, name_sensor: str):
-        """Обновление сенсора тока типа PTsensor"""
-        await self.get_status_i2c(port, name_sensor, 1)
-        return await self.get_status_i2c(port, name_sensor, 2)
-
     def init_ports(self):
         """Инициализация портов. Разделение их на устройства."""
         for port in self.config.ports:
@@ -461,6 +524,8 @@ class MegaD:
                 self.ports.append(AnalogSensor(port, self.id))
 
         _LOGGER.debug(f'Инициализированные порты: {self.ports}')
+        self.index_ports()
+        self.compile_poll_plan()
         if self.config_ports_bus_i2c:
             _LOGGER.debug(
                 f'Порты с шиной сенсоров I2C: {self.config_ports_bus_i2c}'
@@ -543,61 +608,81 @@ class MegaD:
                         _LOGGER.info(f'Интеграция пока не поддерживает в шине '
                                      f'I2C устройство: {sensor_name}. '
                                      f'Обратитесь к разработчику.')
+        self.index_ports()
+        self.compile_poll_plan()
+
+    def index_ports(self):
+        """
+        Перестраивает индексы портов по id и портов прерываний расширителей.
+        При совпадении id (сенсоры шины I2C) в индексе остаётся первый порт,
+        как и при поиске перебором списка.
+        """
+        self._ports_by_id = {}
+        self._interrupt_ports = {}
+        for port in self.ports:
+            self._ports_by_id.setdefault(port.conf.id, port)
+            if isinstance(port, I2CExtraMCP230xx):
+                if port.conf.interrupt is not None:
+                    self._interrupt_ports.setdefault(
+                        port.conf.interrupt, port
+                    )
 
     def init_pids(self, ):
         """Инициализация ПИД регуляторов."""
         for pid in self.config.pids:
             if pid.output != PID_OFF and pid.sensor_id is not None:
                 self.pids.append(PIDControl(pid, self.id))
+        self._pids_by_id = {pid.conf.id: pid for pid in reversed(self.pids)}
         _LOGGER.debug(f'Инициализированные ПИД регуляторы: {self.pids}')
 
-    def update_port(self, port_id, data):
-        """Обновить данные порта по его id"""
+    def update_port(self, port_id, data) -> bool:
+        """Обновить данные порта по его id. Возвращает признак изменения."""
         port = self.get_port(port_id)
         if port:
-            old_state = port.state
+            old_state = deepcopy(port.state)
+            old_count = getattr(port, 'count', None)
             port.update_state(data)
             new_state = port.state
-            self._check_change_port(port, old_state, new_state)
+            changed = self._check_change_port(port, old_state, new_state)
+            return changed or old_count != getattr(port, 'count', None)
+        return False
 
-    def update_pid(self, pid_id, data):
-        """Обновить данные ПИД регулятора по его id."""
+    def update_pid(self, pid_id, data) -> bool:
+        """
+        Обновить данные ПИД регулятора по его id. Возвращает признак
+        изменения.
+        """
         pid = self.get_pid(pid_id)
         if pid:
+            old_state = deepcopy(pid.state)
             pid.update_state(data)
+            return old_state != pid.state
+        return False
 
     def get_port_interrupt(self, port_id: int):
         """Проверяет, является ли порт прерыванием для расширителя портов."""
-        for port in self.ports:
-            if isinstance(port, I2CExtraMCP230xx):
-                if port.conf.interrupt == port_id:
-                    return port
+        return self._interrupt_ports.get(port_id)
 
     def get_port(self, port_id, ext=False):
         """Получить порт по его id."""
+        port_id = int(port_id)
         if ext:
-            port_ext = self.get_port_interrupt(int(port_id))
+            port_ext = self._interrupt_ports.get(port_id)
             if port_ext is not None:
                 return port_ext
-        return next(
-            (port for port in self.ports
-             if port.conf.id == int(port_id)),
-            None
-        )
+        return self._ports_by_id.get(port_id)
 
     def get_pid(self, pid_id):
         """Получить ПИД по его id."""
-        return next(
-            (pid for pid in self.pids
-             if pid.conf.id == int(pid_id)),
-            None
-        )
+        return self._pids_by_id.get(int(pid_id))
 
     async def set_pid(self, pid_id: int, commands: dict):
         """Установка новых параметров ПИД регулятора."""
         params = {CONFIG: 11, PID_E: 2, PID: pid_id}
         params.update(commands)
-        response = await self.request_to_megad(params)
+        response = await self.request_to_megad(
+            params, RequestPriority.COMMAND
+        )
         text = await response.text(encoding='windows-1251')
         match text:
             case 'busy':
@@ -637,7 +722,9 @@ class MegaD:
     async def set_temperature(self, port_id, temperature):
         """Установка заданной температуры терморегулятора."""
         params = {PORT: port_id, SET_TEMPERATURE: temperature}
-        response = await self.request_to_megad(params)
+        response = await self.request_to_megad(
+            params, RequestPriority.COMMAND
+        )
         text = await response.text()
         match text:
             case 'busy':
@@ -648,11 +735,19 @@ class MegaD:
                 _LOGGER.debug(f'Заданная температура порта №{port_id} '
                               f'изменена на {temperature}')
 
+    async def _send_command(self, command: str) -> str:
+        """Отправка объединённой команды портов, возвращает ответ."""
+        response = await self.request_to_megad(
+            {COMMAND: command}, RequestPriority.COMMAND
+        )
+        return await response.text()
+
     async def set_port(self, port_id, command):
-        """Управление выходом релейным и шим."""
-        params = {COMMAND: f'{port_id}:{command}'}
-        response = await self.request_to_megad(params)
-        text = await response.text()
+        """
+        Управление выходом релейным и шим. Команды, поданные почти
+        одновременно, отправляются контроллеру одним запросом.
+        """
+        text = await self.coalescer.submit(f'{port_id}:{command}')
         match text:
             case 'busy':
                 _LOGGER.warning(f'Не удалось изменить состояние порта или '
@@ -673,7 +768,9 @@ class MegaD:
                 COMMAND: f'{port_id}{line}:{command}',
                 ADDRESS: module_id
             }
-        response = await self.request_to_megad(params)
+        response = await self.request_to_megad(
+            params, RequestPriority.COMMAND
+        )
         text = await response.text()
         match text:
             case 'busy':
@@ -692,7 +789,9 @@ class MegaD:
             params = {PORT: port_id, WS: color, CHIP: chip}
         else:
             params = {PORT: port_id, WS: color}
-        response = await self.request_to_megad(params)
+        response = await self.request_to_megad(
+            params, RequestPriority.COMMAND
+        )
         text = await response.text()
         match text:
             case 'busy':
@@ -713,4 +812,4 @@ class MegaD:
     async def send_command(self, action) -> None:
         """Отправка команды на контроллер."""
         params = {COMMAND: action}
-        await self.get_status(params)
+        await self.get_status(params, RequestPriority.COMMAND)
@@ -1,4 +1,7 @@
+from enum import Enum
 from ipaddress import IPv4Address
+from types import NoneType, UnionType
+from typing import Union, get_args, get_origin
 from urllib.parse import unquote
 
 from pydantic import BaseModel, Field, field_validator, model_validator
@@ -666,3 +669,76 @@ class LatestVersionMegaD(BaseModel):
     short_descr: str | None = None
     link: str | None = None
     local: bool = False
+
+
+def _restore_value(annotation, value):
+    """Значение поля из JSON в тип аннотации поля без валидации."""
+    if value is None:
+        return None
+    if get_origin(annotation) in (Union, UnionType):
+        types = [tp for tp in get_args(annotation) if tp is not NoneType]
+    else:
+        types = [annotation]
+    for tp in types:
+        if not isinstance(tp, type):
+            continue
+        if issubclass(tp, Enum):
+            try:
+                return tp(value)
+            except ValueError:
+                continue
+        if tp is IPv4Address:
+            return IPv4Address(value)
+        if tp is float and isinstance(value, int):
+            return float(value)
+        if issubclass(tp, BaseModel):
+            return construct_model(tp, value)
+    return value
+
+
+def construct_model(cls: type[BaseModel], data: dict) -> BaseModel:
+    """
+    Модель из сохранённого model_dump(mode='json') без повторной
+    валидации: значения только приводятся к типам полей.
+    """
+    return cls.model_construct(**{
+        name: _restore_value(field.annotation, data[name])
+        for name, field in cls.model_fields.items() if name in data
+    })
+
+
+def _dump_model(model: BaseModel) -> dict:
+    """Модель с именем её класса для восстановления из JSON."""
+    return {'model': type(model).__name__,
+            'fields': model.model_dump(mode='json')}
+
+
+def dump_device_config(config: DeviceMegaD) -> dict:
+    """Конфигурация контроллера в виде, пригодном для JSON."""
+    return {
+        'plc': config.plc.model_dump(mode='json'),
+        'pids': [pid.model_dump(mode='json') for pid in config.pids],
+        'ports': [_dump_model(port) for port in config.ports],
+        'extra_ports': [_dump_model(port) for port in config.extra_ports],
+    }
+
+
+def construct_device_config(data: dict) -> DeviceMegaD:
+    """Конфигурация контроллера из dump_device_config без валидации."""
+    models = {
+        name: model for name, model in globals().items()
+        if isinstance(model, type) and issubclass(model, BaseModel)
+    }
+
+    def construct_list(items: list[dict]) -> list:
+        return [
+            construct_model(models[item['model']], item['fields'])
+            for item in items
+        ]
+
+    return DeviceMegaD.model_construct(
+        plc=construct_model(SystemConfigMegaD, data['plc']),
+        pids=[construct_model(PIDConfig, pid) for pid in data['pids']],
+        ports=construct_list(data['ports']),
+        extra_ports=construct_list(data['extra_ports']),
+    )
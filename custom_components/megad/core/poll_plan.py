@@ -0,0 +1,101 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Callable
+
+from .base_ports import (
+    BasePort, I2CSensorHTUxxD, I2CSensorSTH31, I2CSensorBH1750,
+    I2CSensorMAX44009, I2CSensorTSL2591, I2CSensorOPT3001, I2CSensorMBx280,
+    I2CSensorSCD4x, I2CSensorINA226, I2CSensorT67xx, I2CSensorBMP180,
+    I2CSensorPT, I2CExtraMCP230xx, I2CExtraPCA9685, OneWirePortOut,
+    OneWireBusSensorPort, I2CDisplayPort
+)
+from .enums import StrategyPollMegaD
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def join_values(values: list[str]) -> str:
+    """Объединяет ответы нескольких запросов в вид temp/hum."""
+    return '/'.join(str(value) for value in values)
+
+
+def last_value(values: list[str]) -> str:
+    """Возвращает ответ последнего запроса."""
+    return values[-1]
+
+
+I2C_POLL_PARAMS: dict[type, tuple[tuple[int, ...], Callable]] = {
+    I2CSensorHTUxxD: ((1, 0), join_values),
+    I2CSensorSTH31: ((1, 0), join_values),
+    I2CSensorBH1750: ((0, ), last_value),
+    I2CSensorMAX44009: ((0, ), last_value),
+    I2CSensorTSL2591: ((0, ), last_value),
+    I2CSensorOPT3001: ((0, ), last_value),
+    I2CSensorMBx280: ((3, ), last_value),
+    I2CSensorSCD4x: ((0, ), last_value),
+    I2CSensorINA226: ((0, ), last_value),
+    I2CSensorT67xx: ((0, ), last_value),
+    I2CSensorBMP180: ((2, ), last_value),
+    I2CSensorPT: ((1, 2), last_value),
+}
+
+
+@dataclass
+class PollStep:
+    """Шаг опроса порта в цикле обновления."""
+
+    port: BasePort
+    strategy: StrategyPollMegaD
+    thermostat: bool = False
+    i2c_device: str | None = None
+    i2c_params: tuple[int, ...] = field(default_factory=tuple)
+    parser: Callable[[list[str]], str] | None = None
+
+    @property
+    def requests(self) -> int:
+        """Максимальное количество запросов шага за цикл."""
+        count = int(self.thermostat)
+        match self.strategy:
+            case (StrategyPollMegaD.EXTRA | StrategyPollMegaD.ONE_WIRE_BUS
+                  | StrategyPollMegaD.STATE_OR_BUS):
+                count += 1
+            case StrategyPollMegaD.STATE_OR_I2C:
+                count += len(self.i2c_params)
+        return count
+
+    def describe(self) -> dict:
+        """Описание шага для диагностики."""
+        return {
+            'port': self.port.conf.id,
+            'name': self.port.conf.name,
+            'type': type(self.port).__name__,
+            'strategy': self.strategy.value,
+            'thermostat': self.thermostat,
+            'i2c_device': self.i2c_device,
+            'i2c_params': list(self.i2c_params),
+            'requests': self.requests,
+        }
+
+
+def compile_poll_step(port: BasePort, thermostat: bool) -> PollStep:
+    """Определяет способ опроса порта."""
+    if isinstance(port, (I2CExtraMCP230xx, I2CExtraPCA9685)):
+        return PollStep(port, StrategyPollMegaD.EXTRA, thermostat)
+    if isinstance(port, OneWirePortOut):
+        return PollStep(port, StrategyPollMegaD.ONE_WIRE_BUS, thermostat)
+    if isinstance(port, OneWireBusSensorPort):
+        return PollStep(port, StrategyPollMegaD.STATE_OR_BUS, thermostat)
+    if isinstance(port, I2CDisplayPort):
+        return PollStep(port, StrategyPollMegaD.SKIP, thermostat)
+    i2c_poll = I2C_POLL_PARAMS.get(type(port))
+    if i2c_poll is not None and getattr(port, 'prefix', ''):
+        i2c_params, parser = i2c_poll
+        return PollStep(
+            port=port,
+            strategy=StrategyPollMegaD.STATE_OR_I2C,
+            thermostat=thermostat,
+            i2c_device=port.prefix.split('_')[1].lower(),
+            i2c_params=i2c_params,
+            parser=parser
+        )
+    return PollStep(port, StrategyPollMegaD.STATE, thermostat)
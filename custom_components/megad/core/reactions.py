@@ -0,0 +1,97 @@
+import logging
+import re
+
+from .exceptions import InvalidReactionRule
+from ..const import CLICK, MODE, STATE_BUTTON
+
+_LOGGER = logging.getLogger(__name__)
+
+EVENT_PRESS = 'press'
+EVENT_RELEASE = 'release'
+REACTION_EVENTS = (
+    EVENT_PRESS, EVENT_RELEASE,
+    STATE_BUTTON.SINGLE, STATE_BUTTON.DOUBLE, STATE_BUTTON.LONG
+)
+
+_RE_RULE = re.compile(r'^(\d+)\.([a-z]+)=(.+)$')
+_RE_ACTION = re.compile(r'^(?:(\d+):(\d+)|g\d+:[0-2]|p\d+)$')
+
+
+def get_callback_event(params: dict) -> str:
+    """
+    Событие порта из параметров запроса контроллера:
+    {'pt': '3', 'click': '1'} - single, {'pt': '3', 'm': '2'} - long.
+    """
+    match params.get(CLICK):
+        case '1':
+            return STATE_BUTTON.SINGLE
+        case '2':
+            return STATE_BUTTON.DOUBLE
+    match params.get(MODE):
+        case '1':
+            return EVENT_RELEASE
+        case '2':
+            return STATE_BUTTON.LONG
+    return EVENT_PRESS
+
+
+def parse_reactions(rules: str) -> dict[tuple[int, str], str]:
+    """
+    Разбирает правила реакций вида "3.single=7:2;8:2, 5.long=9:0".
+    Возвращает команды по ключу (порт, событие).
+    """
+    reactions = {}
+    for rule in re.split(r'[,\s]+', rules.strip()):
+        if not rule:
+            continue
+        match = _RE_RULE.match(rule.lower())
+        if match is None:
+            raise InvalidReactionRule(f'Неверный формат правила: {rule}')
+        port_id, event, command = match.groups()
+        if event not in REACTION_EVENTS:
+            raise InvalidReactionRule(f'Неизвестное событие {event} в '
+                                      f'правиле: {rule}')
+        if not all(_RE_ACTION.match(action) for action in command.split(';')):
+            raise InvalidReactionRule(f'Неверная команда в правиле: {rule}')
+        reactions[(int(port_id), event)] = command
+    return reactions
+
+
+class ReactionEngine:
+    """
+    Локальные реакции на события портов. Команда реакции возвращается
+    контроллеру в ответе на его запрос и выполняется им без отдельного
+    запроса от НА.
+    """
+
+    def __init__(self, rules: str = ''):
+        self.reactions = parse_reactions(rules)
+
+    def __bool__(self) -> bool:
+        return bool(self.reactions)
+
+    def match(self, port_id: int | str, params: dict) -> str | None:
+        """Команда для события порта или None."""
+        if not self.reactions:
+            return None
+        try:
+            key = (int(port_id), get_callback_event(params))
+        except ValueError:
+            return None
+        return self.reactions.get(key)
+
+    @staticmethod
+    def get_port_states(command: str) -> dict[int, int]:
+        """
+        Состояния портов, которые установит команда: порт и значение
+        0, 1 или 2 (переключение). Группы и паузы не учитываются, после
+        паузы состояние портов не предсказуемо.
+        """
+        states = {}
+        for action in command.split(';'):
+            match = _RE_ACTION.match(action)
+            if match is None or action.startswith('p'):
+                break
+            if match.group(1) is not None:
+                states[int(match.group(1))] = int(match.group(2))
+        return states
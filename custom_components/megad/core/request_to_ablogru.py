@@ -1,13 +1,20 @@
+import hashlib
 import logging
 import random
-from datetime import datetime, timedelta
+from bisect import bisect_right
+from datetime import datetime
 from http import HTTPStatus
 
 import async_timeout
 
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.storage import Store
+from .config_parser import parse_release_page, select_latest_version
 from .const_fw import BROWSER_UA
-from ..const import RELEASE_URL, DOMAIN, ENTRIES, TIME_OUT_UPDATE_DATA
+from ..const import (
+    RELEASE_URL, DOMAIN, ENTRIES, TIME_OUT_UPDATE_DATA, TIME_CHECK_FIRMWARE,
+    STORAGE_VERSION, STORAGE_KEY_FIRMWARE
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -22,6 +29,13 @@ class FirmwareChecker:
         self.page_firmware = None
         self._last_check = None
         self._user_agent = random.choice(BROWSER_UA)
+        self._page_hash: str | None = None
+        self._versions: list[dict] = []
+        self._version_names: list[str] = []
+        self._latest_cache: dict[tuple[str, str | None], dict] = {}
+        self._etag: str | None = None
+        self._last_modified: str | None = None
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY_FIRMWARE)
 
     def _get_headers(self) -> dict:
         """Формирует заголовки."""
@@ -35,34 +49,121 @@ class FirmwareChecker:
         }
         return headers
 
+    async def async_load(self):
+        """
+        Загружает сохранённую страницу прошивок и разобранный список
+        версий, чтобы после перезапуска НА не обращаться к сайту.
+        """
+        data = await self._store.async_load()
+        if not data:
+            return
+        self.page_firmware = data.get('page')
+        self._etag = data.get('etag')
+        self._last_modified = data.get('last_modified')
+        if data.get('last_check'):
+            self._last_check = datetime.fromisoformat(data['last_check'])
+        self._set_versions(data.get('versions', []), data.get('page_hash'))
+        _LOGGER.debug(f'Загружена сохранённая страница прошивок. '
+                      f'Время проверки: {self._last_check}')
+
+    async def _async_save(self):
+        """Сохраняет страницу прошивок и список версий на диск."""
+        await self._store.async_save({
+            'page': self.page_firmware,
+            'page_hash': self._page_hash,
+            'etag': self._etag,
+            'last_modified': self._last_modified,
+            'last_check': (self._last_check.isoformat()
+                           if self._last_check else None),
+            'versions': self._versions,
+        })
+
+    def _get_conditional_headers(self) -> dict:
+        """Заголовки условного запроса страницы прошивок."""
+        headers = self._get_headers()
+        if self.page_firmware:
+            if self._etag:
+                headers['If-None-Match'] = self._etag
+            if self._last_modified:
+                headers['If-Modified-Since'] = self._last_modified
+        return headers
+
     async def update_page_firmwares(self):
         """Обновить страницу с доступными прошивками."""
+        if (self._last_check is not None
+                and datetime.now() - self._last_check < TIME_CHECK_FIRMWARE):
+            return
+        _LOGGER.debug('Обновлено время последней проверки прошивки.')
+        self._last_check = datetime.now()
         try:
-            if self._last_check is None:
-                self._last_check = datetime.now()
-                _LOGGER.debug('Обновлено время последней проверки прошивки.')
-            elif datetime.now() - self._last_check < timedelta(hours=12):
-                return
-            else:
-                _LOGGER.debug('Обновлено время последней проверки прошивки.')
-                self._last_check = datetime.now()
-            async with self.session.get(
-                    url=RELEASE_URL, headers=self._get_headers()
-            ) as resp:
-                await resp.text()
             async with async_timeout.timeout(TIME_OUT_UPDATE_DATA):
                 _LOGGER.debug(f'Запрос страницы прошивки для MegaD url: '
                               f'{RELEASE_URL}')
-                response = await self.session.get(
-                    url=RELEASE_URL, headers=self._get_headers()
-                )
-                if response.status == HTTPStatus.OK:
-                    self.page_firmware = await response.text()
-                    if not self.page_firmware:
-                        _LOGGER.warning(f'Страница запроса прошивки пустая. '
-                                        f'Последняя версия не установлена.')
-                else:
-                    raise Exception(f'Статус запроса: {response.status}')
+                async with self.session.get(
+                        url=RELEASE_URL,
+                        headers=self._get_conditional_headers()
+                ) as response:
+                    if response.status == HTTPStatus.NOT_MODIFIED:
+                        _LOGGER.debug('Страница прошивок не изменилась.')
+                    elif response.status == HTTPStatus.OK:
+                        self.page_firmware = await response.text()
+                        self._etag = response.headers.get('ETag')
+                        self._last_modified = response.headers.get(
+                            'Last-Modified'
+                        )
+                        if not self.page_firmware:
+                            _LOGGER.warning(
+                                f'Страница запроса прошивки пустая. '
+                                f'Последняя версия не установлена.'
+                            )
+                    else:
+                        raise Exception(f'Статус запроса: {response.status}')
+            await self._update_versions()
+            await self._async_save()
         except Exception as e:
             _LOGGER.warning(f'Неудачная попытка проверки последней доступной '
                             f'версии прошивки. Ошибка: {e}')
+
+    async def _update_versions(self):
+        """Разбирает страницу прошивок, только если она изменилась."""
+        if not self.page_firmware:
+            return
+        page_hash = hashlib.sha256(self.page_firmware.encode()).hexdigest()
+        if page_hash == self._page_hash:
+            return
+        versions = await self.hass.async_add_executor_job(
+            parse_release_page, self.page_firmware
+        )
+        self._set_versions(versions, page_hash)
+        _LOGGER.debug(f'Разобрана страница прошивок. '
+                      f'Всего версий: {len(versions)}')
+
+    def _set_versions(self, versions: list[dict], page_hash: str | None):
+        """Устанавливает отсортированный список версий и сбрасывает кэш."""
+        self._versions = versions
+        self._version_names = [
+            version['name'] for version in reversed(versions)
+        ]
+        self._latest_cache.clear()
+        self._page_hash = page_hash
+
+    def get_latest_version(self, current_version: str | None) -> dict | None:
+        """
+        Последняя версия ПО для контроллера с текущей версией
+        current_version. Результат запоминается для версии страницы.
+        """
+        if not self._versions:
+            return None
+        key = (self._page_hash, current_version)
+        latest = self._latest_cache.get(key)
+        if latest is None:
+            count_passed = None
+            if current_version is not None:
+                count_passed = len(self._version_names) - bisect_right(
+                    self._version_names, current_version
+                )
+            latest = select_latest_version(
+                self._versions, current_version, count_passed
+            )
+            self._latest_cache[key] = latest
+        return latest
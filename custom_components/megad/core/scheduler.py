@@ -0,0 +1,154 @@
+import asyncio
+import heapq
+import itertools
+import logging
+
+import aiohttp
+import async_timeout
+from aiohttp import ClientResponse
+
+from .enums import RequestPriority
+from ..const import (
+    TIME_OUT_UPDATE_DATA, PLC_BUSY, TIME_PACE_MIN, TIME_PACE_MAX,
+    PACE_LATENCY_FACTOR, PACE_SMOOTHING
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class MegaDRequestScheduler:
+    """
+    Планировщик запросов к одному контроллеру.
+
+    Сериализует все запросы к MegaD (у контроллера один сокет HTTP) и
+    выдерживает паузу между ними. Пауза рассчитывается по измеренному
+    времени ответа контроллера и доле ответов busy. Ожидающие запросы
+    обслуживаются по приоритету: команды пользователя раньше опроса, опрос
+    раньше чтения и записи конфигурации.
+    """
+
+    def __init__(self, megad_id: str, session: aiohttp.ClientSession):
+        self.megad_id = megad_id
+        self.session = session
+        self._active: bool = False
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._order = itertools.count()
+        self._latency: float | None = None
+        self._busy_rate: float = 0.0
+        self._last_request: float = 0.0
+        self.count_requests: int = 0
+        self.count_busy: int = 0
+
+    def __repr__(self):
+        return (f'<MegaDRequestScheduler(megad_id={self.megad_id}, '
+                f'latency={self.latency}, busy_rate={self.busy_rate}, '
+                f'interval={self.interval})>')
+
+    @property
+    def latency(self) -> float:
+        """Сглаженное время ответа контроллера, с."""
+        return round(self._latency or 0.0, 4)
+
+    @property
+    def busy_rate(self) -> float:
+        """Сглаженная доля ответов busy."""
+        return round(self._busy_rate, 4)
+
+    @property
+    def queued(self) -> dict[str, int]:
+        """Количество ожидающих запросов по приоритетам."""
+        queued = {priority.name: 0 for priority in RequestPriority}
+        for priority, _, waiter in self._waiters:
+            if not waiter.done():
+                queued[RequestPriority(priority).name] += 1
+        return queued
+
+    @property
+    def interval(self) -> float:
+        """Пауза между окончанием запроса и началом следующего, с."""
+        if self._latency is None:
+            return TIME_PACE_MAX
+        interval = (self._latency * PACE_LATENCY_FACTOR
+                    + self._busy_rate * TIME_PACE_MAX)
+        return min(max(interval, TIME_PACE_MIN), TIME_PACE_MAX)
+
+    def _register(self, elapsed: float, busy: bool):
+        """Обновляет статистику ответов контроллера."""
+        self.count_requests += 1
+        if busy:
+            self.count_busy += 1
+        if self._latency is None:
+            self._latency = elapsed
+        else:
+            self._latency += PACE_SMOOTHING * (elapsed - self._latency)
+        self._busy_rate += PACE_SMOOTHING * (int(busy) - self._busy_rate)
+
+    async def _wait_pace(self, loop: asyncio.AbstractEventLoop):
+        """Выдерживает паузу после предыдущего запроса."""
+        delay = self._last_request + self.interval - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _acquire(
+            self, loop: asyncio.AbstractEventLoop, priority: RequestPriority
+    ):
+        """Ожидает очереди запроса с учётом приоритета."""
+        if not self._active and not self._waiters:
+            self._active = True
+            return
+        waiter = loop.create_future()
+        heapq.heappush(
+            self._waiters, (priority, next(self._order), waiter)
+        )
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+
+    def _release(self):
+        """Передаёт очередь следующему запросу с высшим приоритетом."""
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active = False
+
+    async def request(
+            self, url: str, params: dict | str,
+            priority: RequestPriority = RequestPriority.POLLING
+    ) -> ClientResponse:
+        """
+        Отправляет запрос контроллеру в порядке очереди.
+
+        Тело ответа вычитывается сразу, поэтому response.text() у
+        вызывающего кода не обращается к сети.
+        """
+        loop = asyncio.get_running_loop()
+        await self._acquire(loop, priority)
+        try:
+            await self._wait_pace(loop)
+            start = loop.time()
+            try:
+                async with async_timeout.timeout(TIME_OUT_UPDATE_DATA):
+                    if isinstance(params, str):
+                        response = await self.session.get(
+                            url=f'{url}?{params}'
+                        )
+                    else:
+                        response = await self.session.get(
+                            url=url, params=params
+                        )
+                    body = await response.read()
+                busy = body.strip().lower() == PLC_BUSY.encode()
+                self._register(loop.time() - start, busy)
+                if busy:
+                    _LOGGER.debug(f'MegaD-{self.megad_id} ответил busy. '
+                                  f'Пауза между запросами: {self.interval}')
+            finally:
+                self._last_request = loop.time()
+        finally:
+            self._release()
+        return response
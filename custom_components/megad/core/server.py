@@ -6,7 +6,7 @@ from aiohttp.web_response import Response
 
 from homeassistant.components.http import HomeAssistantView
 from .const_parse import EXTRA
-from ..const import DOMAIN, ENTRIES, MEGAD_ID, MEGAD_STATE, PORT_ID
+from ..const import DOMAIN, HOSTS, MEGAD_IDS, MEGAD_ID, MEGAD_STATE, PORT_ID
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -24,6 +24,17 @@ class MegadHttpView(HomeAssistantView):
         await coordinator.restore_status_ports()
         await coordinator.megad.set_current_time()
 
+    @staticmethod
+    def get_coordinator(hass, host: str, id_megad: str | None):
+        """
+        Находит координатор контроллера по адресу, а если адрес не известен
+        (контроллер за NAT), то по mdid из запроса.
+        """
+        coordinator = hass.data[DOMAIN].get(HOSTS, {}).get(host)
+        if coordinator is None and id_megad is not None:
+            coordinator = hass.data[DOMAIN].get(MEGAD_IDS, {}).get(id_megad)
+        return coordinator
+
     async def get(self, request: Request):
         """Обрабатываем GET-запрос."""
         host = request.remote
@@ -34,22 +45,11 @@ class MegadHttpView(HomeAssistantView):
             _LOGGER.info(f'Интеграция загружается, запрос не обработан: '
                          f'{params}')
             return Response(status=HTTPStatus.NOT_FOUND)
-        entry_ids = hass.data[DOMAIN][ENTRIES]
         id_megad = params.get(MEGAD_ID)
         state_megad = params.get(MEGAD_STATE)
         ext = any(EXTRA in key for key in params)
         port_id = params.get(PORT_ID)
-        coordinator = None
-        for entry_id in entry_ids:
-            coordinator_temp = hass.data[DOMAIN][ENTRIES][entry_id]
-            try:
-                if coordinator_temp.megad.domain == host:
-                    coordinator = coordinator_temp
-            except AttributeError:
-                _LOGGER.warning(
-                    f'coordinator_temp type {type(coordinator_temp)}. '
-                    f'params: {params}'
-                )
+        coordinator = self.get_coordinator(hass, host, id_megad)
 
         if coordinator is None:
             _LOGGER.debug(f'Контроллер ip={host} не добавлен в НА')
@@ -64,10 +64,17 @@ class MegadHttpView(HomeAssistantView):
 
         if state_megad == '1':
             _LOGGER.info(f'megad-{id_megad} был перезагружен')
+            coordinator.megad.request_software_refresh()
             hass.async_create_task(self.restore_after_reboot(coordinator))
 
         if port_id is not None:
-            await coordinator.update_port_state(
-                port_id=port_id, data=params, ext=ext
+            coordinator.megad.mark_port_push(port_id, ext)
+            command = None if ext else coordinator.reactions.match(
+                port_id, params
             )
+            coordinator.queue_port_event(port_id=port_id, data=params, ext=ext)
+            if command:
+                _LOGGER.debug(f'Реакция на запрос {params}: {command}')
+                coordinator.apply_reaction(command)
+                return Response(status=HTTPStatus.OK, text=command)
         return Response(status=HTTPStatus.OK)
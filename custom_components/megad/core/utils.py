@@ -1,4 +1,5 @@
 import asyncio
+import hashlib
 import logging
 import os
 import re
@@ -11,13 +12,14 @@ import requests
 
 from .const_fw import (
     BROADCAST_PORT, RECV_PORT, BROADCAST_STRING, SEARCH_TIMEOUT,
-    DEFAULT_IP_LIST, FW_PATH, BROADCAST_REBOOT, CHECK_DATA, BROADCAST_CLEAR,
-    BLOCK_SIZE, BROADCAST_EEPROM, BROADCAST_EEPROM_CONFIRM, BROADCAST_CHANGE_IP
+    DEFAULT_IP_LIST, FW_PATH, CHECK_DATA, BROADCAST_CHANGE_IP
 )
+from .const_parse import CONFIG_CACHE_SUFFIX, CONFIG_HASH_SUFFIX
 from .exceptions import (
     SearchMegaDError, InvalidIpAddress, InvalidPasswordMegad,
     ChangeIPMegaDError, CreateSocketReceiveError, CreateSocketSendError
 )
+from ..const import DRIFT_CHECK_WINDOW
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -25,7 +27,11 @@ _LOGGER = logging.getLogger(__name__)
 async def get_list_config_megad(first_file='', path='') -> list:
     """Возвращает список сохранённых файлов конфигураций контроллера"""
     config_list = await asyncio.to_thread(os.listdir, path)
-    list_file = [file for file in config_list if file != ".gitkeep"]
+    list_file = [
+        file for file in config_list
+        if file != ".gitkeep"
+        and not file.endswith((CONFIG_CACHE_SUFFIX, CONFIG_HASH_SUFFIX))
+    ]
     list_file.sort()
     if first_file:
         if first_file in list_file:
@@ -46,6 +52,22 @@ def get_action_turnoff(actions: str) -> str:
     return ';'.join(new_actions)
 
 
+def get_pid_context(pid_id: int) -> str:
+    """Ключ подписки сущностей ПИД регулятора в координаторе."""
+    return f'pid{pid_id}'
+
+
+def get_drift_check_offset(key: str) -> tuple[int, int]:
+    """
+    Минута и секунда ночной проверки конфигурации. Смещение постоянно для
+    записи интеграции и разное у контроллеров, чтобы проверки всех
+    контроллеров не начинались одновременно.
+    """
+    digest = hashlib.sha256(key.encode()).digest()
+    offset = int.from_bytes(digest[:4], 'big') % DRIFT_CHECK_WINDOW
+    return divmod(offset, 60)
+
+
 def get_broadcast_ip(local_ip):
     """Преобразуем локальный IP-адрес в широковещательный."""
     return re.sub(r"(\d+)\.(\d+)\.(\d+)\.(\d+)", r"\1.\2.\3.255", local_ip)
@@ -107,7 +129,8 @@ def get_megad_ip(local_ip, broadcast_ip) -> list:
     return ip_megads if ip_megads else DEFAULT_IP_LIST
 
 
-def change_ip(old_ip, new_ip, password, broadcast_ip, host_ip):
+def get_change_ip_data(old_ip: str, new_ip: str, password: str) -> bytes:
+    """Данные запроса изменения IP-адреса: пароль, старый и новый адрес."""
     try:
         old_device_ip = list(map(int, old_ip.split(".")))
         new_device_ip = list(map(int, new_ip.split(".")))
@@ -122,6 +145,11 @@ def change_ip(old_ip, new_ip, password, broadcast_ip, host_ip):
     broadcast_string = broadcast_string.encode('latin1')
 
     _LOGGER.debug(f'Broadcast string (bytes): {list(broadcast_string)}')
+    return broadcast_string
+
+
+def change_ip(old_ip, new_ip, password, broadcast_ip, host_ip):
+    broadcast_string = get_change_ip_data(old_ip, new_ip, password)
 
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
@@ -195,16 +223,6 @@ def create_send_socket() -> socket.socket:
         raise CreateSocketSendError
 
 
-def turn_on_fw_update(megad_ip: str, password: str) -> None:
-    """Перевод контроллера в режим прошивки."""
-    _LOGGER.debug(f'Перевод контроллера в режим прошивки...')
-    try:
-        requests.get(f"http://{megad_ip}/{password}/?fwup=1", timeout=1)
-        time.sleep(0.01)
-    except Exception as e:
-        _LOGGER.debug(f'Контроллер переведён в режим прошивки.')
-
-
 def download_fw(link: str) -> str:
     """Скачивает прошивку, распаковывает её и возвращает путь к файлу."""
     if not os.path.exists(FW_PATH):
@@ -237,105 +255,3 @@ def download_fw(link: str) -> str:
             return file_path
 
     raise FileNotFoundError('Не удалось найти разархивированный файл.')
-
-
-def check_bootloader_version(megad_ip: str, password: str):
-    """Проверка загрузчика."""
-    try:
-        url = f'http://{megad_ip}/{password}/?bl=1'
-        time.sleep(0.2)
-        response = requests.get(url)
-        value = int(response.text)
-        if value != 1:
-            raise Exception
-    except Exception as e:
-        _LOGGER.warning(f'Обновите загрузчик на контроллере! error: {e}')
-        raise Exception('Версия загрузчика устарела!')
-
-
-def reboot_megad(
-        send_socket: socket.socket,
-        receive_socket: socket.socket,
-        broadcast_ip: str
-):
-    """Отправка широковещательного сообщения для перезагрузки контроллера."""
-    _LOGGER.debug('Попытка перезагрузить устройство...')
-    broadcast_string = BROADCAST_REBOOT + CHECK_DATA
-    send_socket.sendto(broadcast_string, (broadcast_ip, BROADCAST_PORT))
-    receive_socket.recvfrom(200)
-    _LOGGER.info('Устройство перезагружено.')
-
-
-def write_firmware(
-        send_socket: socket.socket,
-        receive_socket: socket.socket,
-        broadcast_ip: str,
-        firmware: bytes,
-):
-    """Запись прошивки на контроллер."""
-    _LOGGER.debug(f'Стирание старой прошивки...')
-    broadcast_string = BROADCAST_CLEAR + CHECK_DATA
-    send_socket.sendto(broadcast_string, (broadcast_ip, BROADCAST_PORT))
-    try:
-        receive_socket.settimeout(5)
-        pkt, peer = receive_socket.recvfrom(200)
-
-        if pkt[0] == 0xAA and pkt[1] == 0x00:
-            _LOGGER.debug(f'Прошивка стёрта, ответ: {pkt} peer {peer}')
-            _LOGGER.debug(f'Начало записи новой прошивки...')
-
-            firmware_blocks = [firmware[i:i + BLOCK_SIZE] for i in range(
-                0, len(firmware), BLOCK_SIZE)]
-
-            receive_socket.settimeout(2)
-
-            msg_id = 0
-
-            for i, block in enumerate(firmware_blocks):
-                percent_fw = int((i * 58) / (len(firmware_blocks)))
-                broadcast_string = bytes(
-                    [0xAA, msg_id, 0x01]) + CHECK_DATA + block
-                send_socket.sendto(
-                    broadcast_string, (broadcast_ip, BROADCAST_PORT)
-                )
-                try:
-                    pkt, peer = receive_socket.recvfrom(10)
-
-                    if pkt[0] != 0xAA or pkt[1] != msg_id:
-                        _LOGGER.error(f'Ошибка прошивки устройства. Пожалуйста'
-                                      f' прошейте контроллер в режиме '
-                                      f'восстановления.')
-                        raise Exception('Ошибка во время записи ПО...')
-                except socket.timeout:
-                    _LOGGER.error(f'Контроллер не ответил во время прошивки.')
-                    raise Exception('Ошибка во время записи ПО...')
-
-                msg_id = (msg_id + 1) % 256
-
-        else:
-            _LOGGER.error('Не удалось прошить устройство.')
-            raise Exception('Ошибка во время записи ПО...')
-    except socket.timeout:
-        _LOGGER.error('Таймаут в ожидании подтверждения стирания прошивки.')
-        raise Exception('Не удалось стереть прошивку')
-    _LOGGER.debug(f'Новая прошивка успешно записана на устройство.')
-
-    _LOGGER.debug('Отправка команды на стирание EEPROM')
-    broadcast_string = BROADCAST_EEPROM + CHECK_DATA
-    send_socket.sendto(broadcast_string, (broadcast_ip, BROADCAST_PORT))
-    try:
-        receive_socket.settimeout(30)
-        receive_socket.recvfrom(200)
-        _LOGGER.debug('Отправка команды на подтверждение стирание EEPROM')
-        broadcast_string = BROADCAST_EEPROM_CONFIRM + CHECK_DATA
-        send_socket.sendto(broadcast_string, (broadcast_ip, BROADCAST_PORT))
-        pkt, peer = receive_socket.recvfrom(200)
-        if pkt[0] == 0xAA and pkt[1] == 0x01:
-            _LOGGER.debug('EEPROM успешно стёрта.')
-        else:
-            _LOGGER.error('Ошибка стирания EEPROM.')
-            raise Exception('Ошибка стирания EEPROM.')
-
-    except socket.timeout:
-        _LOGGER.error('Таймаут ожидания ответа для очистки EEPROM.')
-        raise Exception('Таймаут ожидания ответа для очистки EEPROM.')
@@ -0,0 +1,33 @@
+from dataclasses import asdict
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from .const import DOMAIN, ENTRIES
+from .core.megad import MegaD
+
+
+async def async_get_config_entry_diagnostics(
+        hass: HomeAssistant, config_entry: ConfigEntry
+) -> dict[str, Any]:
+    """Диагностика контроллера: план опроса и статистика запросов."""
+    coordinator = hass.data[DOMAIN][ENTRIES][config_entry.entry_id]
+    megad: MegaD = coordinator.megad
+    scheduler = megad.scheduler
+    return {
+        'megad_id': megad.id,
+        'software': megad.software,
+        'is_available': megad.is_available,
+        'cadence': asdict(megad.cadence),
+        'push_first': megad.push_first,
+        'scheduler': {
+            'latency': scheduler.latency,
+            'busy_rate': scheduler.busy_rate,
+            'interval': scheduler.interval,
+            'count_requests': scheduler.count_requests,
+            'count_busy': scheduler.count_busy,
+            'queued': scheduler.queued,
+        },
+        'requests_per_cycle': megad.count_poll_requests(),
+        'poll_plan': [step.describe() for step in megad.poll_plan],
+    }
@@ -192,9 +192,10 @@ class FanPWMBaseMegaD(CoordinatorEntity, FanEntity):
     def __init__(
             self, coordinator: MegaDCoordinator,
             min_speed,
-            max_speed
+            max_speed,
+            context=None
     ) -> None:
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=context)
         self.min_speed = min_speed
         self.max_speed = max_speed
         self._attr_device_info = coordinator.devices_info()
@@ -257,7 +258,9 @@ class FanPWMMegaD(FanPWMBaseMegaD):
             self, coordinator: MegaDCoordinator, port: PWMPortOut,
             unique_id: str
     ) -> None:
-        super().__init__(coordinator, port.conf.min_value, 255)
+        super().__init__(
+            coordinator, port.conf.min_value, 255, context=port.conf.id
+        )
         self._coordinator: MegaDCoordinator = coordinator
         self._megad: MegaD = coordinator.megad
         self._port: PWMPortOut = port
@@ -370,7 +373,8 @@ class FanPWMExtraMegaD(FanPWMBaseMegaD):
         super().__init__(
             coordinator,
             config_extra_port.min_value,
-            config_extra_port.max_value
+            config_extra_port.max_value,
+            context=port.conf.id
         )
         self._coordinator: MegaDCoordinator = coordinator
         self._megad: MegaD = coordinator.megad
@@ -154,9 +154,10 @@ class LightPWMBaseMegaD(CoordinatorEntity, LightEntity):
     def __init__(
             self, coordinator: MegaDCoordinator,
             min_brightness,
-            max_brightness
+            max_brightness,
+            context=None
     ) -> None:
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=context)
         self.min_brightness = min_brightness
         self.max_brightness = max_brightness
         self._attr_device_info = coordinator.devices_info()
@@ -194,7 +195,9 @@ class LightPWMMegaD(LightPWMBaseMegaD):
             self, coordinator: MegaDCoordinator, port: PWMPortOut,
             unique_id: str
     ) -> None:
-        super().__init__(coordinator, port.conf.min_value, 255)
+        super().__init__(
+            coordinator, port.conf.min_value, 255, context=port.conf.id
+        )
         self._coordinator: MegaDCoordinator = coordinator
         self._megad: MegaD = coordinator.megad
         self._port: PWMPortOut = port
@@ -276,7 +279,8 @@ class LightExtraPWMMegaD(LightPWMBaseMegaD):
         super().__init__(
             coordinator,
             config_extra_port.min_value,
-            config_extra_port.max_value
+            config_extra_port.max_value,
+            context=port.conf.id
         )
         self._coordinator: MegaDCoordinator = coordinator
         self._megad: MegaD = coordinator.megad
@@ -346,7 +350,7 @@ class LightRGBMegaD(CoordinatorEntity, LightEntity):
             self, coordinator: MegaDCoordinator, port: RGBPortOut,
             unique_id: str
     ) -> None:
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=port.conf.id)
         self._coordinator: MegaDCoordinator = coordinator
         self._megad: MegaD = coordinator.megad
         self._port: RGBPortOut = port
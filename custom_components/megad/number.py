@@ -16,6 +16,7 @@ from .const import (
 from .core.base_pids import PIDControl
 from .core.exceptions import SetFactorPIDError
 from .core.megad import MegaD
+from .core.utils import get_pid_context
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -58,7 +59,7 @@ class PIDCoefficientNumber(CoordinatorEntity, NumberEntity):
             unique_id: str
     ):
         """Инициализация."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=get_pid_context(pid.conf.id))
         self._coordinator: MegaDCoordinator = coordinator
         self._megad: MegaD = coordinator.megad
         self._pid = pid
@@ -4,6 +4,7 @@ from propcache import cached_property
 
 from homeassistant.components.sensor import SensorEntity, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
@@ -14,7 +15,7 @@ from .const import (
     HUMIDITY, ENTRIES, CURRENT_ENTITY_IDS, CO2, TYPE_SENSOR_RUS, PRESSURE,
     TYPE_SENSOR, TEMPERATURE_CONDITION, DEVIATION_TEMPERATURE,
     ALLOWED_TEMP_JUMP, ALLOWED_HUM_JUMP, CURRENT, VOLTAGE, RAW_VALUE, LUXURY,
-    BAR
+    BAR, CONFIG_DRIFT
 )
 from .core.base_pids import PIDControl
 from .core.base_ports import (
@@ -25,6 +26,7 @@ from .core.base_ports import (
     I2CSensorPT, I2CSensorILLUM
 )
 from .core.megad import MegaD
+from .core.utils import get_pid_context
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -167,6 +169,9 @@ async def async_setup_entry(
     sensors.append(SensorDeviceMegaD(
         coordinator, f'{entry_id}-{megad.id}-{UPTIME}', UPTIME)
     )
+    sensors.append(SensorConfigDriftMegaD(
+        coordinator, f'{entry_id}-{megad.id}-{CONFIG_DRIFT}')
+    )
     for pid in megad.pids:
         unique_id = f'{entry_id}-{megad.id}-{pid.conf.id}-pid-value'
         sensors.append(PIDSensorMegaD(coordinator, pid, unique_id))
@@ -186,7 +191,7 @@ class StringSensorMegaD(CoordinatorEntity, SensorEntity):
             self, coordinator: MegaDCoordinator, port,
             unique_id: str
     ) -> None:
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=port.conf.id)
         self._megad: MegaD = coordinator.megad
         self._port = port
         self._sensor_name: str = port.conf.name
@@ -239,7 +244,7 @@ class CountSensorMegaD(CoordinatorEntity, SensorEntity):
             self, coordinator: MegaDCoordinator, port: BinaryPortClick,
             unique_id: str
     ) -> None:
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=port.conf.id)
         self._megad: MegaD = coordinator.megad
         self._port: (BinaryPortClick, BinaryPortIn, BinaryPortCount) = port
         self._unique_id: str = unique_id
@@ -275,7 +280,7 @@ class SensorMegaD(CoordinatorEntity, SensorEntity):
             self, coordinator: MegaDCoordinator, port: DigitalSensorBase,
             unique_id: str, type_sensor: str, prefix: str = ''
     ) -> None:
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=port.conf.id)
         self._megad: MegaD = coordinator.megad
         self._port: DigitalSensorBase = port
         self.type_sensor = type_sensor
@@ -451,6 +456,47 @@ class SensorDeviceMegaD(CoordinatorEntity, SensorEntity):
         return SENSOR_CLASS.get(self.type_sensor)
 
 
+class SensorConfigDriftMegaD(CoordinatorEntity, SensorEntity):
+    """Количество страниц конфигурации, отличающихся от файла."""
+
+    _attr_icon = 'mdi:file-compare'
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+            self, coordinator: MegaDCoordinator, unique_id: str
+    ) -> None:
+        super().__init__(coordinator, context=CONFIG_DRIFT)
+        self._megad: MegaD = coordinator.megad
+        self._sensor_name: str = f'megad_{self._megad.id}_{CONFIG_DRIFT}'
+        self._attr_unique_id = unique_id
+        self._attr_device_info = coordinator.devices_info()
+        self.entity_id = 'sensor.' + slugify(f'megad_{self._sensor_name}')
+
+    def __repr__(self) -> str:
+        if not self.hass:
+            return f"<Sensor entity {self.entity_id}>"
+        return super().__repr__()
+
+    @cached_property
+    def name(self) -> str:
+        return self._sensor_name
+
+    @property
+    def native_value(self) -> int | None:
+        """Возвращает количество отличающихся страниц."""
+        drift = self._megad.config_drift
+        if drift is None:
+            return None
+        return sum(len(pages) for pages in drift.values())
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Отличающиеся страницы и время проверки."""
+        attributes = dict(self._megad.config_drift or {})
+        attributes['checked'] = self._megad.drift_checked
+        return attributes
+
+
 class AnalogSensorMegaD(CoordinatorEntity, SensorEntity):
 
     _attr_icon = 'mdi:alpha-a-circle-outline'
@@ -459,7 +505,7 @@ class AnalogSensorMegaD(CoordinatorEntity, SensorEntity):
             self, coordinator: MegaDCoordinator, port: AnalogSensor,
             unique_id: str, type_sensor: str | None = None
     ) -> None:
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=port.conf.id)
         self._megad: MegaD = coordinator.megad
         self._port: AnalogSensor = port
         self.type_sensor = type_sensor
@@ -502,7 +548,7 @@ class PIDSensorMegaD(CoordinatorEntity, SensorEntity):
             self, coordinator: MegaDCoordinator, pid: PIDControl,
             unique_id: str, type_sensor: str | None = None
     ) -> None:
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=get_pid_context(pid.conf.id))
         self._megad: MegaD = coordinator.megad
         self._pid: PIDControl = pid
         self.type_sensor = type_sensor
@@ -0,0 +1,269 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+)
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from .const import (
+    DOMAIN, ENTRIES, SERVICE_CHECK_DRIFT, MEGAD_ID, SERVICE_BACKUP_CONFIGS,
+    MAX_PARALLEL, DEFAULT_MAX_PARALLEL, PATH_CONFIG_MEGAD,
+    SERVICE_RESTORE_CONFIGS, CONFIG_FILE, DIFFERENTIAL_UPLOAD, UPLOAD_TIMEOUT,
+    DEFAULT_UPLOAD_TIMEOUT, EVENT_RESTORE_PROGRESS
+)
+from .core.config_manager import MegaDConfigManager
+from .core.exceptions import NotAvailableURL
+
+_LOGGER = logging.getLogger(__name__)
+
+SCHEMA_MEGAD_ID = vol.Schema({
+    vol.Optional(MEGAD_ID): vol.All(cv.ensure_list, [cv.string])
+})
+
+SCHEMA_BACKUP = SCHEMA_MEGAD_ID.extend({
+    vol.Optional(MAX_PARALLEL, default=DEFAULT_MAX_PARALLEL): vol.All(
+        vol.Coerce(int), vol.Range(min=1, max=16)
+    )
+})
+
+SCHEMA_RESTORE = SCHEMA_BACKUP.extend({
+    vol.Optional(CONFIG_FILE): cv.string,
+    vol.Optional(DIFFERENTIAL_UPLOAD, default=False): cv.boolean,
+    vol.Optional(UPLOAD_TIMEOUT, default=DEFAULT_UPLOAD_TIMEOUT): vol.All(
+        vol.Coerce(float), vol.Range(min=0, max=5)
+    ),
+})
+
+
+def get_coordinators(
+        hass: HomeAssistant, megad_ids: list[str] | None
+) -> list:
+    """Координаторы всех контроллеров или контроллеров с указанными id."""
+    coordinators = [
+        coordinator
+        for coordinator in hass.data.get(DOMAIN, {}).get(ENTRIES, {}).values()
+        if coordinator is not None
+        and (not megad_ids or coordinator.megad.id in megad_ids)
+    ]
+    if megad_ids:
+        missing = set(megad_ids) - {c.megad.id for c in coordinators}
+        if missing:
+            raise HomeAssistantError(f'Контроллеры MegaD не найдены: '
+                                     f'{", ".join(sorted(missing))}')
+    return coordinators
+
+
+async def async_check_config_drift(call: ServiceCall) -> ServiceResponse:
+    """Проверка расхождения конфигурации контроллеров с файлами."""
+    result = {}
+    for coordinator in get_coordinators(call.hass, call.data.get(MEGAD_ID)):
+        try:
+            result[coordinator.megad.id] = (
+                await coordinator.async_check_config_drift()
+            )
+        except Exception as e:
+            _LOGGER.warning(f'Не удалось проверить конфигурацию '
+                            f'MegaD-{coordinator.megad.id}: {e}')
+            result[coordinator.megad.id] = {'error': str(e)}
+    return result
+
+
+async def async_backup_config(
+        hass: HomeAssistant, coordinator, semaphore: asyncio.Semaphore
+) -> dict:
+    """Читает конфигурацию контроллера в новый файл."""
+    megad = coordinator.megad
+    configs_path = hass.config.path(PATH_CONFIG_MEGAD)
+    name_file = (f'ip{str(megad.config.plc.ip_megad).split(".")[-1]}_'
+                 f'{datetime.now().strftime("%Y%m%d_%H%M%S")}.cfg')
+    progress = {'pages': 0}
+
+    def count_pages(count_read: int, count_pages: int) -> None:
+        progress['pages'] = count_read
+
+    async with semaphore:
+        start = time.monotonic()
+        try:
+            await hass.async_add_executor_job(
+                lambda: os.makedirs(configs_path, exist_ok=True)
+            )
+            manager_config = MegaDConfigManager(
+                megad.url,
+                os.path.join(configs_path, name_file),
+                async_get_clientsession(hass),
+                scheduler=megad.scheduler
+            )
+            await manager_config.read_config(progress=count_pages)
+            await manager_config.save_config_to_file()
+            error = None
+            _LOGGER.info(f'Конфигурация MegaD-{megad.id} сохранена в файл '
+                         f'{name_file}')
+        except Exception as e:
+            error = str(e) or type(e).__name__
+            _LOGGER.warning(f'Не удалось сохранить конфигурацию '
+                            f'MegaD-{megad.id}: {error}')
+        return {
+            'file': None if error else name_file,
+            'pages': progress['pages'],
+            'duration': round(time.monotonic() - start, 1),
+            'error': error,
+        }
+
+
+async def async_backup_configs(call: ServiceCall) -> ServiceResponse:
+    """Резервное копирование конфигураций контроллеров."""
+    coordinators = get_coordinators(call.hass, call.data.get(MEGAD_ID))
+    semaphore = asyncio.Semaphore(call.data[MAX_PARALLEL])
+    start = time.monotonic()
+    results = await asyncio.gather(*(
+        async_backup_config(call.hass, coordinator, semaphore)
+        for coordinator in coordinators
+    ))
+    boards = {
+        coordinator.megad.id: result
+        for coordinator, result in zip(coordinators, results)
+    }
+    return {
+        'duration': round(time.monotonic() - start, 1),
+        'failed': [
+            megad_id for megad_id, result in boards.items()
+            if result['error']
+        ],
+        'boards': boards,
+    }
+
+
+async def async_restore_config(
+        hass: HomeAssistant, coordinator, semaphore: asyncio.Semaphore,
+        config_path: str, differential: bool, timeout: float
+) -> dict:
+    """
+    Загружает конфигурацию из файла на контроллер, дожидается его
+    перезагрузки и сверяет конфигурацию контроллера с файлом.
+    """
+    megad = coordinator.megad
+    result = {
+        'file': os.path.basename(config_path),
+        'lines': 0,
+        'verified': False,
+        'drift': None,
+        'error': None,
+    }
+
+    def fire_progress(stage: str, **data) -> None:
+        hass.bus.async_fire(
+            EVENT_RESTORE_PROGRESS, {MEGAD_ID: megad.id, 'stage': stage} | data
+        )
+
+    def count_lines(count_sent: int, count_lines: int) -> None:
+        result['lines'] = count_sent
+        fire_progress('upload', sent=count_sent, total=count_lines)
+
+    async with semaphore:
+        start = time.monotonic()
+        coordinator.set_restoring_state(True)
+        try:
+            if not await hass.async_add_executor_job(
+                    os.path.isfile, config_path
+            ):
+                raise FileNotFoundError(
+                    f'Файл конфигурации {result["file"]} не найден'
+                )
+            manager_config = MegaDConfigManager(
+                megad.url, config_path, async_get_clientsession(hass),
+                scheduler=megad.scheduler
+            )
+            await manager_config.read_config_file()
+            fire_progress('start')
+            await manager_config.upload_config(
+                timeout=timeout, differential=differential,
+                progress=count_lines
+            )
+            fire_progress('restart')
+            if not await manager_config.wait_ready():
+                raise NotAvailableURL(
+                    'Контроллер не ответил после перезагрузки'
+                )
+            fire_progress('verify')
+            result['drift'] = await manager_config.check_drift()
+            result['verified'] = not any(result['drift'].values())
+            _LOGGER.info(f'Конфигурация {result["file"]} загружена на '
+                         f'MegaD-{megad.id}. Совпадает с файлом: '
+                         f'{result["verified"]}')
+        except Exception as e:
+            result['error'] = str(e) or type(e).__name__
+            _LOGGER.warning(f'Не удалось загрузить конфигурацию на '
+                            f'MegaD-{megad.id}: {result["error"]}')
+        finally:
+            coordinator.set_restoring_state(False)
+        await coordinator.async_request_refresh()
+        result['duration'] = round(time.monotonic() - start, 1)
+        fire_progress(
+            'error' if result['error'] else 'done',
+            verified=result['verified'], error=result['error']
+        )
+        return result
+
+
+async def async_restore_configs(call: ServiceCall) -> ServiceResponse:
+    """Восстановление конфигураций контроллеров из файлов."""
+    hass = call.hass
+    coordinators = get_coordinators(hass, call.data.get(MEGAD_ID))
+    name_file = call.data.get(CONFIG_FILE)
+    if name_file is not None:
+        if len(coordinators) != 1:
+            raise HomeAssistantError(
+                'Файл конфигурации можно указать только для одного '
+                'контроллера'
+            )
+        if os.path.basename(name_file) != name_file:
+            raise HomeAssistantError(
+                f'Недопустимое имя файла конфигурации: {name_file}'
+            )
+    semaphore = asyncio.Semaphore(call.data[MAX_PARALLEL])
+    start = time.monotonic()
+    results = await asyncio.gather(*(
+        async_restore_config(
+            hass, coordinator, semaphore,
+            os.path.join(hass.config.path(PATH_CONFIG_MEGAD), name_file)
+            if name_file else coordinator.megad.config_path,
+            call.data[DIFFERENTIAL_UPLOAD],
+            call.data[UPLOAD_TIMEOUT]
+        )
+        for coordinator in coordinators
+    ))
+    boards = {
+        coordinator.megad.id: result
+        for coordinator, result in zip(coordinators, results)
+    }
+    return {
+        'duration': round(time.monotonic() - start, 1),
+        'failed': [
+            megad_id for megad_id, result in boards.items()
+            if result['error'] or not result['verified']
+        ],
+        'boards': boards,
+    }
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Регистрация сервисов интеграции."""
+    hass.services.async_register(
+        DOMAIN, SERVICE_CHECK_DRIFT, async_check_config_drift,
+        schema=SCHEMA_MEGAD_ID, supports_response=SupportsResponse.OPTIONAL
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_BACKUP_CONFIGS, async_backup_configs,
+        schema=SCHEMA_BACKUP, supports_response=SupportsResponse.OPTIONAL
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_RESTORE_CONFIGS, async_restore_configs,
+        schema=SCHEMA_RESTORE, supports_response=SupportsResponse.OPTIONAL
+    )
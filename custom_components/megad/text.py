@@ -57,7 +57,7 @@ class MegaDDisplayEntity(CoordinatorEntity, TextEntity):
             unique_id: str
     ):
         """Инициализация."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=port.conf.id)
         self._coordinator: MegaDCoordinator = coordinator
         self._megad: MegaD = coordinator.megad
         self._port: I2CDisplayPort = port
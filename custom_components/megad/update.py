@@ -1,7 +1,5 @@
 import asyncio
 import logging
-import socket
-import time
 from typing import Any
 
 from propcache import cached_property
@@ -22,19 +20,17 @@ from .const import (
     DEFAULT_PASSWORD
 )
 from .core.config_manager import MegaDConfigManager
-from .core.const_fw import (
-    RECV_TIMEOUT, BROADCAST_START, CHECK_DATA, BROADCAST_PORT
-)
+from .core.const_fw import FW_MIN_SIZE
 from .core.exceptions import (
-    CreateSocketReceiveError, CreateSocketSendError, FWUpdateError
+    CreateSocketReceiveError, FWUpdateError, FirmwareFileError
+)
+from .core.flasher import (
+    MegaDFlasher, check_bootloader_version, turn_on_fw_update
 )
+from .core.intel_hex import parse_intel_hex
 from .core.megad import MegaD
 from .core.models_megad import LatestVersionMegaD
-from .core.utils import (
-    create_receive_socket, create_send_socket, turn_on_fw_update, download_fw,
-    check_bootloader_version, get_broadcast_ip, reboot_megad, write_firmware,
-    change_ip
-)
+from .core.utils import download_fw, get_broadcast_ip
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -65,6 +61,7 @@ class MegaDFirmwareUpdate(CoordinatorEntity, UpdateEntity):
     _attr_has_entity_name = True
     _attr_release_url: str | None = RELEASE_URL
     _attr_supported_features = (UpdateEntityFeature.INSTALL
+                                | UpdateEntityFeature.PROGRESS
                                 | UpdateEntityFeature.RELEASE_NOTES)
 
     def __init__(self, coordinator: MegaDCoordinator, entry_id):
@@ -152,124 +149,65 @@ class MegaDFirmwareUpdate(CoordinatorEntity, UpdateEntity):
         await manager_config.upload_config(timeout=0.2)
         _LOGGER.debug(f'Конфигурация загружена в контроллер.')
 
-    def install(
+    def _set_update_percentage(self, percentage: int | None) -> None:
+        """
+        Обновляет процент выполнения прошивки. Состояние записывается
+        только при изменении целого значения процента.
+        """
+        if percentage is not None:
+            percentage = int(percentage)
+        if percentage != self._attr_update_percentage:
+            self._attr_update_percentage = percentage
+            self.async_write_ha_state()
+
+    async def async_install(
             self, version: str | None, backup: bool = False, **kwargs: Any
     ) -> None:
         """Install an update."""
         _LOGGER.info(f'Запущен процесс обновления ПО MegaD-{self._megad.id}')
-        asyncio.run_coroutine_threadsafe(
-            self._coordinator.set_flashing_state(True),
-            self.hass.loop
-        ).result()
-
-        receive_socket = None
-        send_socket = None
-        self._attr_in_progress = True
         megad_ip = str(self._megad.config.plc.ip_megad)
         password = self._megad.config.plc.password
-        host_ip = asyncio.run_coroutine_threadsafe(
-            async_get_source_ip(self.hass), self.hass.loop).result()
-        _LOGGER.debug(f'Адрес хоста: {host_ip}, адрес MegaD: {megad_ip}')
+        session = async_get_clientsession(self.hass)
         try:
+            await self._coordinator.set_flashing_state(True)
+            self._attr_in_progress = True
+            self._set_update_percentage(0)
+            host_ip = await async_get_source_ip(self.hass)
+            _LOGGER.debug(f'Адрес хоста: {host_ip}, адрес MegaD: {megad_ip}')
             if self.get_lt_ver_obj().local:
                 file_path = self.get_lt_ver_obj().link
             else:
-                file_path = download_fw(self._megad.lt_version_sw.link)
-            check_bootloader_version(megad_ip, password)
-            broadcast_ip = get_broadcast_ip(host_ip)
-            broadcast_string = BROADCAST_START + CHECK_DATA
-
-            receive_socket = create_receive_socket(host_ip)
-            receive_socket.settimeout(RECV_TIMEOUT)
-            send_socket = create_send_socket()
-            turn_on_fw_update(megad_ip, password)
-
-            for i in range(10):
-                send_socket.sendto(
-                    broadcast_string, (broadcast_ip, BROADCAST_PORT)
+                file_path = await self.hass.async_add_executor_job(
+                    download_fw, self._megad.lt_version_sw.link
                 )
-                _LOGGER.debug(f'Попытка {i + 1}: Запрос отправлен контроллеру '
-                              f'отправлен.')
-                _LOGGER.debug(f'Попытка чтения ответа от MegaD')
-                try:
-                    receive_socket.settimeout(RECV_TIMEOUT)
-                    pkt, peer = receive_socket.recvfrom(200)
-                    _LOGGER.debug(f'Ответ получен от {peer}: {pkt}')
-                    break
-                except socket.timeout:
-                    _LOGGER.debug('Таймаут при ожидании ответа.')
-
-            receive_socket.settimeout(30)
-
-            send_socket.sendto(
-                broadcast_string, (broadcast_ip, BROADCAST_PORT)
-            )
-            _LOGGER.debug('Финальный запрос отправлен.')
-
             try:
-                pkt, peer = receive_socket.recvfrom(200)
-                _LOGGER.debug(f'Финальный ответ получен от {peer}: {pkt}')
-            except socket.timeout:
-                _LOGGER.warning('Таймаут при ожидании финального ответа.')
-                raise Exception('Контроллер не отвечает.')
-
-            if pkt[2] == 0x99 or pkt[2] == 0x9A:
-                if pkt[2] == 0x99:
-                    _LOGGER.warning('WARNING! Пожалуйста, обновите загрузчик!')
-                    reboot_megad(send_socket, receive_socket, broadcast_ip)
-                    raise Exception('Загрузчик устарел.')
-            else:
-                _LOGGER.warning('Неподдерживаемый тип чипа atmega328!')
-                raise Exception('Неподдерживаемый тип чипа atmega328!')
-
-            firmware = b''
-            with open(file_path, 'r') as fh:
-                for line in fh:
-                    if len(line) > 0 and line[8] == '0':
-                        byte_count = line[1:3]
-                        byte_count_int = int(byte_count, 16)
-                        for i in range(byte_count_int):
-                            pos = i * 2 + 9
-                            byte_hex = line[pos:pos + 2]
-                            byte = bytes.fromhex(byte_hex)
-                            firmware += byte
-            _LOGGER.debug(f'lenth_firmware: {len(firmware)}')
-
-            if len(firmware) > 258046:
-                _LOGGER.warning(f'Размер прошивки слишком велик!')
-                reboot_megad(send_socket, receive_socket, broadcast_ip)
-                raise Exception('Слишком большой файл прошивки.')
-            elif len(firmware) < 1000:
+                firmware = await self.hass.async_add_executor_job(
+                    parse_intel_hex, file_path
+                )
+            except FirmwareFileError as e:
+                _LOGGER.warning(f'Файл прошивки повреждён: {e}')
+                raise Exception('Файл прошивки повреждён.')
+            _LOGGER.info(f'Образ прошивки MegaD-{self._megad.id}: '
+                         f'{firmware.size} байт, CRC32 {firmware.crc:08X}')
+            if firmware.size < FW_MIN_SIZE:
                 _LOGGER.warning(f'Размер прошивки слишком мал!')
-                reboot_megad(send_socket, receive_socket, broadcast_ip)
                 raise Exception('Слишком маленький файл прошивки.')
-            else:
-                _LOGGER.debug('Файл прошивки прошёл проверку...')
+            _LOGGER.debug('Файл прошивки прошёл проверку...')
 
-            write_firmware(
-                send_socket,
-                receive_socket,
-                broadcast_ip,
-                firmware,
-            )
-            reboot_megad(send_socket, receive_socket, broadcast_ip)
-            time.sleep(3)
-
-            receive_socket.close()
-            receive_socket = None
-            send_socket.close()
-            send_socket = None
-            time.sleep(1)
-
-            change_ip(
-                DEFAULT_IP, megad_ip, DEFAULT_PASSWORD, broadcast_ip, host_ip
-            )
-
-            asyncio.run_coroutine_threadsafe(
-                self._write_config(), self.hass.loop
-            ).result()
-            time.sleep(1)
-        except (CreateSocketReceiveError, CreateSocketSendError):
+            await check_bootloader_version(session, megad_ip, password)
+            broadcast_ip = get_broadcast_ip(host_ip)
+            async with MegaDFlasher(
+                    host_ip, broadcast_ip, self._set_update_percentage
+            ) as flasher:
+                await turn_on_fw_update(session, megad_ip, password)
+                await flasher.flash(firmware.view())
+                await asyncio.sleep(4)
+                await flasher.change_ip(DEFAULT_IP, megad_ip, DEFAULT_PASSWORD)
+
+            self._set_update_percentage(None)
+            await self._write_config()
+            await asyncio.sleep(1)
+        except CreateSocketReceiveError:
             _LOGGER.error(f'Ошибка обновления ПО контроллера. Не удалось '
                           f'установить соединение с {megad_ip}')
         except Exception as e:
@@ -281,16 +219,9 @@ class MegaDFirmwareUpdate(CoordinatorEntity, UpdateEntity):
                                 'megad-upgrade.')
         finally:
             self._attr_in_progress = False
-            if receive_socket:
-                receive_socket.close()
-            if send_socket:
-                send_socket.close()
+            self._attr_update_percentage = None
             _LOGGER.debug('Процесс прошивки завершён.')
-            asyncio.run_coroutine_threadsafe(
-                self._coordinator.set_flashing_state(False),
-                self.hass.loop
-            ).result()
-            asyncio.run_coroutine_threadsafe(
-                self.hass.config_entries.async_reload(self._entry_id),
-                self.hass.loop
-            ).result()
+            await self._coordinator.set_flashing_state(False)
+            self.hass.async_create_task(
+                self.hass.config_entries.async_reload(self._entry_id)
+            )
@@ -0,0 +1,28 @@
+"""
+Сохраняет страницы конфигурации контроллера MegaD в tests/fixtures/pages
+вместе с эталонной строкой параметров прежнего разбора BeautifulSoup.
+
+    python -m tests.capture_pages http://192.168.0.14/sec/ cf=1 pt=7 \
+        "cf=10&prn=0"
+"""
+import sys
+import urllib.request
+
+from tests.test_form_parser import PAGES, legacy_get_params
+
+
+def capture(url: str, query: str):
+    """Сохраняет страницу url?query в файлы <имя>.html и <имя>.txt."""
+    with urllib.request.urlopen(f'{url}?{query}', timeout=5) as response:
+        page = response.read()
+    name = query.replace('=', '').replace('&', '_')
+    PAGES.joinpath(f'{name}.html').write_bytes(page)
+    PAGES.joinpath(f'{name}.txt').write_bytes(
+        legacy_get_params(page.decode('cp1251')).encode('cp1251')
+    )
+    print(f'{name}: {len(page)} байт')
+
+
+if __name__ == '__main__':
+    for query in sys.argv[2:]:
+        capture(sys.argv[1], query)
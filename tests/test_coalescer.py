@@ -0,0 +1,116 @@
+"""Объединение команд портов в запросы cmd=..."""
+import asyncio
+
+import pytest
+
+from custom_components.megad.core.coalescer import CommandCoalescer
+from custom_components.megad.core.exceptions import MegaDBusy
+
+
+class FakeSend:
+    """Отправленные команды и ответы контроллера на них."""
+
+    def __init__(self, replies: dict | None = None):
+        self.commands: list[str] = []
+        self.replies = replies or {}
+        self.gate: asyncio.Event | None = None
+
+    async def __call__(self, command: str) -> str:
+        self.commands.append(command)
+        if self.gate is not None:
+            await self.gate.wait()
+        reply = self.replies.get(command, 'Done')
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+
+@pytest.mark.asyncio
+async def test_single_command_sent_at_once():
+    send = FakeSend()
+    coalescer = CommandCoalescer(send)
+    assert await asyncio.wait_for(coalescer.submit('7:1'), 0.005) == 'Done'
+    assert send.commands == ['7:1']
+
+
+@pytest.mark.asyncio
+async def test_merge_simultaneous_commands():
+    send = FakeSend()
+    coalescer = CommandCoalescer(send)
+    replies = await asyncio.gather(
+        coalescer.submit('1:1'), coalescer.submit('2:0'),
+        coalescer.submit('5:1')
+    )
+    assert send.commands == ['1:1;2:0;5:1']
+    assert replies == ['Done'] * 3
+
+
+@pytest.mark.asyncio
+async def test_merge_while_request_in_flight():
+    """Команды, поданные во время запроса, уходят следующим запросом."""
+    send = FakeSend()
+    send.gate = asyncio.Event()
+    coalescer = CommandCoalescer(send)
+    first = asyncio.ensure_future(coalescer.submit('1:1'))
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    rest = asyncio.gather(coalescer.submit('2:1'), coalescer.submit('3:1'))
+    await asyncio.sleep(0)
+    assert send.commands == ['1:1']
+    send.gate.set()
+    await first
+    await rest
+    assert send.commands == ['1:1', '2:1;3:1']
+
+
+@pytest.mark.asyncio
+async def test_split_at_max_length():
+    send = FakeSend()
+    coalescer = CommandCoalescer(send)
+    actions = [f'{port}:255' for port in range(40)]
+    await asyncio.gather(*(coalescer.submit(action) for action in actions))
+    assert len(send.commands) > 1
+    assert all(len(command) <= 200 for command in send.commands)
+    assert ';'.join(send.commands).split(';') == actions
+    first = send.commands[0]
+    following = actions[first.count(';') + 1]
+    assert len(f'{first};{following}') > 200
+
+
+@pytest.mark.asyncio
+async def test_busy_batch_sent_one_by_one():
+    """Ответ busy на объединённый запрос не переходит на все команды."""
+    send = FakeSend({'1:1;2:1;3:1': 'busy', '2:1': 'busy'})
+    coalescer = CommandCoalescer(send)
+    replies = await asyncio.gather(
+        coalescer.submit('1:1'), coalescer.submit('2:1'),
+        coalescer.submit('3:1')
+    )
+    assert send.commands == ['1:1;2:1;3:1', '1:1', '2:1', '3:1']
+    assert replies == ['Done', 'busy', 'Done']
+
+
+@pytest.mark.asyncio
+async def test_error_reaches_only_its_command():
+    error = MegaDBusy()
+    send = FakeSend({'1:1;2:1': error, '2:1': error})
+    coalescer = CommandCoalescer(send)
+    replies = await asyncio.gather(
+        coalescer.submit('1:1'), coalescer.submit('2:1'),
+        return_exceptions=True
+    )
+    assert send.commands == ['1:1;2:1', '1:1', '2:1']
+    assert replies == ['Done', error]
+
+
+@pytest.mark.asyncio
+async def test_cancel_in_flight():
+    send = FakeSend()
+    send.gate = asyncio.Event()
+    coalescer = CommandCoalescer(send)
+    future = asyncio.ensure_future(coalescer.submit('1:1'))
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    coalescer.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await future
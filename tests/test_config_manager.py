@@ -0,0 +1,277 @@
+"""Чтение конфигурации MegaD с поддельного контроллера."""
+import os
+
+import pytest
+import pytest_asyncio
+
+from custom_components.megad.core.config_manager import MegaDConfigManager
+
+URL = 'http://192.168.0.14/sec/'
+INDEX_PAGE = '<a href=/sec/?pt=0>P0</a><a href=/sec/?pt=1>P1</a>'
+
+
+def form_page(line: str) -> str:
+    """Страница с формой, поля которой дают строку конфигурации line."""
+    fields = ''.join(
+        f'<input name={key} value="{value}">'
+        for key, value in (pair.split('=', 1) for pair in line.split('&'))
+    )
+    return f'<html><body><form action=/sec/>{fields}</form></body></html>'
+
+
+class FakeMegaD:
+    """Страницы контроллера по параметрам запроса и счётчик запросов."""
+
+    def __init__(self, pages: dict[str, str]):
+        self.pages = pages
+        self.requests: list[dict] = []
+
+    @staticmethod
+    def key(params: dict) -> str:
+        return '&'.join(f'{key}={value}' for key, value in params.items())
+
+    async def fetch_page(self, params: dict) -> str:
+        self.requests.append(params)
+        if not params:
+            return INDEX_PAGE
+        key = self.key(params)
+        return form_page(self.pages.get(key, key))
+
+
+EMPTY_SLOTS = {
+    'cf=10&prn=0': 'cf=10&prn=0&prp=&prv=&prd=&prc=0',
+    'cf=10&prn=1': 'cf=10&prn=1&prp=30&prv=25&prd=7:1&prc=1',
+    'cf=11&pid=0': 'cf=11&pid=0&pidt=&pidi=&pido=&pidm=0',
+    'cf=6&el=15': 'cf=6&el=15&elx=&elp=&elt=0',
+    'pt=33&ext=4': 'pt=33&ext=4&ept=&eact=&emode=&ety=0',
+    'pt=33&ext=5': 'pt=33&ext=5&ept=Light&eact=&emode=&ety=1',
+}
+
+
+def make_manager(fake: FakeMegaD) -> MegaDConfigManager:
+    manager = MegaDConfigManager(URL, '', session=None)
+    manager.fetch_page = fake.fetch_page
+    return manager
+
+
+def page_params(keys) -> list[dict]:
+    return [
+        dict(pair.split('=') for pair in key.split('&')) for key in keys
+    ]
+
+
+@pytest.mark.asyncio
+async def test_sparse_read_skips_empty_slots():
+    """Пустые по ключевым полям слоты не запрашиваются у контроллера."""
+    fake = FakeMegaD(EMPTY_SLOTS)
+    manager = make_manager(fake)
+    params = page_params(EMPTY_SLOTS)
+    previous = manager.index_slots(
+        [f'{line}&nr=1\n' for line in EMPTY_SLOTS.values()]
+    )
+
+    lines = await manager.read_sparse_pages(params, previous)
+
+    assert [fake.key(request) for request in fake.requests] == [
+        'cf=10&prn=1', 'pt=33&ext=5'
+    ]
+    assert [line.strip() for line in lines] == [
+        f'{line}&nr=1' for line in list(EMPTY_SLOTS.values())[:-1]
+    ] + [EMPTY_SLOTS['pt=33&ext=5']]
+
+
+@pytest.mark.asyncio
+async def test_sparse_read_fetches_absent_slots():
+    fake = FakeMegaD(EMPTY_SLOTS)
+    manager = make_manager(fake)
+    previous = manager.index_slots([EMPTY_SLOTS['cf=10&prn=0'] + '\n'])
+
+    await manager.read_sparse_pages(page_params(EMPTY_SLOTS), previous)
+
+    assert len(fake.requests) == len(EMPTY_SLOTS) - 1
+
+
+@pytest.mark.asyncio
+async def test_drift_finds_populated_empty_slot(tmp_path, monkeypatch):
+    """Слот, пустой в файле и заполненный на контроллере, - изменение."""
+    fake = FakeMegaD(dict(EMPTY_SLOTS))
+    monkeypatch.setattr(MegaDConfigManager, 'fetch_page', fake.fetch_page)
+    manager = MegaDConfigManager(URL, str(tmp_path / 'megad.cfg'), None)
+    await manager.read_config()
+    await manager.save_config_to_file()
+
+    assert await manager.check_drift() == {
+        'changed': [], 'missing': [], 'added': []
+    }
+    fake.pages['cf=10&prn=0'] = 'cf=10&prn=0&prp=5&prv=1&prd=7:0&prc=0'
+    assert await manager.check_drift() == {
+        'changed': ['cf=10&prn=0'], 'missing': [], 'added': []
+    }
+
+
+CONFIG_LINES = [
+    'cf=1&eip=192.168.0.14&emsk=255.255.255.0&pwd=sec&gw=192.168.0.1'
+    '&sip=192.168.0.100:8123&srvt=0&sct=megad&gsm=0&nr=1',
+    'cf=2&mdid=mg1&nr=1',
+    'pn=0&pty=0&m=0&misc=1&ecmd=7:2&af=1&eth=&naf=0&emt=Кнопка&nr=1',
+    'pn=7&pty=1&m=0&d=0&grp=&emt=Свет&nr=1',
+    'pn=8&pty=1&m=1&d=10&pwmm=0&misc=1&m2=5&emt=&nr=1',
+    'pn=30&pty=3&d=3&m=1&misc=25.5&hst=1&ecmd=7:1&af=1&emt=&nr=1',
+    'cf=11&pid=0&pidt=Тёплый пол&pidi=30&pido=8&pidsp=27.5&pidpf=10'
+    '&pidif=0.5&piddf=0&pidc=30&pidm=0',
+]
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / 'megad.cfg'
+    path.write_text('\n'.join(CONFIG_LINES) + '\n', encoding='cp1251')
+    return path
+
+
+@pytest.fixture
+def parsed(monkeypatch) -> list:
+    """Отмечает каждый разбор файла конфигурации."""
+    parsed = []
+    create_config = MegaDConfigManager.create_config_megad
+
+    async def create_config_megad(self):
+        parsed.append(True)
+        return await create_config(self)
+
+    monkeypatch.setattr(
+        MegaDConfigManager, 'create_config_megad', create_config_megad
+    )
+    return parsed
+
+
+async def load_config(path):
+    return await MegaDConfigManager(URL, str(path), None).load_config_megad()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_hit(config_file, parsed):
+    config = await load_config(config_file)
+    cached = await load_config(config_file)
+    assert parsed == [True]
+    assert cached == config
+    assert [type(port) for port in cached.ports] == [
+        type(port) for port in config.ports
+    ]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_invalidated(config_file, parsed):
+    await load_config(config_file)
+    config_file.write_text(
+        config_file.read_text(encoding='cp1251').replace('mg1', 'mg2'),
+        encoding='cp1251'
+    )
+    config = await load_config(config_file)
+    assert parsed == [True, True]
+    assert config.plc.megad_id == 'mg2'
+
+
+@pytest.mark.asyncio
+async def test_snapshot_corrupt(config_file, parsed):
+    config = await load_config(config_file)
+    snapshot = config_file.with_name(config_file.name + '.cache')
+    snapshot.write_text('{"version": ')
+    assert await load_config(config_file) == config
+    assert parsed == [True, True]
+    assert await load_config(config_file) == config
+    assert parsed == [True, True]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_touched(config_file, parsed):
+    """Файл с новым временем изменения и тем же содержимым не разбирается."""
+    await load_config(config_file)
+    stat = config_file.stat()
+    os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    await load_config(config_file)
+    await load_config(config_file)
+    assert parsed == [True]
+
+
+LIVE_PAGES = EMPTY_SLOTS | {
+    'cf=1': 'cf=1&eip=192.168.0.14&pwd=sec&sct=megad',
+    'pt=0': 'pn=0&pty=0&m=0&ecmd=7:2&emt=Кнопка',
+    'pt=1': 'pn=1&pty=1&m=0&d=0&emt=Свет',
+}
+
+
+@pytest_asyncio.fixture
+async def uploaded(tmp_path, monkeypatch):
+    """Строки, отправленные на контроллер, и запросы перезагрузки."""
+    fake = FakeMegaD(dict(LIVE_PAGES))
+    monkeypatch.setattr(MegaDConfigManager, 'fetch_page', fake.fetch_page)
+    manager = MegaDConfigManager(URL, str(tmp_path / 'megad.cfg'), None)
+    await manager.read_config()
+    sent = {'lines': [], 'requests': []}
+
+    async def set_config(line_config: str):
+        sent['lines'].append(line_config)
+
+    async def request_to_megad(params):
+        sent['requests'].append(params)
+
+    monkeypatch.setattr(manager, 'set_config', set_config)
+    monkeypatch.setattr(manager, 'request_to_megad', request_to_megad)
+    return manager, sent
+
+
+def replace_line(manager: MegaDConfigManager, start: str, line: str):
+    manager.settings = [
+        f'{line}&nr=1\n' if setting.startswith(start) else setting
+        for setting in manager.settings
+    ]
+
+
+@pytest.mark.asyncio
+async def test_diff_upload_unchanged(uploaded):
+    manager, sent = uploaded
+    assert await manager.upload_config_diff() == 0
+    assert sent == {'lines': [], 'requests': []}
+
+
+@pytest.mark.asyncio
+async def test_diff_upload_sends_changed_lines(uploaded):
+    """Отправляются только изменённые страницы, без перезагрузки."""
+    manager, sent = uploaded
+    replace_line(manager, 'pn=1&', 'pn=1&pty=1&m=0&d=0&emt=Люстра')
+    replace_line(
+        manager, 'cf=10&prn=0&', 'cf=10&prn=0&prp=1&prv=5&prd=7:0&prc=0'
+    )
+    progress = []
+
+    count = await manager.upload_config_diff(
+        progress=lambda sent, total: progress.append((sent, total))
+    )
+
+    assert count == 2
+    assert [manager.parse_line(line) for line in sent['lines']] == [
+        {'pn': '1', 'pty': '1', 'm': '0', 'd': '0', 'emt': 'Люстра',
+         'nr': '1'},
+        {'cf': '10', 'prn': '0', 'prp': '1', 'prv': '5', 'prd': '7:0',
+         'prc': '0', 'nr': '1'},
+    ]
+    assert progress == [(1, 2), (2, 2)]
+    assert sent['requests'] == []
+
+
+@pytest.mark.asyncio
+async def test_diff_upload_restarts_on_port_type(uploaded):
+    manager, sent = uploaded
+    replace_line(manager, 'pn=1&', 'pn=1&pty=0&m=0&emt=Свет')
+
+    assert await manager.upload_config_diff() == 1
+    assert sent['requests'] == [{'restart': 1}]
+
+
+def test_port_pages_keyed_by_port_number():
+    hashes = MegaDConfigManager.get_config_hashes(
+        ['cf=1&pwd=sec&nr=1\n', 'pn=0&pty=0&nr=1\n', 'pn=1&pty=1&nr=1\n',
+         'pt=33&ext=4&ept=&nr=1\n']
+    )
+    assert list(hashes) == ['cf=1', 'pt=0', 'pt=1', 'pt=33&ext=4']
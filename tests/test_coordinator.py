@@ -0,0 +1,104 @@
+"""События портов в MegaDCoordinator."""
+import asyncio
+
+import pytest
+import pytest_asyncio
+from homeassistant.core import HomeAssistant
+
+from custom_components.megad import MegaDCoordinator
+from custom_components.megad.const import DOMAIN, ENTRIES, STATE_BUTTON
+
+
+class FakeMegaD:
+    """Контроллер, который запоминает состояния портов."""
+
+    def __init__(self):
+        self.id = 'mg1'
+        self.states: list[tuple] = []
+
+    def update_port(self, port_id, data) -> bool:
+        self.states.append((port_id, data))
+        return True
+
+
+@pytest_asyncio.fixture
+async def hass(tmp_path):
+    hass = HomeAssistant(str(tmp_path))
+    hass.data[DOMAIN] = {ENTRIES: {}}
+    yield hass
+    await hass.async_stop(force=True)
+
+
+@pytest_asyncio.fixture
+async def coordinator(hass):
+    coordinator = MegaDCoordinator(hass, FakeMegaD())
+    yield coordinator
+    for timer in coordinator._reset_timers.values():
+        timer.cancel()
+
+
+def watch(coordinator: MegaDCoordinator, context) -> list:
+    """Счётчик оповещений сущности, подписанной на context."""
+    updates = []
+    coordinator.async_add_listener(lambda: updates.append(True), context)
+    return updates
+
+
+@pytest.mark.asyncio
+async def test_turn_off_state_after_delay(coordinator):
+    updates = watch(coordinator, 3)
+    click = {'pt': '3', 'click': '1'}
+    assert coordinator._turn_off_state(STATE_BUTTON.OFF, 0.2, 3, click)
+    await asyncio.sleep(0.12)
+    coordinator._turn_off_state(STATE_BUTTON.OFF, 0.2, 3, click)
+    await asyncio.sleep(0.12)
+    assert coordinator.megad.states == [(3, click), (3, click)]
+    assert updates == []
+
+    await asyncio.sleep(0.15)
+    assert coordinator.megad.states[2:] == [(3, STATE_BUTTON.OFF)]
+    assert coordinator._reset_timers == {}
+    await asyncio.sleep(0)
+    assert updates == [True]
+
+
+@pytest.mark.asyncio
+async def test_queue_port_event_batches(coordinator, monkeypatch):
+    """События за окно применяются одной пачкой с одним оповещением."""
+    applied = []
+
+    def apply_port_event(port_id, data, ext=False) -> set:
+        applied.append((port_id, data, ext))
+        return {port_id}
+
+    monkeypatch.setattr(coordinator, '_apply_port_event', apply_port_event)
+    coordinator.batch_window = 0.05
+    updates = watch(coordinator, None)
+
+    coordinator.queue_port_event('3', {'pt': '3', 'm': '2'})
+    coordinator.queue_port_event('5', {'pt': '5', 'ext0': '1'}, ext=True)
+    coordinator.queue_port_event('3', {'pt': '3', 'm': '1'})
+    coordinator.queue_port_event('5', {'pt': '5', 'ext1': '0'}, ext=True)
+    await asyncio.sleep(0)
+    assert applied == []
+
+    await asyncio.sleep(0.1)
+    assert applied == [
+        (5, {'pt': '5', 'ext0': '1', 'ext1': '0'}, True),
+        (3, {'pt': '3', 'm': '1'}, False),
+    ]
+    assert updates == [True]
+    assert coordinator._flush_handle is None
+
+
+@pytest.mark.asyncio
+async def test_queue_port_event_next_iteration(coordinator, monkeypatch):
+    applied = []
+    monkeypatch.setattr(
+        coordinator, '_apply_port_event',
+        lambda port_id, data, ext=False: applied.append(port_id) or set()
+    )
+    coordinator.queue_port_event('3', {'pt': '3'})
+    coordinator.queue_port_event('4', {'pt': '4'})
+    await asyncio.sleep(0)
+    assert applied == [3, 4]
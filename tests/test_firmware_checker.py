@@ -0,0 +1,114 @@
+"""Условный запрос страницы прошивок к локальному тестовому серверу."""
+import os
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from homeassistant.core import HomeAssistant
+
+from custom_components.megad.const import (
+    DOMAIN, ENTRIES, TIME_CHECK_FIRMWARE, STORAGE_KEY_FIRMWARE
+)
+from custom_components.megad.core import request_to_ablogru
+from custom_components.megad.core.request_to_ablogru import FirmwareChecker
+
+ETAG = '"fw-1"'
+LAST_MODIFIED = 'Wed, 01 Jan 2025 03:00:00 GMT'
+PAGE = '''<html><body><div class="cnt"><ul>
+<li><font>MegaD-2561 ver 4.63b2</font><br>Исправления.
+<a href="/fw/megad-2561-4.63b2.hex">hex</a></li>
+<li><font>MegaD-2561 ver 4.62b8</font><br>Новые датчики.
+<a href="/fw/megad-2561-4.62b8.hex">hex</a></li>
+</ul></div></body></html>'''
+
+
+class ReleaseSite:
+    """Страница прошивок с ETag и Last-Modified."""
+
+    def __init__(self):
+        self.requests: list[dict] = []
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests.append(dict(request.headers))
+        if (request.headers.get('If-None-Match') == ETAG
+                and request.headers.get('If-Modified-Since') == LAST_MODIFIED):
+            return web.Response(status=304)
+        return web.Response(
+            text=PAGE, content_type='text/html',
+            headers={'ETag': ETAG, 'Last-Modified': LAST_MODIFIED}
+        )
+
+
+@pytest_asyncio.fixture
+async def hass(tmp_path):
+    hass = HomeAssistant(str(tmp_path))
+    hass.data[DOMAIN] = {ENTRIES: {}}
+    yield hass
+    await hass.async_stop(force=True)
+
+
+@pytest_asyncio.fixture
+async def site(monkeypatch):
+    site = ReleaseSite()
+    app = web.Application()
+    app.router.add_get('/firmware', site.handle)
+    server = TestServer(app, host='127.0.0.1')
+    await server.start_server()
+    monkeypatch.setattr(
+        request_to_ablogru, 'RELEASE_URL', str(server.make_url('/firmware'))
+    )
+    yield site
+    await server.close()
+
+
+def expire(checker: FirmwareChecker):
+    """Сдвигает время проверки, чтобы следующий вызов обратился к сайту."""
+    checker._last_check = datetime.now() - TIME_CHECK_FIRMWARE
+
+
+@pytest.mark.asyncio
+async def test_conditional_get(hass, site):
+    checker = FirmwareChecker(hass)
+    await checker.update_page_firmwares()
+    assert 'If-None-Match' not in site.requests[0]
+    assert checker.get_latest_version('4.62b8')['name'] == '4.63b2'
+    page_hash = checker._page_hash
+
+    await checker.update_page_firmwares()
+    assert len(site.requests) == 1
+
+    expire(checker)
+    await checker.update_page_firmwares()
+    assert site.requests[1]['If-None-Match'] == ETAG
+    assert site.requests[1]['If-Modified-Since'] == LAST_MODIFIED
+    assert checker.page_firmware == PAGE
+    assert checker._page_hash == page_hash
+    assert checker.get_latest_version('4.62b8')['name'] == '4.63b2'
+
+
+@pytest.mark.asyncio
+async def test_store_round_trip(hass, site):
+    checker = FirmwareChecker(hass)
+    await checker.update_page_firmwares()
+    await hass.async_block_till_done()
+    assert os.path.isfile(hass.config.path('.storage', STORAGE_KEY_FIRMWARE))
+
+    restored = FirmwareChecker(hass)
+    await restored.async_load()
+    assert restored.page_firmware == PAGE
+    assert restored._etag == ETAG
+    assert restored._last_modified == LAST_MODIFIED
+    assert restored._versions == checker._versions
+    assert restored.get_latest_version('4.62b8') == (
+        checker.get_latest_version('4.62b8')
+    )
+
+    await restored.update_page_firmwares()
+    assert len(site.requests) == 1
+
+    expire(restored)
+    await restored.update_page_firmwares()
+    assert site.requests[1]['If-None-Match'] == ETAG
+    assert restored.page_firmware == PAGE
@@ -0,0 +1,149 @@
+"""Прошивка через MegaDFlasher с локальной заменой загрузчика по UDP."""
+import asyncio
+
+import pytest
+
+from custom_components.megad.core import flasher as flasher_module
+from custom_components.megad.core.const_fw import (
+    BLOCK_SIZE, BROADCAST_START, BROADCAST_CLEAR, BROADCAST_EEPROM,
+    BROADCAST_EEPROM_CONFIRM, BROADCAST_REBOOT, CHECK_DATA
+)
+from custom_components.megad.core.exceptions import FlashError
+from custom_components.megad.core.flasher import MegaDFlasher
+from custom_components.megad.update import MegaDFirmwareUpdate
+
+HOST = '127.0.0.1'
+
+
+class BootloaderStub(asyncio.DatagramProtocol):
+    """
+    Загрузчик MegaD: отвечает на команды и пишет блоки прошивки подряд.
+    Блок с номером предыдущего записывается заново по тому же адресу.
+    """
+
+    def __init__(self, silent: bool = False, drop_ack: set[int] = frozenset(),
+                 stale_ack: set[int] = frozenset()):
+        self.silent = silent
+        self.drop_ack = set(drop_ack)
+        self.stale_ack = set(stale_ack)
+        self.image = bytearray()
+        self._address = 0
+        self._last_id: int | None = None
+        self.sent: dict[int, int] = {}
+        self.commands: list[bytes] = []
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr: tuple):
+        if self.silent:
+            return
+        if data[2] == 0x01 and data[3:5] == CHECK_DATA:
+            self._block(data, addr)
+            return
+        command = data[:3]
+        self.commands.append(command)
+        match command:
+            case _ if command == BROADCAST_START:
+                self.transport.sendto(b'\xAA\x00\x9A', addr)
+            case _ if command in (BROADCAST_CLEAR, BROADCAST_EEPROM,
+                                  BROADCAST_REBOOT):
+                self.transport.sendto(b'\xAA\x00', addr)
+            case _ if command == BROADCAST_EEPROM_CONFIRM:
+                self.transport.sendto(b'\xAA\x01', addr)
+
+    def _block(self, data: bytes, addr: tuple):
+        msg_id = data[1]
+        self.sent[msg_id] = self.sent.get(msg_id, 0) + 1
+        if msg_id != self._last_id:
+            self._address = len(self.image)
+            self._last_id = msg_id
+        block = data[5:]
+        self.image[self._address:self._address + len(block)] = block
+        if msg_id in self.drop_ack:
+            self.drop_ack.discard(msg_id)
+            return
+        if msg_id in self.stale_ack:
+            self.transport.sendto(bytes([0xAA, msg_id - 1]), addr)
+        self.transport.sendto(bytes([0xAA, msg_id]), addr)
+
+
+@pytest.fixture
+def fast_timeouts(monkeypatch):
+    monkeypatch.setattr(flasher_module, 'RECV_TIMEOUT', 0.05)
+    monkeypatch.setattr(flasher_module, 'FLASH_START_ATTEMPTS', 2)
+    monkeypatch.setattr(flasher_module, 'FLASH_START_TIMEOUT', 0.2)
+    monkeypatch.setattr(flasher_module, 'FLASH_BLOCK_TIMEOUT', 0.2)
+
+
+async def start_stub(stub: BootloaderStub) -> tuple:
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: stub, local_addr=(HOST, 0)
+    )
+    return transport, transport.get_extra_info('sockname')[1]
+
+
+@pytest.mark.asyncio
+async def test_flash(fast_timeouts):
+    stub = BootloaderStub(drop_ack={1}, stale_ack={2})
+    transport, port = await start_stub(stub)
+    firmware = bytes(i % 251 for i in range(BLOCK_SIZE * 3 + 10))
+    progress = []
+    try:
+        async with MegaDFlasher(
+                HOST, HOST, progress.append, recv_port=0, target_port=port
+        ) as flasher:
+            await flasher.flash(memoryview(firmware))
+    finally:
+        transport.close()
+    assert stub.image == firmware
+    assert stub.sent == {0: 1, 1: 2, 2: 1, 3: 1}
+    assert progress[-1] == 100
+    assert stub.commands[-3:] == [
+        BROADCAST_EEPROM, BROADCAST_EEPROM_CONFIRM, BROADCAST_REBOOT
+    ]
+
+
+@pytest.mark.asyncio
+async def test_flash_no_answer(fast_timeouts):
+    stub = BootloaderStub(silent=True)
+    transport, port = await start_stub(stub)
+    try:
+        async with MegaDFlasher(
+                HOST, HOST, recv_port=0, target_port=port
+        ) as flasher:
+            with pytest.raises(FlashError):
+                await flasher.flash(memoryview(bytes(BLOCK_SIZE)))
+    finally:
+        transport.close()
+
+
+@pytest.mark.asyncio
+async def test_flash_msg_id_wraps(fast_timeouts):
+    """Номер блока после 255 начинается с нуля, блоки пишутся подряд."""
+    stub = BootloaderStub(drop_ack={0, 255})
+    transport, port = await start_stub(stub)
+    firmware = bytes(i % 253 for i in range(BLOCK_SIZE * 260))
+    try:
+        async with MegaDFlasher(
+                HOST, HOST, recv_port=0, target_port=port
+        ) as flasher:
+            await flasher.write(memoryview(firmware))
+    finally:
+        transport.close()
+    assert stub.image == firmware
+    assert stub.sent[0] == 3 and stub.sent[255] == 2
+
+
+def test_progress_written_on_percent_change():
+    entity = MegaDFirmwareUpdate.__new__(MegaDFirmwareUpdate)
+    entity._attr_update_percentage = None
+    written = []
+    entity.async_write_ha_state = lambda: written.append(
+        entity._attr_update_percentage
+    )
+    for percentage in (0, 0, 1, 1.5, 1.9, 2, 100, None):
+        entity._set_update_percentage(percentage)
+    assert written == [0, 1, 2, 100, None]
@@ -0,0 +1,109 @@
+"""Паритет разбора форм страниц MegaD с прежним разбором BeautifulSoup."""
+import random
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+from custom_components.megad.core.config_manager import MegaDConfigManager
+from custom_components.megad.core.form_parser import extract_form_params
+
+PAGES = Path(__file__).parent / 'fixtures' / 'pages'
+PAGE_FILES = sorted(PAGES.glob('*.html'))
+
+MALFORMED = [
+    '<form><input name=a value=1><br>text<input name=b value=2>',
+    '<form><input name=a value=1><form><input name=b value=2></form>'
+    '<input name=c value=3>',
+    '<form><input name=a value=1><form style="display:inline">'
+    '<input name=b value=2></form><input name=c value=3></form>',
+    '<html><body><form><input name=a value=1></body></html>'
+    '<input name=b value=2>',
+    '</form><form><input name=a value=1></form></form><input name=x value=0>',
+    '<form><select name=s><option value=1>a<option value=2 selected>b'
+    '</form><select name=t><option selected value=3></select>',
+    '<select name=a><option value=1><select name=b>'
+    '<option value=2 selected></select></select>',
+    '<form><select name=s><option value=1><form><input name=a value=1>'
+    '</option><input name=b value=2>',
+    '<form><textarea name=t><input name=x value=1></textarea>'
+    '<input name=y value=2></form>',
+    '<form><input name=e value="a&amp;b&lt;c &#1055;&quot;"></form>',
+    '<form><input type=checkbox name=c checked><input type=checkbox name=d>'
+    '<input type=CHECKBOX name=f checked><input type=Submit name=s value=x>'
+    '</form>',
+    '<form><input name=a name=b value=1 value=2><input value=1></form>',
+    '<select name=s><option selected>text</option></select>'
+    '<select><option selected value=1></select>',
+]
+
+# Разметка, из которой состоят страницы MegaD.
+TOKENS = [
+    '<form action=/sec/>', '</form>', '<form style="display:inline">',
+    '<input name=a{} value={}>', '<input type=hidden name=h{} value={}>',
+    '<input type=checkbox name=c{} checked>', '<input type=checkbox name=d{}>',
+    '<input type=submit value=S>', '<select name=s{}>', '</select>',
+    '<option value={}>', '<option value={} selected>', '</option>', '<br>',
+    'text ', '\n', '<a href=/sec/?pt={}>Back</a>',
+    '<textarea name=t{}>x</textarea>', '<textarea name=t>', '</textarea>',
+    '<table><tr><td>Port</td><td><input name=p{} value={}></td></tr></table>',
+]
+HEAD = '<html><head><meta name="viewport" content="width=device-width"></head>'
+
+
+def legacy_get_params(page: str) -> str:
+    """Прежний MegaDConfigManager.get_params на BeautifulSoup и lxml."""
+    params = ''
+    soup = BeautifulSoup(page, 'lxml')
+    for form in soup.find_all('form'):
+        if form.get('style') == 'display:inline':
+            continue
+        for inp in form.find_all('input'):
+            if inp.get('type') != "submit":
+                name = inp.get('name')
+                value = inp.get('value', '')
+                if inp.get('type') == "checkbox":
+                    value = '1' if inp.has_attr('checked') else ''
+                params += f"{name}={value}&"
+
+    for select in soup.find_all('select'):
+        name = select.get('name')
+        selected_option = select.find('option', selected=True)
+        if selected_option:
+            value = selected_option.get('value', '')
+            params += f"{name}={value}&"
+    return params.rstrip('&')
+
+
+def read_page(path: Path) -> str:
+    """Страница в кодировке cp1251, как её отдаёт контроллер."""
+    return path.read_bytes().decode('cp1251')
+
+
+@pytest.mark.parametrize('path', PAGE_FILES, ids=lambda path: path.stem)
+def test_golden_page(path: Path):
+    """Строка параметров совпадает с сохранённым выводом BeautifulSoup."""
+    expected = read_page(path.with_suffix('.txt'))
+    assert MegaDConfigManager.get_params(read_page(path)) == expected
+
+
+@pytest.mark.parametrize('path', PAGE_FILES, ids=lambda path: path.stem)
+def test_legacy_parity_page(path: Path):
+    page = read_page(path)
+    assert extract_form_params(page) == legacy_get_params(page)
+
+
+@pytest.mark.parametrize('page', MALFORMED)
+def test_legacy_parity_malformed(page: str):
+    assert extract_form_params(page) == legacy_get_params(page)
+
+
+def test_legacy_parity_random():
+    """Случайные страницы из разметки MegaD с незакрытыми тегами."""
+    rnd = random.Random(2561)
+    for _ in range(2000):
+        page = rnd.choice(('', HEAD + '<body>')) + ''.join(
+            rnd.choice(TOKENS).format(rnd.randint(0, 9), rnd.randint(0, 9))
+            for _ in range(rnd.randint(1, 25))
+        ) + rnd.choice(('', '</body></html>'))
+        assert extract_form_params(page) == legacy_get_params(page), page
@@ -0,0 +1,68 @@
+"""Пропуск опроса портов со свежими данными в режиме push-first."""
+import time
+from types import SimpleNamespace
+
+from custom_components.megad.const import PollCadence
+from custom_components.megad.core.enums import StrategyPollMegaD
+from custom_components.megad.core.megad import MegaD
+from custom_components.megad.core.poll_plan import PollStep
+
+RELAY = 1
+INPUT = 2
+BUS = 3
+I2C = 4
+
+
+def make_step(port_id: int, strategy: StrategyPollMegaD, requests: int = 0):
+    step = PollStep(
+        SimpleNamespace(conf=SimpleNamespace(id=port_id)), strategy
+    )
+    if strategy == StrategyPollMegaD.STATE_OR_I2C:
+        step.i2c_params = tuple(range(requests))
+    return step
+
+
+def make_megad(plan: list[PollStep], fresh: tuple[int, ...]) -> MegaD:
+    megad = MegaD.__new__(MegaD)
+    megad.poll_plan = plan
+    megad.push_first = True
+    megad.cadence = PollCadence(sweep=10)
+    megad._cycle = 1
+    now = time.monotonic()
+    megad._last_push = {port_id: now for port_id in fresh}
+    return megad
+
+
+def test_all_states_requested_for_relay():
+    """Реле без сообщений на сервер требует общий запрос состояний."""
+    megad = make_megad([
+        make_step(RELAY, StrategyPollMegaD.STATE),
+        make_step(INPUT, StrategyPollMegaD.STATE),
+        make_step(BUS, StrategyPollMegaD.ONE_WIRE_BUS),
+    ], fresh=(INPUT, BUS))
+    steps = megad.get_poll_steps()
+    assert [step.port.conf.id for step in steps] == [RELAY, INPUT]
+    assert megad.count_poll_requests() == 2
+    assert megad.count_poll_requests(steps) == 1
+
+
+def test_all_states_skipped_when_all_fresh():
+    megad = make_megad([
+        make_step(INPUT, StrategyPollMegaD.STATE),
+        make_step(I2C, StrategyPollMegaD.STATE_OR_I2C, requests=2),
+        make_step(BUS, StrategyPollMegaD.ONE_WIRE_BUS),
+    ], fresh=(INPUT, I2C))
+    steps = megad.get_poll_steps()
+    assert [step.port.conf.id for step in steps] == [BUS]
+    assert megad.count_poll_requests() == 4
+    assert megad.count_poll_requests(steps) == 1
+
+
+def test_sweep_cycle_polls_all_ports():
+    plan = [
+        make_step(INPUT, StrategyPollMegaD.STATE),
+        make_step(I2C, StrategyPollMegaD.STATE_OR_I2C, requests=1),
+    ]
+    megad = make_megad(plan, fresh=(INPUT, I2C))
+    megad._cycle = 10
+    assert megad.get_poll_steps() == plan
@@ -0,0 +1,54 @@
+"""Разбор правил и выбор локальных реакций на события портов."""
+import pytest
+
+from custom_components.megad.core.exceptions import InvalidReactionRule
+from custom_components.megad.core.reactions import (
+    ReactionEngine, parse_reactions
+)
+
+RULES = '3.single=7:2;8:2, 5.LONG=9:0\n3.double=g1:1 4.release=7:0;p20;8:1'
+
+
+def test_parse_reactions():
+    assert parse_reactions(RULES) == {
+        (3, 'single'): '7:2;8:2',
+        (5, 'long'): '9:0',
+        (3, 'double'): 'g1:1',
+        (4, 'release'): '7:0;p20;8:1',
+    }
+    assert parse_reactions('  ') == {}
+
+
+@pytest.mark.parametrize('rules', [
+    '3single=7:1', '3.hold=7:1', '3.single=7-1', '3.single=7:1;',
+    'x.single=7:1', '3.single=g1:5',
+])
+def test_parse_reactions_invalid(rules: str):
+    with pytest.raises(InvalidReactionRule):
+        parse_reactions(rules)
+
+
+@pytest.mark.parametrize('port_id, params, command', [
+    ('3', {'pt': '3', 'click': '1'}, '7:2;8:2'),
+    (3, {'pt': '3', 'click': '2'}, 'g1:1'),
+    ('5', {'pt': '5', 'm': '2'}, '9:0'),
+    ('4', {'pt': '4', 'm': '1'}, '7:0;p20;8:1'),
+    ('3', {'pt': '3'}, None),
+    ('6', {'pt': '6', 'click': '1'}, None),
+    ('3e1', {'pt': '3', 'ext': '1'}, None),
+])
+def test_match(port_id, params: dict, command: str | None):
+    assert ReactionEngine(RULES).match(port_id, params) == command
+
+
+def test_empty_engine():
+    engine = ReactionEngine()
+    assert not engine
+    assert engine.match('3', {'pt': '3', 'click': '1'}) is None
+
+
+def test_port_states_stop_at_pause():
+    assert ReactionEngine.get_port_states('7:2;8:1;g1:0;9:0') == {
+        7: 2, 8: 1, 9: 0
+    }
+    assert ReactionEngine.get_port_states('7:0;p20;8:1') == {7: 0}
@@ -0,0 +1,81 @@
+"""Опрос контроллера во время восстановления конфигурации."""
+import asyncio
+
+import pytest
+import pytest_asyncio
+from homeassistant.core import HomeAssistant
+
+from custom_components.megad import MegaDCoordinator
+from custom_components.megad import services
+from custom_components.megad.const import DOMAIN, ENTRIES
+
+
+class FakeMegaD:
+    """Контроллер, который считает опросы."""
+
+    def __init__(self, config_path: str):
+        self.id = 'mg1'
+        self.url = 'http://192.168.0.14/sec/'
+        self.config_path = config_path
+        self.scheduler = None
+        self.is_flashing = False
+        self.is_restoring = False
+        self.is_available = True
+        self.polls = 0
+
+    async def update_data(self):
+        self.polls += 1
+
+
+class FakeConfigManager:
+    """Загрузка конфигурации, во время которой проходит опрос."""
+
+    coordinator: MegaDCoordinator
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    async def read_config_file(self):
+        pass
+
+    async def upload_config(self, **kwargs):
+        await self.coordinator.async_refresh()
+
+    async def wait_ready(self) -> bool:
+        await self.coordinator.async_refresh()
+        return True
+
+    async def check_drift(self) -> dict:
+        return {'changed': [], 'missing': [], 'added': []}
+
+
+@pytest_asyncio.fixture
+async def hass(tmp_path):
+    hass = HomeAssistant(str(tmp_path))
+    hass.data[DOMAIN] = {ENTRIES: {}}
+    yield hass
+    await hass.async_stop(force=True)
+
+
+@pytest.mark.asyncio
+async def test_polling_paused_during_restore(hass, tmp_path, monkeypatch):
+    megad = FakeMegaD(str(tmp_path / 'megad.cfg'))
+    (tmp_path / 'megad.cfg').write_text('cf=1&nr=1\n')
+    coordinator = MegaDCoordinator(hass, megad)
+    FakeConfigManager.coordinator = coordinator
+    monkeypatch.setattr(services, 'MegaDConfigManager', FakeConfigManager)
+
+    async def request_refresh():
+        await coordinator.async_refresh()
+
+    monkeypatch.setattr(coordinator, 'async_request_refresh', request_refresh)
+
+    result = await services.async_restore_config(
+        hass, coordinator, asyncio.Semaphore(1), megad.config_path,
+        differential=False, timeout=0
+    )
+
+    assert result['verified'] and result['error'] is None
+    assert not megad.is_restoring
+    assert megad.polls == 1
+    assert coordinator.last_update_success
@@ -0,0 +1,130 @@
+"""Очередь и темп запросов MegaDRequestScheduler."""
+import asyncio
+
+import pytest
+
+from custom_components.megad.const import (
+    TIME_PACE_MIN, TIME_PACE_MAX, PACE_LATENCY_FACTOR
+)
+from custom_components.megad.core.enums import RequestPriority
+from custom_components.megad.core.scheduler import MegaDRequestScheduler
+
+
+def make_scheduler() -> MegaDRequestScheduler:
+    return MegaDRequestScheduler('mg1', session=None)
+
+
+async def enqueue(
+        scheduler: MegaDRequestScheduler, served: list, name: str,
+        priority: RequestPriority
+) -> asyncio.Task:
+    """Запрос, который отмечает получение очереди и ждёт освобождения."""
+    loop = asyncio.get_running_loop()
+
+    async def wait():
+        await scheduler._acquire(loop, priority)
+        served.append(name)
+
+    task = loop.create_task(wait())
+    await asyncio.sleep(0)
+    return task
+
+
+@pytest.mark.asyncio
+async def test_priority_order():
+    scheduler = make_scheduler()
+    loop = asyncio.get_running_loop()
+    await scheduler._acquire(loop, RequestPriority.POLLING)
+    served = []
+    tasks = [
+        await enqueue(scheduler, served, 'poll-1', RequestPriority.POLLING),
+        await enqueue(scheduler, served, 'config', RequestPriority.CONFIG),
+        await enqueue(scheduler, served, 'command', RequestPriority.COMMAND),
+        await enqueue(scheduler, served, 'poll-2', RequestPriority.POLLING),
+    ]
+    assert scheduler.queued == {'COMMAND': 1, 'POLLING': 2, 'CONFIG': 1}
+
+    for _ in tasks:
+        scheduler._release()
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    assert served == ['command', 'poll-1', 'poll-2', 'config']
+
+    scheduler._release()
+    assert not scheduler._active
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_skipped():
+    scheduler = make_scheduler()
+    loop = asyncio.get_running_loop()
+    await scheduler._acquire(loop, RequestPriority.POLLING)
+    served = []
+    command = await enqueue(
+        scheduler, served, 'command', RequestPriority.COMMAND
+    )
+    poll = await enqueue(scheduler, served, 'poll', RequestPriority.POLLING)
+
+    command.cancel()
+    await asyncio.sleep(0)
+    scheduler._release()
+    await poll
+    assert served == ['poll']
+    assert command.cancelled()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_after_grant_passes_turn():
+    """Запрос, отменённый после получения очереди, передаёт её дальше."""
+    scheduler = make_scheduler()
+    loop = asyncio.get_running_loop()
+    await scheduler._acquire(loop, RequestPriority.POLLING)
+    served = []
+    command = await enqueue(
+        scheduler, served, 'command', RequestPriority.COMMAND
+    )
+    poll = await enqueue(scheduler, served, 'poll', RequestPriority.POLLING)
+
+    scheduler._release()
+    command.cancel()
+    await asyncio.sleep(0)
+    await poll
+    assert served == ['poll']
+    scheduler._release()
+    assert not scheduler._active and not scheduler._waiters
+
+
+def test_interval_adapts_to_latency_and_busy():
+    scheduler = make_scheduler()
+    assert scheduler.interval == TIME_PACE_MAX
+
+    scheduler._register(0.1, busy=False)
+    assert scheduler.interval == pytest.approx(0.1 * PACE_LATENCY_FACTOR)
+
+    for _ in range(5):
+        scheduler._register(0.1, busy=True)
+    assert scheduler.busy_rate > 0.5
+    assert scheduler.interval > 0.1 * PACE_LATENCY_FACTOR
+    assert scheduler.interval <= TIME_PACE_MAX
+
+    for _ in range(100):
+        scheduler._register(0.001, busy=False)
+    assert scheduler.interval == TIME_PACE_MIN
+    assert scheduler.count_requests == 106
+    assert scheduler.count_busy == 5
+
+
+@pytest.mark.asyncio
+async def test_wait_pace():
+    scheduler = make_scheduler()
+    scheduler._register(0.2, busy=False)
+    loop = asyncio.get_running_loop()
+    scheduler._last_request = loop.time()
+    start = loop.time()
+    await scheduler._wait_pace(loop)
+    assert loop.time() - start >= scheduler.interval * 0.9
+
+    scheduler._last_request = loop.time() - scheduler.interval
+    start = loop.time()
+    await scheduler._wait_pace(loop)
+    assert loop.time() - start < TIME_PACE_MIN